@@ -0,0 +1,7 @@
+"""Benchmarks voor de NL Supermarkt MCP server.
+
+- generate_data: vult een lokale PostgreSQL met een synthetische dataset
+- run_benchmarks: roept alle tools direct aan en schrijft een JSON rapport
+- loadtest: gelijktijdige SSE sessies tegen server_sse, levert een saturatiecurve
+- prepared_statements: planning tijd van prepared statements vs. gewone query tekst
+"""
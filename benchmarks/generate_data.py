@@ -0,0 +1,398 @@
+#!/usr/bin/env python3
+"""
+Vul een lokale PostgreSQL met een realistische synthetische dataset.
+
+Standaard volumes: 16 ketens, 200k producten, een jaar prijshistorie, 20k
+aanbiedingen, 2k recepten, 10k alerts en ~2.400 winkellocaties.
+
+Gebruik (vanuit de repository root):
+    python -m benchmarks.generate_data --reset
+"""
+import argparse
+import io
+import json
+import os
+import random
+import sys
+import time
+from datetime import date, datetime, timedelta
+
+import psycopg2
+
+from src.categories import classify
+from src import promo_history
+from src.promo_history import archive_and_refresh, ensure_partitions
+from src.recipes import ingredient_tokens, tag_tokens
+from src.store_stats import refresh_store_stats
+from sync_prices import normalize_unit_price
+
+DB_CONFIG = {
+    'host': os.environ.get('DB_HOST', '127.0.0.1'),
+    'port': int(os.environ.get('DB_PORT', '5433')),
+    'database': os.environ.get('DB_NAME', 'supermarkt_db'),
+    'user': os.environ.get('DB_USER', 'postgres'),
+    'password': os.environ.get('DB_PASSWORD', '')
+}
+
+INIT_SQL = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'docker', 'init.sql')
+
+CHAINS = [
+    'ah', 'jumbo', 'aldi', 'lidl', 'plus', 'dekamarkt', 'vomar', 'dirk',
+    'coop', 'hoogvliet', 'spar', 'picnic', 'nettorama', 'poiesz', 'janlinders', 'boni',
+]
+
+BRANDS = [
+    'AH', 'Jumbo', 'Plus', 'Campina', 'Arla', 'Unox', 'Knorr', 'Heinz', 'Calve', 'Conimex',
+    'Douwe Egberts', 'Pickwick', 'Coca-Cola', 'Pepsi', 'Heineken', 'Grolsch', 'Hertog Jan',
+    "Lay's", 'Doritos', 'Verkade', 'Milka', 'Dove', 'Nivea', 'Robijn', 'Ariel', 'Page',
+    'Zwitsal', 'Optimel', 'Vifit', 'Bolletje', 'Lassie', 'Honig', 'Bertolli', 'Grand Italia',
+    'Zaanlander', 'Beemster', 'Becel', 'Blue Band', 'Hak', 'Bonduelle', '1 de Beste',
+]
+
+# (producttype, mogelijke eenheden, prijsrange)
+PRODUCT_TYPES = [
+    ('halfvolle melk', ['1 l', '1,5 l', '0,5 l'], (0.9, 2.2)),
+    ('volle melk', ['1 l', '1,5 l'], (1.0, 2.4)),
+    ('karnemelk', ['1 l', '0,5 l'], (0.8, 1.8)),
+    ('yoghurt naturel', ['500 g', '1 kg'], (0.9, 2.9)),
+    ('griekse yoghurt', ['500 g', '1 kg'], (1.5, 4.5)),
+    ('kwark', ['500 g', '250 g'], (1.0, 3.0)),
+    ('vla', ['1 l'], (1.0, 2.5)),
+    ('goudse kaas jong belegen', ['500 g', '1 kg', '200 g'], (3.0, 12.0)),
+    ('goudse kaas oud', ['500 g', '200 g'], (4.0, 9.0)),
+    ('geraspte kaas', ['150 g', '200 g'], (1.5, 3.5)),
+    ('roomboter', ['250 g'], (2.0, 3.8)),
+    ('eieren', ['10 stuks', '6 stuks', '12 stuks'], (1.8, 5.0)),
+    ('slagroom', ['250 ml', '500 ml'], (1.2, 3.0)),
+    ('wit brood', ['800 g', '400 g'], (1.0, 3.0)),
+    ('volkoren brood', ['800 g'], (1.3, 3.5)),
+    ('croissants', ['6 stuks', '4 stuks'], (1.5, 3.5)),
+    ('kipfilet', ['500 g', '1 kg', '300 g'], (3.5, 12.0)),
+    ('rundergehakt', ['500 g', '300 g', '1 kg'], (3.0, 10.0)),
+    ('half om half gehakt', ['500 g', '1 kg'], (3.0, 8.0)),
+    ('rookworst', ['275 g', '2 x 275 g'], (2.0, 5.0)),
+    ('spekblokjes', ['150 g', '2 x 125 g'], (1.5, 3.5)),
+    ('zalmfilet', ['250 g', '500 g'], (4.0, 12.0)),
+    ('tonijn in olijfolie', ['3 x 80 g', '160 g'], (1.5, 5.0)),
+    ('garnalen', ['200 g', '400 g'], (3.0, 9.0)),
+    ('spaghetti', ['500 g', '1 kg'], (0.7, 2.5)),
+    ('penne', ['500 g'], (0.7, 2.2)),
+    ('macaroni', ['500 g'], (0.7, 2.0)),
+    ('lasagnebladen', ['250 g', '500 g'], (1.0, 2.8)),
+    ('basmati rijst', ['1 kg', '500 g'], (1.5, 4.0)),
+    ('pandan rijst', ['1 kg', '2 kg'], (1.5, 5.0)),
+    ('tomaten', ['500 g', '1 kg', '250 g'], (1.0, 3.5)),
+    ('cherrytomaatjes', ['250 g', '500 g'], (1.0, 3.0)),
+    ('komkommer', ['per stuk'], (0.5, 1.2)),
+    ('paprika', ['3 stuks', 'per stuk', '500 g'], (0.6, 2.5)),
+    ('uien', ['1 kg', '500 g'], (0.8, 2.0)),
+    ('aardappelen', ['1,5 kg', '2,5 kg', '1 kg'], (1.5, 4.5)),
+    ('broccoli', ['500 g', 'per stuk'], (1.0, 2.5)),
+    ('bananen', ['1 kg', '5 stuks'], (1.0, 2.5)),
+    ('appels', ['1 kg', '6 stuks', '1,5 kg'], (1.5, 4.0)),
+    ('sinaasappels', ['1,5 kg', '2 kg'], (2.0, 4.5)),
+    ('passata', ['500 g', '690 g'], (0.8, 2.5)),
+    ('pindakaas', ['350 g', '600 g', '1 kg'], (1.8, 6.0)),
+    ('hagelslag', ['400 g', '600 g'], (1.5, 4.0)),
+    ('koffiebonen', ['500 g', '1 kg'], (4.0, 15.0)),
+    ('filterkoffie', ['500 g', '250 g'], (3.0, 9.0)),
+    ('thee', ['20 zakjes', '40 zakjes'], (1.0, 4.0)),
+    ('cola', ['1,5 l', '6 x 330 ml', '1 l'], (1.0, 6.0)),
+    ('sinaasappelsap', ['1 l', '1,5 l'], (1.2, 3.5)),
+    ('pils', ['6 x 300 ml', '24 x 300 ml', '12 x 330 ml'], (4.0, 18.0)),
+    ('chips naturel', ['225 g', '150 g'], (1.0, 3.0)),
+    ('chocolade melk', ['100 g', '200 g'], (1.0, 3.5)),
+    ('tandpasta', ['75 ml', '2 x 75 ml'], (1.0, 5.0)),
+    ('shampoo', ['250 ml', '400 ml'], (1.5, 7.0)),
+    ('douchegel', ['250 ml', '500 ml'], (1.2, 5.0)),
+    ('deodorant', ['150 ml', '200 ml'], (1.5, 6.0)),
+    ('wasmiddel', ['40 wasbeurten', '1,5 l', '2 l'], (4.0, 20.0)),
+    ('toiletpapier', ['8 rollen', '16 rollen', '24 rollen'], (2.5, 12.0)),
+    ('afwasmiddel', ['500 ml', '1 l'], (1.0, 4.0)),
+    ('pizza margherita', ['350 g', '2 x 350 g'], (2.0, 6.0)),
+    ('ijs vanille', ['900 ml', '1 l'], (2.0, 6.0)),
+]
+
+VARIANTS = [
+    '', 'bio', 'light', 'extra', 'mini', 'groot', 'familieverpakking', 'naturel', 'original',
+    'premium', 'voordeelverpakking', 'vers', 'klassiek', 'huismerk', 'basic',
+]
+
+PROMO_TYPES = ['folder', '1+1 gratis', '2e halve prijs', 'prijsdaling', '25% korting', '2 voor 3']
+
+RECIPE_CATEGORIES = ['pasta', 'rijst', 'hollands', 'vegetarisch', 'snel', 'oven', 'noodles', 'soep']
+RECIPE_TAGS = ['snel', 'gezond', 'comfort', 'italiaans', 'indonesisch', 'vegetarisch', 'vegan',
+               'glutenvrij', 'kindvriendelijk', 'winter', 'zomer', 'wok', 'oven', 'kip', 'gehakt']
+INGREDIENTS = [
+    'spaghetti', 'penne', 'rijst', 'kipfilet', 'rundergehakt', 'ui', 'knoflook', 'tomaten',
+    'passata', 'paprika', 'broccoli', 'wortel', 'aardappelen', 'eieren', 'melk', 'roomboter',
+    'geraspte kaas', 'spekblokjes', 'zalmfilet', 'garnalen', 'sla', 'komkommer', 'tofu',
+    'sojasaus', 'kokosmelk', 'kerrie', 'prei', 'champignons', 'spinazie', 'room', 'citroen',
+]
+CITIES = ['Amsterdam', 'Rotterdam', 'Den Haag', 'Utrecht', 'Eindhoven', 'Groningen', 'Tilburg',
+          'Almere', 'Breda', 'Nijmegen', 'Apeldoorn', 'Haarlem', 'Arnhem', 'Zwolle', 'Leiden']
+
+
+def copy_rows(cur, table, columns, rows):
+    """Schrijf rijen met COPY; veel sneller dan losse INSERTs"""
+    buf = io.StringIO()
+    for row in rows:
+        buf.write('\t'.join(_copy_value(v) for v in row))
+        buf.write('\n')
+    buf.seek(0)
+    cur.copy_expert(f'COPY {table} ({", ".join(columns)}) FROM STDIN', buf)
+
+
+def pg_array(values):
+    """TEXT[] literal voor COPY (categoriecodes bevatten geen quotes of komma's)"""
+    return '{' + ','.join(values) + '}'
+
+
+def _copy_value(v):
+    if v is None:
+        return '\\N'
+    if isinstance(v, (dict, list)):
+        v = json.dumps(v)
+    return str(v).replace('\\', '\\\\').replace('\t', ' ').replace('\n', ' ')
+
+
+def chunked(iterable, size):
+    chunk = []
+    for item in iterable:
+        chunk.append(item)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def generate_products(rng, total):
+    """Genereer unieke (keten, naam) combinaties, gelijk verdeeld over de ketens"""
+    per_chain = total // len(CHAINS)
+    combos = len(BRANDS) * len(PRODUCT_TYPES) * len(VARIANTS)
+    now = datetime.now()
+    for chain in CHAINS:
+        for idx in rng.sample(range(combos), min(per_chain, combos)):
+            brand = BRANDS[idx % len(BRANDS)]
+            ptype, units, (low, high) = PRODUCT_TYPES[(idx // len(BRANDS)) % len(PRODUCT_TYPES)]
+            variant = VARIANTS[idx // (len(BRANDS) * len(PRODUCT_TYPES))]
+            name = ' '.join(part for part in (brand, ptype, variant) if part)
+            unit = rng.choice(units)
+            price = round(rng.uniform(low, high), 2)
+            quantity, base_unit, unit_price = normalize_unit_price(price, unit)
+            link = f'https://example.invalid/{chain}/{idx}'
+            yield (chain, name, price, unit, link, quantity, base_unit, unit_price, now, pg_array(classify(name)))
+
+
+def generate_price_history(rng, products, days, interval):
+    """Random walk per product die eindigt op de huidige prijs"""
+    today = datetime.now().replace(hour=7, minute=0, second=0, microsecond=0)
+    points = days // interval
+    for product_id, price in products:
+        price = float(price)
+        walk = price
+        for i in range(points, 0, -1):
+            walk = max(0.1, round(walk * rng.uniform(0.93, 1.07), 2))
+            yield (product_id, walk, today - timedelta(days=i * interval))
+        yield (product_id, price, today)
+
+
+def generate_promotions(rng, products, total):
+    today = date.today()
+    for product_id, chain, name, price in rng.sample(products, min(total, len(products))):
+        price = float(price)
+        pct = rng.choice([10, 15, 20, 25, 30, 35, 40, 50])
+        start = today - timedelta(days=rng.randint(0, 6))
+        end = start + timedelta(days=7) if rng.random() < 0.8 else today - timedelta(days=1)
+        # Niet elke folder aanbieding is aan een product te koppelen
+        product_id = product_id if rng.random() < 0.85 else None
+        yield (chain, name, price, round(price * (100 - pct) / 100, 2), pct, rng.choice(PROMO_TYPES), start, end, product_id,
+               pg_array(classify(name)))
+
+
+def generate_promotion_history(rng, products, total, days):
+    """Eerdere aanbiedingen met een vaste cyclus per product (met wat spreiding)"""
+    today = date.today()
+    for product_id, chain, name, price in rng.sample(products, min(total, len(products))):
+        price = float(price)
+        interval = rng.choice([14, 21, 28, 35, 42, 56])
+        pct = rng.choice([15, 20, 25, 30, 35, 40, 50])
+        start = today - timedelta(days=rng.randint(interval, days))
+        while start < today - timedelta(days=7):
+            yield (chain, name, product_id, price, round(price * (100 - pct) / 100, 2), pct, 'folder',
+                   start, start + timedelta(days=7))
+            start += timedelta(days=interval + rng.randint(-3, 3))
+
+
+def generate_recipes(rng, total):
+    for i in range(total):
+        ingredients = rng.sample(INGREDIENTS, rng.randint(4, 9))
+        categorie = rng.choice(RECIPE_CATEGORIES)
+        tags = sorted(set(rng.sample(RECIPE_TAGS, rng.randint(1, 4)) + [categorie]))
+        ingredienten = [{'naam': ing, 'hoeveelheid': f'{rng.choice([100, 200, 250, 400, 500])}g'} for ing in ingredients]
+        yield (
+            f'{ingredients[0].capitalize()} met {ingredients[1]} #{i}', categorie,
+            rng.choice([15, 20, 25, 30, 45, 60, 90]), rng.choice([2, 4, 6]),
+            ingredienten,
+            [f'Stap {n}: bereid {ing}.' for n, ing in enumerate(ingredients, 1)],
+            tags, 'synthetic', None, None,
+            pg_array(ingredient_tokens(ingredienten)), pg_array(tag_tokens(tags)),
+        )
+
+
+def generate_alerts(rng, total):
+    for _ in range(total):
+        ptype, _, (low, high) = rng.choice(PRODUCT_TYPES)
+        query = f'{rng.choice(BRANDS)} {ptype}' if rng.random() < 0.3 else ptype
+        yield (query, round(rng.uniform(low, high), 2) if rng.random() < 0.7 else None, rng.random() < 0.8)
+
+
+def generate_locations(rng, per_chain):
+    for chain in CHAINS:
+        for i in range(per_chain):
+            stad = rng.choice(CITIES)
+            yield (
+                chain, f'{chain.upper()} {stad} {i}', f'Dorpsstraat {rng.randint(1, 300)}',
+                f'{rng.randint(1000, 9999)} {chr(rng.randint(65, 90))}{chr(rng.randint(65, 90))}', stad,
+                round(rng.uniform(50.75, 53.55), 7), round(rng.uniform(3.36, 7.22), 7), None,
+            )
+
+
+def generate_shopping_lists(rng, total):
+    for i in range(total):
+        items = [{'query': ptype, 'name': ptype, 'price': None}
+                 for ptype, _, _ in rng.sample(PRODUCT_TYPES, rng.randint(5, 20))]
+        yield (f'lijst-{i}' if i else 'weekboodschappen', items, None)
+
+
+def reset_data(cur):
+    cur.execute('''
+        TRUNCATE price_history, promotions, promotion_history, promo_cycle_stats, store_stats, products, recepten, product_alerts,
+            supermarket_locations, shopping_lists, budget_history RESTART IDENTITY CASCADE
+    ''')
+
+
+def timed(label):
+    class _Timer:
+        def __enter__(self):
+            self.start = time.perf_counter()
+            print(f'  {label:20}', end=' ', flush=True)
+            return self
+
+        def __exit__(self, *exc):
+            print(f'{time.perf_counter() - self.start:7.1f}s')
+    return _Timer()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--products', type=int, default=200_000)
+    parser.add_argument('--history-days', type=int, default=365)
+    parser.add_argument('--history-interval', type=int, default=7, help='Dagen tussen prijspunten')
+    parser.add_argument('--promotions', type=int, default=20_000)
+    parser.add_argument('--promo-history', type=int, default=10_000, help='Producten met eerdere aanbiedingen')
+    parser.add_argument('--recipes', type=int, default=2_000)
+    parser.add_argument('--alerts', type=int, default=10_000)
+    parser.add_argument('--locations-per-chain', type=int, default=150)
+    parser.add_argument('--shopping-lists', type=int, default=200)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--reset', action='store_true', help='Leeg alle datatabellen eerst (DESTRUCTIEF)')
+    args = parser.parse_args(argv)
+
+    rng = random.Random(args.seed)
+    conn = psycopg2.connect(**DB_CONFIG)
+    cur = conn.cursor()
+
+    print(f'Schema toepassen ({INIT_SQL})')
+    with open(INIT_SQL) as f:
+        cur.execute(f.read())
+    conn.commit()
+
+    cur.execute('SELECT COUNT(*) FROM products')
+    if cur.fetchone()[0] and not args.reset:
+        print('Database bevat al producten; gebruik --reset om te legen.')
+        conn.close()
+        return 1
+    if args.reset:
+        reset_data(cur)
+        conn.commit()
+
+    print('Genereren:')
+    columns = ['supermarket_code', 'name', 'price', 'unit', 'link',
+               'unit_quantity', 'base_unit', 'price_per_base_unit', 'updated_at', 'categories']
+    with timed('products'):
+        for chunk in chunked(generate_products(rng, args.products), 20_000):
+            copy_rows(cur, 'products', columns, chunk)
+        conn.commit()
+
+    cur.execute('SELECT id, price FROM products ORDER BY id')
+    product_prices = cur.fetchall()
+    with timed('price_history'):
+        history = generate_price_history(rng, product_prices, args.history_days, args.history_interval)
+        for chunk in chunked(history, 200_000):
+            copy_rows(cur, 'price_history', ['product_id', 'price', 'recorded_at'], chunk)
+        conn.commit()
+
+    cur.execute('SELECT id, supermarket_code, name, price FROM products')
+    products = cur.fetchall()
+    with timed('promotions'):
+        copy_rows(cur, 'promotions', ['supermarket_code', 'product_name', 'original_price', 'discount_price',
+                                      'discount_percent', 'promo_type', 'start_date', 'end_date', 'product_id',
+                                      'categories'],
+                  generate_promotions(rng, products, args.promotions))
+        conn.commit()
+
+    with timed('promotion_history'):
+        promo_history.prepare(cur)
+        ensure_partitions(cur, date.today() - timedelta(days=args.history_days), date.today())
+        copy_rows(cur, 'promotion_history', ['supermarket_code', 'product_name', 'product_id', 'original_price',
+                                             'discount_price', 'discount_percent', 'promo_type', 'start_date',
+                                             'end_date'],
+                  generate_promotion_history(rng, products, args.promo_history, args.history_days))
+        # Zelfde transactie: de statistieken nemen de gekopieerde rijen mee
+        archive_and_refresh(cur)
+        conn.commit()
+
+    with timed('store_stats'):
+        refresh_store_stats(cur, products=True, promotions=True)
+        conn.commit()
+
+    with timed('recepten'):
+        copy_rows(cur, 'recepten', ['naam', 'categorie', 'bereidingstijd', 'porties', 'ingredienten',
+                                    'instructies', 'tags', 'bron', 'external_id', 'afbeelding',
+                                    'ingredient_tokens', 'tag_tokens'],
+                  generate_recipes(rng, args.recipes))
+        conn.commit()
+
+    with timed('product_alerts'):
+        copy_rows(cur, 'product_alerts', ['product_query', 'max_prijs', 'notify_on_sale'],
+                  generate_alerts(rng, args.alerts))
+        conn.commit()
+
+    with timed('locaties'):
+        copy_rows(cur, 'supermarket_locations', ['supermarket_code', 'naam', 'adres', 'postcode', 'stad',
+                                                 'latitude', 'longitude', 'openingstijden'],
+                  generate_locations(rng, args.locations_per_chain))
+        conn.commit()
+
+    with timed('shopping_lists'):
+        copy_rows(cur, 'shopping_lists', ['naam', 'items', 'totaal'],
+                  generate_shopping_lists(rng, args.shopping_lists))
+        conn.commit()
+
+    with timed('ANALYZE'):
+        conn.autocommit = True
+        cur.execute('ANALYZE')
+
+    print('\nResultaat:')
+    for table in ('products', 'price_history', 'promotions', 'promotion_history', 'promo_cycle_stats',
+                  'recepten', 'product_alerts', 'supermarket_locations', 'shopping_lists'):
+        cur.execute(f'SELECT COUNT(*) FROM {table}')
+        print(f'  {table:22} {cur.fetchone()[0]:>12,}')
+    conn.close()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,247 @@
+#!/usr/bin/env python3
+"""
+Load test voor src/server_sse.py met gelijktijdige MCP agent sessies.
+
+Elke gesimuleerde agent opent een SSE sessie op /sse, doet de MCP handshake en
+stuurt daarna tool calls (gewogen mix uit benchmarks/scenarios.py) via
+/messages. Per concurrency niveau worden throughput, latency percentielen,
+foutpercentage en pool metrics (via /metrics) gemeten; samen vormen ze een
+saturatiecurve.
+
+Gebruik (lokale stack met synthetische dataset):
+    python -m benchmarks.loadtest --url http://localhost:8000 --sessions 1 2 4 8 16 32 --duration 30
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import random
+import re
+import sys
+import time
+from datetime import datetime
+
+import httpx
+
+from benchmarks.run_benchmarks import percentile
+from benchmarks.scenarios import SCENARIOS
+
+PROTOCOL_VERSION = '2024-11-05'
+
+
+class SseSession:
+    """Eén MCP client sessie over SSE"""
+
+    def __init__(self, client, base_url, call_timeout):
+        self.client = client
+        self.base_url = base_url
+        self.call_timeout = call_timeout
+        self.endpoint = None
+        self.pending = {}
+        self.ids = itertools.count(1)
+        self._ready = asyncio.Event()
+        self._reader = None
+
+    async def open(self):
+        self._reader = asyncio.create_task(self._read_stream())
+        await asyncio.wait_for(self._ready.wait(), self.call_timeout)
+        await self.request('initialize', {
+            'protocolVersion': PROTOCOL_VERSION,
+            'capabilities': {},
+            'clientInfo': {'name': 'nl-supermarkt-loadtest', 'version': '1.0'},
+        })
+        await self._post({'jsonrpc': '2.0', 'method': 'notifications/initialized'})
+
+    async def close(self):
+        for future in self.pending.values():
+            future.cancel()
+        if self._reader:
+            self._reader.cancel()
+            try:
+                await self._reader
+            except (asyncio.CancelledError, Exception):
+                pass
+
+    async def _read_stream(self):
+        try:
+            async with self.client.stream('GET', f'{self.base_url}/sse', timeout=None) as resp:
+                event, data = None, []
+                async for line in resp.aiter_lines():
+                    if line.startswith('event:'):
+                        event = line[6:].strip()
+                    elif line.startswith('data:'):
+                        data.append(line[5:].strip())
+                    elif not line:
+                        self._dispatch(event, '\n'.join(data))
+                        event, data = None, []
+        finally:
+            self._ready.set()
+            for future in self.pending.values():
+                if not future.done():
+                    future.set_exception(ConnectionError('SSE stream beëindigd'))
+
+    def _dispatch(self, event, data):
+        if event == 'endpoint':
+            self.endpoint = data if data.startswith('http') else f'{self.base_url}{data}'
+            self._ready.set()
+        elif event == 'message' and data:
+            message = json.loads(data)
+            future = self.pending.pop(message.get('id'), None)
+            if future and not future.done():
+                future.set_result(message)
+
+    async def _post(self, payload):
+        if not self.endpoint:
+            raise ConnectionError('geen SSE endpoint ontvangen')
+        resp = await self.client.post(self.endpoint, json=payload, timeout=self.call_timeout)
+        if resp.status_code >= 400:
+            raise ConnectionError(f'POST {resp.status_code}')
+
+    async def request(self, method, params):
+        request_id = next(self.ids)
+        future = asyncio.get_running_loop().create_future()
+        self.pending[request_id] = future
+        await self._post({'jsonrpc': '2.0', 'id': request_id, 'method': method, 'params': params})
+        try:
+            return await asyncio.wait_for(future, self.call_timeout)
+        finally:
+            self.pending.pop(request_id, None)
+
+
+def is_error(message):
+    if 'error' in message:
+        return True
+    result = message.get('result', {})
+    if result.get('isError'):
+        return True
+    content = result.get('content') or [{}]
+    return str(content[0].get('text', '')).startswith('Fout:')
+
+
+async def agent(session, deadline, think_ms, rng, samples):
+    weights = [s['weight'] for s in SCENARIOS]
+    while time.monotonic() < deadline:
+        scenario = rng.choices(SCENARIOS, weights)[0]
+        start = time.perf_counter()
+        try:
+            message = await session.request('tools/call', {'name': scenario['tool'], 'arguments': scenario['arguments']})
+            error = 'tool' if is_error(message) else None
+        except asyncio.TimeoutError:
+            error = 'timeout'
+        except (ConnectionError, httpx.HTTPError):
+            error = 'verbinding'
+        samples.append((scenario['name'], (time.perf_counter() - start) * 1000, error))
+        if think_ms:
+            await asyncio.sleep(rng.uniform(0, 2 * think_ms) / 1000)
+
+
+def parse_metrics(text):
+    values = {}
+    for line in text.splitlines():
+        m = re.match(r'^(mcp_db_pool_[a-z_]+)\s+([0-9.eE+-]+)$', line)
+        if m:
+            values[m.group(1)] = float(m.group(2))
+    return values
+
+
+async def poll_pool(client, base_url, stop, observed):
+    while not stop.is_set():
+        try:
+            resp = await client.get(f'{base_url}/metrics', timeout=5)
+            metrics = parse_metrics(resp.text)
+            observed['max_saturation'] = max(observed.get('max_saturation', 0), metrics.get('mcp_db_pool_saturation', 0))
+            observed['max_in_use'] = max(observed.get('max_in_use', 0), metrics.get('mcp_db_pool_in_use', 0))
+            observed.setdefault('exhausted_start', metrics.get('mcp_db_pool_exhausted_total', 0))
+            observed['exhausted_end'] = metrics.get('mcp_db_pool_exhausted_total', 0)
+        except httpx.HTTPError:
+            pass
+        try:
+            await asyncio.wait_for(stop.wait(), 1.0)
+        except asyncio.TimeoutError:
+            pass
+
+
+async def run_level(base_url, sessions, duration, think_ms, call_timeout, seed):
+    limits = httpx.Limits(max_connections=sessions * 2 + 10, max_keepalive_connections=sessions * 2 + 10)
+    async with httpx.AsyncClient(limits=limits) as client:
+        opened = []
+        connect_errors = 0
+        for i in range(sessions):
+            session = SseSession(client, base_url, call_timeout)
+            try:
+                await session.open()
+                opened.append(session)
+            except (asyncio.TimeoutError, ConnectionError, httpx.HTTPError):
+                connect_errors += 1
+                await session.close()
+
+        samples, observed, stop = [], {}, asyncio.Event()
+        poller = asyncio.create_task(poll_pool(client, base_url, stop, observed))
+        start = time.monotonic()
+        deadline = start + duration
+        await asyncio.gather(*(
+            agent(s, deadline, think_ms, random.Random(seed + i), samples) for i, s in enumerate(opened)
+        ))
+        elapsed = time.monotonic() - start
+        stop.set()
+        await poller
+        for session in opened:
+            await session.close()
+
+    latencies = sorted(ms for _, ms, err in samples if err is None)
+    errors = {}
+    for _, _, err in samples:
+        if err:
+            errors[err] = errors.get(err, 0) + 1
+    total = len(samples)
+    return {
+        'sessions': sessions,
+        'sessions_failed': connect_errors,
+        'calls': total,
+        'throughput_per_s': round(len(latencies) / elapsed, 2) if elapsed else 0,
+        'error_rate': round(sum(errors.values()) / total, 4) if total else 0,
+        'errors': errors,
+        'p50_ms': round(percentile(latencies, 50), 2) if latencies else None,
+        'p95_ms': round(percentile(latencies, 95), 2) if latencies else None,
+        'p99_ms': round(percentile(latencies, 99), 2) if latencies else None,
+        'pool_max_saturation': observed.get('max_saturation'),
+        'pool_max_in_use': observed.get('max_in_use'),
+        'pool_exhausted': observed.get('exhausted_end', 0) - observed.get('exhausted_start', 0),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--url', default='http://localhost:8000')
+    parser.add_argument('--sessions', type=int, nargs='+', default=[1, 2, 4, 8, 16, 32])
+    parser.add_argument('--duration', type=float, default=30, help='Seconden per concurrency niveau')
+    parser.add_argument('--think-ms', type=float, default=100, help='Gemiddelde pauze tussen calls per agent')
+    parser.add_argument('--call-timeout', type=float, default=30)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', default='loadtest_report.json')
+    args = parser.parse_args(argv)
+
+    base_url = args.url.rstrip('/')
+    levels = []
+    print(f'{"sessies":>8} {"calls/s":>9} {"p50 ms":>9} {"p95 ms":>9} {"p99 ms":>9} {"fouten":>8} {"pool max":>9} {"uitgeput":>9}')
+    for sessions in args.sessions:
+        level = asyncio.run(run_level(base_url, sessions, args.duration, args.think_ms, args.call_timeout, args.seed))
+        levels.append(level)
+        print(f'{sessions:8} {level["throughput_per_s"]:9.1f} {level["p50_ms"] or 0:9.1f} {level["p95_ms"] or 0:9.1f} '
+              f'{level["p99_ms"] or 0:9.1f} {level["error_rate"]:8.1%} {level["pool_max_saturation"] or 0:9.0%} '
+              f'{level["pool_exhausted"]:9.0f}')
+
+    with open(args.output, 'w') as f:
+        json.dump({
+            'meta': {
+                'timestamp': datetime.now().isoformat(timespec='seconds'),
+                'url': base_url, 'duration_s': args.duration, 'think_ms': args.think_ms,
+            },
+            'levels': levels,
+        }, f, indent=2)
+    print(f'\nSaturatiecurve geschreven naar {args.output}')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Planning tijd en latency van de prepared statements in src/prepared.py.
+
+Voert elke geregistreerde query N keer uit als gewone tekst en N keer via
+EXECUTE, en leest de 'Planning Time' uit EXPLAIN (ANALYZE) voor beide varianten.
+
+Gebruik (tegen de synthetische dataset):
+    python -m benchmarks.prepared_statements --iterations 200 --output prepared_report.json
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from datetime import datetime
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src')
+sys.path.insert(0, SRC_DIR)
+
+import server
+import prepared
+
+from benchmarks.run_benchmarks import percentile
+
+KETENS = ['ah', 'jumbo']
+
+SAMPLE_PARAMS = {
+    'canoniek_product': ('halfvolle melk',),
+    'canoniek_prijzen': (1,),
+    'goedkoopste_prijs': ('%melk%',),
+    'goedkoopste_prijs_ketens': ('%kaas%', KETENS),
+    'lijst_supermarkten': (),
+    'lijst_drogisten': (server.DROGIST_CODES,),
+    'prijshistorie_producten': ('%kipfilet%',),
+    'prijshistorie_verloop': (1, 90),
+    'aanbieding_product': (1,),
+    'beste_aanbieding': ('koffie',),
+    'beste_aanbieding_naam': ('%koffie%',),
+    'goedkoopste_aanbieding': ('eieren',),
+    'goedkoopste_aanbieding_naam': ('%eieren%',),
+    'promo_cyclus': ('%koffie%',),
+}
+for _mode in server.SEARCH_ORDERS:
+    SAMPLE_PARAMS.update({
+        f'zoek_producten_{_mode}': ('halfvolle melk', 10),
+        f'zoek_producten_keten_{_mode}': ('kaas', 'ah', 10),
+        f'zoek_producten_trgm_{_mode}': ('tomatn', 10),
+        f'zoek_producten_trgm_keten_{_mode}': ('kaaas', 'ah', 10),
+    })
+for _mode in server.SORT_ORDERS:
+    SAMPLE_PARAMS.update({
+        f'vergelijk_prijzen_{_mode}': ('%halfvolle melk%',),
+        f'goedkoopste_product_{_mode}': ('%wit brood%',),
+        f'goedkoopste_product_ketens_{_mode}': ('%tomaten%', KETENS),
+    })
+
+
+def timed(cur, run, iterations):
+    latencies = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        run()
+        cur.fetchall()
+        latencies.append((time.perf_counter() - start) * 1000)
+    latencies.sort()
+    return {'p50_ms': round(percentile(latencies, 50), 3), 'p95_ms': round(percentile(latencies, 95), 3)}
+
+
+def planning_ms(cur, sql, params):
+    cur.execute(f'EXPLAIN (ANALYZE, FORMAT JSON) {sql}', params)
+    row = cur.fetchone()
+    plan = row[0] if isinstance(row, tuple) else list(row.values())[0]
+    return plan[0]['Planning Time']
+
+
+def bench_statement(conn, name, params, iterations):
+    cur = conn.cursor()
+    sql, values = prepared.plain_sql(name, params)
+    plain = timed(cur, lambda: cur.execute(sql, values), iterations)
+    plain['planning_ms'] = round(planning_ms(cur, sql, values), 3)
+
+    cur.execute(f'PREPARE {name} AS {prepared.STATEMENTS[name]}')
+    call = f'EXECUTE {name} ({", ".join(["%s"] * len(params))})' if params else f'EXECUTE {name}'
+    execute = timed(cur, lambda: cur.execute(call, params), iterations)
+    execute['planning_ms'] = round(planning_ms(cur, call, params), 3)
+    cur.execute(f'DEALLOCATE {name}')
+    conn.rollback()
+    return {'plain': plain, 'prepared': execute}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--iterations', type=int, default=200)
+    parser.add_argument('--output', default='prepared_report.json')
+    args = parser.parse_args(argv)
+
+    conn = server.get_db()
+    results = {}
+    try:
+        print(f'{"statement":42} {"plan tekst":>11} {"plan EXECUTE":>13} {"p50 tekst":>10} {"p50 EXECUTE":>12}')
+        for name in sorted(prepared.STATEMENTS):
+            r = bench_statement(conn, name, SAMPLE_PARAMS[name], args.iterations)
+            results[name] = r
+            print(f'{name:42} {r["plain"]["planning_ms"]:9.3f}ms {r["prepared"]["planning_ms"]:11.3f}ms '
+                  f'{r["plain"]["p50_ms"]:8.3f}ms {r["prepared"]["p50_ms"]:10.3f}ms')
+    finally:
+        server.release_db(conn)
+
+    with open(args.output, 'w') as f:
+        json.dump({
+            'meta': {'timestamp': datetime.now().isoformat(timespec='seconds'), 'iterations': args.iterations},
+            'results': results,
+        }, f, indent=2)
+    print(f'\nRapport geschreven naar {args.output}')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+"""
+End-to-end benchmark van alle MCP tools.
+
+Roept elke tool uit benchmarks/scenarios.py direct aan via call_tool (zonder
+transport), meet latency percentielen en SQL statements per call, en schrijft
+een JSON rapport. Met --compare wordt een eerder rapport als baseline gebruikt;
+bij regressies eindigt het script met exit code 1.
+
+Gebruik (vanuit de repository root, tegen de synthetische dataset):
+    python -m benchmarks.run_benchmarks --output bench_report.json
+    python -m benchmarks.run_benchmarks --compare bench_report.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from datetime import datetime
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src')
+sys.path.insert(0, SRC_DIR)
+
+import server
+import tool_metrics
+
+from benchmarks.scenarios import SCENARIOS
+
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return None
+    k = (len(sorted_values) - 1) * pct / 100
+    lo, hi = int(k), min(int(k) + 1, len(sorted_values) - 1)
+    return sorted_values[lo] + (sorted_values[hi] - sorted_values[lo]) * (k - lo)
+
+
+def summarize(latencies_ms, queries, rows, errors):
+    values = sorted(latencies_ms)
+    calls = len(values)
+    return {
+        'calls': calls,
+        'errors': errors,
+        'mean_ms': round(sum(values) / calls, 3) if calls else None,
+        'p50_ms': round(percentile(values, 50), 3) if calls else None,
+        'p90_ms': round(percentile(values, 90), 3) if calls else None,
+        'p95_ms': round(percentile(values, 95), 3) if calls else None,
+        'p99_ms': round(percentile(values, 99), 3) if calls else None,
+        'max_ms': round(values[-1], 3) if calls else None,
+        'queries_per_call': round(queries / calls, 2) if calls else None,
+        'rows_per_call': round(rows / calls, 2) if calls else None,
+    }
+
+
+async def run_scenario(scenario, iterations, warmup):
+    for _ in range(warmup):
+        await server.call_tool(scenario['tool'], dict(scenario['arguments']))
+
+    latencies, errors = [], 0
+    before = tool_metrics.snapshot().get(scenario['tool'], {})
+    for _ in range(scenario.get('iterations', iterations)):
+        start = time.perf_counter()
+        result = await server.call_tool(scenario['tool'], dict(scenario['arguments']))
+        latencies.append((time.perf_counter() - start) * 1000)
+        if result and result[0].text.startswith('Fout:'):
+            errors += 1
+    after = tool_metrics.snapshot().get(scenario['tool'], {})
+    queries = after.get('queries', 0) - before.get('queries', 0)
+    rows = after.get('rows', 0) - before.get('rows', 0)
+    return summarize(latencies, queries, rows, errors)
+
+
+def dataset_info():
+    conn = server.get_db()
+    try:
+        cur = conn.cursor()
+        counts = {}
+        for table in ('products', 'price_history', 'promotions', 'recepten', 'product_alerts', 'supermarket_locations'):
+            cur.execute(f'SELECT COUNT(*) AS n FROM {table}')
+            counts[table] = cur.fetchone()['n']
+        conn.rollback()
+        return counts
+    finally:
+        server.release_db(conn)
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], text=True,
+                                       stderr=subprocess.DEVNULL).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(report, baseline, max_regression, min_delta_ms):
+    """Vergelijk p50/p95 per scenario; geeft lijst met regressies terug"""
+    regressions = []
+    print(f'\n{"scenario":38} {"p50 oud":>9} {"p50 nieuw":>10} {"p95 oud":>9} {"p95 nieuw":>10}')
+    for name, new in report['results'].items():
+        old = baseline.get('results', {}).get(name)
+        if not old or new['p50_ms'] is None or old['p50_ms'] is None:
+            continue
+        flags = []
+        for metric in ('p50_ms', 'p95_ms'):
+            if (new[metric] > old[metric] * (1 + max_regression)
+                    and new[metric] - old[metric] > min_delta_ms):
+                flags.append(metric)
+        if new['queries_per_call'] and old['queries_per_call'] and new['queries_per_call'] > old['queries_per_call']:
+            flags.append('queries_per_call')
+        marker = f'  REGRESSIE ({", ".join(flags)})' if flags else ''
+        print(f'{name:38} {old["p50_ms"]:9.2f} {new["p50_ms"]:10.2f} {old["p95_ms"]:9.2f} {new["p95_ms"]:10.2f}{marker}')
+        if flags:
+            regressions.append((name, flags))
+    return regressions
+
+
+async def run(args):
+    scenarios = [s for s in SCENARIOS if not args.only or s['tool'] in args.only or s['name'] in args.only]
+    results = {}
+    for scenario in scenarios:
+        summary = await run_scenario(scenario, args.iterations, args.warmup)
+        results[scenario['name']] = {'tool': scenario['tool'], **summary}
+        print(f'{scenario["name"]:38} p50 {summary["p50_ms"]:9.2f} ms  p95 {summary["p95_ms"]:9.2f} ms  '
+              f'{summary["queries_per_call"]:7.1f} queries/call'
+              + (f'  {summary["errors"]} FOUTEN' if summary['errors'] else ''))
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--iterations', type=int, default=20)
+    parser.add_argument('--warmup', type=int, default=2)
+    parser.add_argument('--only', nargs='*', help='Alleen deze tools of scenario namen')
+    parser.add_argument('--output', default='bench_report.json')
+    parser.add_argument('--compare', help='Baseline rapport om mee te vergelijken')
+    parser.add_argument('--max-regression', type=float, default=0.25, help='Toegestane vertraging (fractie)')
+    parser.add_argument('--min-delta-ms', type=float, default=2.0, help='Negeer verschillen kleiner dan dit')
+    args = parser.parse_args(argv)
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+
+    report = {
+        'meta': {
+            'timestamp': datetime.now().isoformat(timespec='seconds'),
+            'commit': git_commit(),
+            'python': platform.python_version(),
+            'iterations': args.iterations,
+            'dataset': dataset_info(),
+        },
+    }
+    report['results'] = asyncio.run(run(args))
+
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f'\nRapport geschreven naar {args.output}')
+
+    if baseline:
+        regressions = compare(report, baseline, args.max_regression, args.min_delta_ms)
+        if regressions:
+            print(f'\n{len(regressions)} regressie(s) gevonden')
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,51 @@
+"""Representatieve tool calls voor benchmarks en load tests.
+
+Elk scenario heeft een unieke naam, de tool, de argumenten en een gewicht voor
+de mix in de load test. Met 'iterations' kan een zwaar scenario minder vaak
+herhaald worden in run_benchmarks.
+"""
+
+BOODSCHAPPEN = ['halfvolle melk', 'wit brood', 'eieren', 'goudse kaas', 'kipfilet', 'tomaten', 'koffiebonen']
+
+SCENARIOS = [
+    {'name': 'zoek_producten', 'tool': 'zoek_producten', 'arguments': {'query': 'melk'}, 'weight': 20},
+    {'name': 'zoek_producten/keten', 'tool': 'zoek_producten',
+     'arguments': {'query': 'kaas', 'supermarkt': 'ah'}, 'weight': 10},
+    {'name': 'zoek_producten/meerdere_woorden', 'tool': 'zoek_producten',
+     'arguments': {'query': 'halfvolle melk'}, 'weight': 5},
+    {'name': 'zoek_producten/tikfout', 'tool': 'zoek_producten', 'arguments': {'query': 'tomatn'}, 'weight': 2},
+    {'name': 'zoek_producten/prijs', 'tool': 'zoek_producten',
+     'arguments': {'query': 'melk', 'sorteer': 'prijs'}, 'weight': 5},
+    {'name': 'zoek_producten/eenheidsprijs', 'tool': 'zoek_producten',
+     'arguments': {'query': 'cola', 'sorteer': 'eenheidsprijs'}, 'weight': 5},
+    {'name': 'vergelijk_prijzen', 'tool': 'vergelijk_prijzen', 'arguments': {'product': 'halfvolle melk'}, 'weight': 15},
+    {'name': 'optimaliseer_boodschappenlijst', 'tool': 'optimaliseer_boodschappenlijst',
+     'arguments': {'producten': BOODSCHAPPEN}, 'weight': 5},
+    {'name': 'lijst_supermarkten', 'tool': 'lijst_supermarkten', 'arguments': {}, 'weight': 3},
+    {'name': 'lijst_drogisten', 'tool': 'lijst_drogisten', 'arguments': {}, 'weight': 2},
+    {'name': 'bekijk_aanbiedingen/keten', 'tool': 'bekijk_aanbiedingen', 'arguments': {'supermarkt': 'ah'}, 'weight': 10},
+    {'name': 'bekijk_aanbiedingen/categorie', 'tool': 'bekijk_aanbiedingen',
+     'arguments': {'categorie': 'zuivel'}, 'weight': 5},
+    {'name': 'bekijk_aanbiedingen/pagina', 'tool': 'bekijk_aanbiedingen',
+     'arguments': {'categorie': 'dranken', 'pagina': 3}, 'weight': 2},
+    {'name': 'zoek_recepten', 'tool': 'zoek_recepten', 'arguments': {'query': 'kip'}, 'weight': 4},
+    {'name': 'zoek_recepten/dieet', 'tool': 'zoek_recepten',
+     'arguments': {'dieet': 'vegetarisch', 'max_tijd': 30}, 'weight': 2},
+    {'name': 'plan_boodschappen', 'tool': 'plan_boodschappen',
+     'arguments': {'supermarkten': ['ah', 'jumbo'], 'dagen': 4, 'personen': 2}, 'weight': 2},
+    {'name': 'prijshistorie', 'tool': 'prijshistorie', 'arguments': {'product': 'kipfilet', 'dagen': 90}, 'weight': 4},
+    {'name': 'prijs_alert', 'tool': 'prijs_alert', 'arguments': {'product': 'koffiebonen', 'max_prijs': 6.0}, 'weight': 1},
+    {'name': 'check_alerts', 'tool': 'check_alerts', 'arguments': {}, 'weight': 1, 'iterations': 1},
+    {'name': 'bewaar_boodschappenlijst', 'tool': 'bewaar_boodschappenlijst',
+     'arguments': {'naam': 'benchmark', 'producten': BOODSCHAPPEN}, 'weight': 1},
+    {'name': 'laad_boodschappenlijst', 'tool': 'laad_boodschappenlijst', 'arguments': {'naam': 'weekboodschappen'}, 'weight': 2},
+    {'name': 'lijst_boodschappenlijsten', 'tool': 'lijst_boodschappenlijsten', 'arguments': {}, 'weight': 1},
+    {'name': 'wacht_met_kopen', 'tool': 'wacht_met_kopen', 'arguments': {'producten': BOODSCHAPPEN[:4]}, 'weight': 2},
+    {'name': 'vind_winkels', 'tool': 'vind_winkels',
+     'arguments': {'latitude': 52.37, 'longitude': 4.90, 'max_afstand': 5}, 'weight': 2},
+    {'name': 'plan_winkelroute', 'tool': 'plan_winkelroute',
+     'arguments': {'postcode': '1012AB', 'producten': BOODSCHAPPEN}, 'weight': 1},
+    {'name': 'set_budget', 'tool': 'set_budget', 'arguments': {'budget': 80}, 'weight': 1},
+    {'name': 'budget_check', 'tool': 'budget_check', 'arguments': {'producten': BOODSCHAPPEN, 'budget': 15}, 'weight': 2},
+    {'name': 'bespaar_tips', 'tool': 'bespaar_tips', 'arguments': {'producten': BOODSCHAPPEN[:4]}, 'weight': 2},
+]
@@ -0,0 +1,48 @@
+#!/usr/bin/env python3
+"""
+Draai een sync script op een opgenomen HTTP archief en meet de looptijd.
+
+Eenmalig opnemen (live):
+    SYNC_HTTP_MODE=record SYNC_HTTP_ARCHIVE=corpus/folderz.jsonl.gz python sync_folderz.py
+
+Afspelen en meten (zonder netwerk en zonder wachttijden):
+    python -m benchmarks.sync_replay sync_folderz.py corpus/folderz.jsonl.gz --runs 3
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def run_once(script, archive):
+    env = dict(os.environ, SYNC_HTTP_MODE='replay', SYNC_HTTP_ARCHIVE=os.path.abspath(archive))
+    start = time.perf_counter()
+    result = subprocess.run([sys.executable, script], cwd=ROOT, env=env, capture_output=True, text=True)
+    elapsed = time.perf_counter() - start
+    if result.returncode != 0:
+        sys.stderr.write(result.stdout + result.stderr)
+        raise SystemExit(f'{script} faalde (exit {result.returncode})')
+    return elapsed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('script', help='Sync script, bv. sync_folderz.py of sync_prices.py')
+    parser.add_argument('archive', help='Opgenomen archief (.jsonl.gz)')
+    parser.add_argument('--runs', type=int, default=3)
+    args = parser.parse_args(argv)
+
+    timings = []
+    for i in range(args.runs):
+        timings.append(run_once(args.script, args.archive))
+        print(f'  run {i + 1}: {timings[-1]:7.2f}s')
+    print(f'{args.script}: min {min(timings):.2f}s, mediaan {statistics.median(timings):.2f}s')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -3,59 +3,85 @@
 Detecteer prijsdalingen door huidige prijzen te vergelijken met recente historie.
 Vul de promotions tabel met producten die in prijs zijn gedaald.
 """
+import os
 import psycopg2
 from datetime import datetime, timedelta
 
+from src import categories
+from src import promo_history
+from src.promo_history import archive_and_refresh
+from src import store_stats
+from src.store_stats import refresh_store_stats
+from src.sync_runs import run_locked
+
 DB_CONFIG = {
-    'database': 'supermarkt_db',
-    'user': 'postgres',
-    'port': 5433,
-    'host': '127.0.0.1'
+    'host': os.environ.get('DB_HOST', '127.0.0.1'),
+    'port': int(os.environ.get('DB_PORT', '5433')),
+    'database': os.environ.get('DB_NAME', 'supermarkt_db'),
+    'user': os.environ.get('DB_USER', 'postgres'),
+    'password': os.environ.get('DB_PASSWORD', '')
 }
 
+MIN_PERCENT = 5    # Minimaal 5% korting
+MAX_PERCENT = 80   # Onrealistische kortingen overslaan
+MAX_DROPS = 500
+
+
+def previous_price(current, history):
+    """Vorige prijs uit de historie (nieuwste eerst): de eerste prijs die afwijkt van de huidige"""
+    return next((price for price in history if price != current), None)
+
+
+def find_drops(rows, limit=MAX_DROPS):
+    """
+    rows: (product_id, supermarket_code, name, categories, huidige prijs, historie nieuwste eerst).
+    Geeft (product_id, supermarket_code, name, categories, original, discount, percent),
+    grootste korting eerst.
+    """
+    drops = []
+    for product_id, code, name, cats, current, history in rows:
+        previous = previous_price(current, history)
+        if not previous or previous <= 0 or current >= previous:
+            continue
+        percent = (previous - current) / previous * 100
+        if percent < MIN_PERCENT or round(percent) > MAX_PERCENT:
+            continue
+        drops.append((product_id, code, name, cats, previous, current, round(percent)))
+    drops.sort(key=lambda drop: drop[6], reverse=True)
+    return drops[:limit]
+
+
+def prepare(conn):
+    """Schema in een eigen transactie: de ALTER TABLEs houden anders een ACCESS EXCLUSIVE lock vast tot de detectie klaar is"""
+    cur = conn.cursor()
+    cur.execute("ALTER TABLE promotions ADD COLUMN IF NOT EXISTS product_id INTEGER REFERENCES products(id) ON DELETE SET NULL")
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_promotions_product ON promotions(product_id)")
+    categories.ensure_schema(cur, 'products')
+    categories.ensure_schema(cur, 'promotions')
+    store_stats.ensure_schema(cur)
+    promo_history.prepare(cur)
+    conn.commit()
+    cur.close()
+
+
 def detect_price_drops():
     conn = psycopg2.connect(**DB_CONFIG)
+    prepare(conn)
     cur = conn.cursor()
-    
+
     # Eerst oude detecties opruimen
     cur.execute("DELETE FROM promotions WHERE promo_type = 'prijsdaling'")
     
-    # Vind producten waar de huidige prijs lager is dan de vorige prijs
-    # We vergelijken de laatste 2 prijspunten
+    # price_history is change-point historie (een rij per prijswijziging): de nieuwste rij is de
+    # huidige prijs, de vorige prijs is de nieuwste rij die daarvan afwijkt
     cur.execute("""
-        WITH price_changes AS (
-            SELECT 
-                p.id as product_id,
-                p.supermarket_code,
-                p.name,
-                p.price as current_price,
-                p.link,
-                LAG(ph.price) OVER (PARTITION BY p.id ORDER BY ph.recorded_at DESC) as previous_price,
-                ph.recorded_at
-            FROM products p
-            JOIN price_history ph ON p.id = ph.product_id
-        ),
-        price_drops AS (
-            SELECT DISTINCT ON (product_id)
-                supermarket_code,
-                name,
-                previous_price as original_price,
-                current_price as discount_price,
-                ROUND(((previous_price - current_price) / previous_price * 100)::numeric, 0) as discount_percent
-            FROM price_changes
-            WHERE previous_price IS NOT NULL 
-              AND current_price < previous_price
-              AND previous_price > 0
-              AND ((previous_price - current_price) / previous_price * 100) >= 5  -- Minimaal 5% korting
-            ORDER BY product_id, recorded_at DESC
-        )
-        SELECT * FROM price_drops
-        WHERE discount_percent <= 80  -- Filter onrealistische kortingen
-        ORDER BY discount_percent DESC
-        LIMIT 500
+        SELECT p.id, p.supermarket_code, p.name, p.categories, p.price,
+            ARRAY(SELECT ph.price FROM price_history ph WHERE ph.product_id = p.id
+                  ORDER BY ph.recorded_at DESC, ph.id DESC LIMIT 2)
+        FROM products p
+        WHERE p.missing_since IS NULL AND p.price > 0
     """)
-    
-    drops = cur.fetchall()
+    drops = find_drops(cur.fetchall())
     print(f"Gevonden: {len(drops)} prijsdalingen")
     
     # Insert als promoties
@@ -64,20 +90,23 @@ def detect_price_drops():
     
     inserted = 0
     for drop in drops:
-        supermarket_code, name, original_price, discount_price, discount_percent = drop
+        product_id, supermarket_code, name, cats, original_price, discount_price, discount_percent = drop
         try:
             cur.execute("""
                 INSERT INTO promotions 
-                (supermarket_code, product_name, original_price, discount_price, discount_percent, promo_type, start_date, end_date)
-                VALUES (%s, %s, %s, %s, %s, 'prijsdaling', %s, %s)
+                (supermarket_code, product_name, original_price, discount_price, discount_percent, promo_type, start_date, end_date, product_id, categories)
+                VALUES (%s, %s, %s, %s, %s, 'prijsdaling', %s, %s, %s, %s)
                 ON CONFLICT DO NOTHING
-            """, (supermarket_code, name, float(original_price), float(discount_price), int(discount_percent), today, end_date))
+            """, (supermarket_code, name, float(original_price), float(discount_price), int(discount_percent), today, end_date, product_id, cats))
             inserted += 1
         except Exception as e:
             print(f"Error inserting {name}: {e}")
     
+    archived, cycles = archive_and_refresh(cur)
+    refresh_store_stats(cur, promotions=True)
     conn.commit()
     print(f"Geinserteerd: {inserted} promoties")
+    print(f"Gearchiveerd: {archived} | Aanbiedingscycli bijgewerkt: {cycles}")
     
     # Toon top 10
     cur.execute("""
@@ -92,6 +121,7 @@ def detect_price_drops():
         print(f"  {row[0]}: {row[1]} - was €{row[2]:.2f}, nu €{row[3]:.2f} ({row[4]}% korting)")
     
     conn.close()
+    return inserted
 
 if __name__ == '__main__':
-    detect_price_drops()
+    run_locked(DB_CONFIG, 'price_drops', detect_price_drops)
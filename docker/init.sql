@@ -1,5 +1,8 @@
 -- Database schema for NL Supermarkt MCP
 
+-- Enable trigram extension for fuzzy search (voor de trigram indexes hieronder)
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
 CREATE TABLE IF NOT EXISTS supermarkets (
     id SERIAL PRIMARY KEY,
     code VARCHAR(20) UNIQUE NOT NULL,
@@ -7,6 +10,16 @@ CREATE TABLE IF NOT EXISTS supermarkets (
     icon VARCHAR(10) DEFAULT '🏪'
 );
 
+-- Gelijke producten over ketens heen (gevuld door match_products.py)
+CREATE TABLE IF NOT EXISTS canonical_products (
+    id SERIAL PRIMARY KEY,
+    name VARCHAR(500) NOT NULL,
+    base_unit VARCHAR(10),
+    unit_quantity DECIMAL(14,6),
+    product_count INTEGER NOT NULL,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
 CREATE TABLE IF NOT EXISTS products (
     id SERIAL PRIMARY KEY,
     supermarket_code VARCHAR(20) REFERENCES supermarkets(code),
@@ -14,6 +27,16 @@ CREATE TABLE IF NOT EXISTS products (
     price DECIMAL(10,2) NOT NULL,
     unit VARCHAR(100),
     link VARCHAR(1000),
+    unit_quantity DECIMAL(14,6),
+    base_unit VARCHAR(10),
+    price_per_base_unit DECIMAL(12,4),
+    search_vector tsvector GENERATED ALWAYS AS (to_tsvector('dutch', name)) STORED,
+    canonical_id INTEGER REFERENCES canonical_products(id) ON DELETE SET NULL,
+    categories TEXT[] NOT NULL DEFAULT '{}',
+    -- Hash van prijs, eenheid en link: sync_prices schrijft alleen gewijzigde producten
+    content_hash TEXT,
+    -- Niet meer in de feed (sync_prices); de server toont alleen producten zonder missing_since
+    missing_since TIMESTAMP,
     updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     UNIQUE(supermarket_code, name)
 );
@@ -35,6 +58,8 @@ CREATE TABLE IF NOT EXISTS promotions (
     promo_type VARCHAR(50),
     start_date DATE,
     end_date DATE,
+    product_id INTEGER REFERENCES products(id) ON DELETE SET NULL,
+    categories TEXT[] NOT NULL DEFAULT '{}',
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     UNIQUE(supermarket_code, product_name, start_date)
 );
@@ -51,18 +76,115 @@ CREATE TABLE IF NOT EXISTS recepten (
     bron VARCHAR(100),
     external_id VARCHAR(50),
     afbeelding VARCHAR(500),
+    ingredient_tokens TEXT[],
+    tag_tokens TEXT[],
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     UNIQUE(naam, bron)
 );
 
+-- Tellers per winkel, bijgewerkt aan het eind van elke sync
+CREATE TABLE IF NOT EXISTS store_stats (
+    supermarket_code VARCHAR(20) PRIMARY KEY REFERENCES supermarkets(code) ON DELETE CASCADE,
+    product_count INTEGER NOT NULL DEFAULT 0,
+    promo_count INTEGER NOT NULL DEFAULT 0,
+    avg_discount INTEGER,
+    last_product_sync TIMESTAMP,
+    last_promo_sync TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Logboek van de syncs (src/sync_runs.py); elke sync draait onder een advisory lock
+CREATE TABLE IF NOT EXISTS sync_runs (
+    id SERIAL PRIMARY KEY,
+    sync_name VARCHAR(50) NOT NULL,
+    lock_name VARCHAR(50) NOT NULL,
+    status VARCHAR(20) NOT NULL,
+    started_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    finished_at TIMESTAMP,
+    rows_written INTEGER,
+    error TEXT,
+    host VARCHAR(100),
+    pid INTEGER
+);
+CREATE INDEX IF NOT EXISTS idx_sync_runs_name ON sync_runs(sync_name, started_at DESC);
+
+-- Opgehaalde Folderz pagina's van een lopende run (src/folderz.py); een herstart hervat hier
+CREATE TABLE IF NOT EXISTS folderz_checkpoints (
+    source VARCHAR(50) NOT NULL,
+    page VARCHAR(100) NOT NULL,
+    products JSONB NOT NULL,
+    fetched_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (source, page)
+);
+
+-- Statistieken per Folderz pagina voor de adaptieve planning (src/folderz.py)
+CREATE TABLE IF NOT EXISTS folderz_pages (
+    source VARCHAR(50) NOT NULL,
+    page VARCHAR(100) NOT NULL,
+    products JSONB NOT NULL,
+    content_hash TEXT NOT NULL,
+    fetched_at TIMESTAMP NOT NULL,
+    changed_at TIMESTAMP NOT NULL,
+    runs INTEGER NOT NULL,
+    churn REAL NOT NULL,
+    yield_avg REAL NOT NULL,
+    empty_runs INTEGER NOT NULL,
+    priority REAL NOT NULL,
+    next_due TIMESTAMP NOT NULL,
+    PRIMARY KEY (source, page)
+);
+
+-- Archief van alle aanbiedingen, één rij per cyclus (maandpartities worden door de syncs aangemaakt)
+CREATE TABLE IF NOT EXISTS promotion_history (
+    supermarket_code VARCHAR(20) NOT NULL,
+    product_name VARCHAR(500) NOT NULL,
+    product_id INTEGER,
+    original_price DECIMAL(10,2),
+    discount_price DECIMAL(10,2),
+    discount_percent INTEGER,
+    promo_type VARCHAR(50),
+    start_date DATE NOT NULL,
+    end_date DATE,
+    match_key TEXT GENERATED ALWAYS AS (COALESCE(product_id::text, supermarket_code || '|' || lower(product_name))) STORED,
+    archived_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    UNIQUE (supermarket_code, product_name, start_date)
+) PARTITION BY RANGE (start_date);
+
+CREATE TABLE IF NOT EXISTS promotion_history_default PARTITION OF promotion_history DEFAULT;
+
+-- Aanbiedingscyclus per product (of keten + naam), bijgewerkt na elke sync
+CREATE TABLE IF NOT EXISTS promo_cycle_stats (
+    match_key TEXT PRIMARY KEY,
+    supermarket_code VARCHAR(20),
+    product_id INTEGER,
+    product_name VARCHAR(500) NOT NULL,
+    promo_count INTEGER NOT NULL,
+    first_seen DATE,
+    last_seen DATE,
+    avg_interval_days DECIMAL(8,1),
+    expected_next DATE,
+    avg_discount INTEGER,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
 -- Indexes for performance
 CREATE INDEX IF NOT EXISTS idx_products_supermarket ON products(supermarket_code);
 CREATE INDEX IF NOT EXISTS idx_products_name_trgm ON products USING gin(name gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS idx_products_unit_price ON products(price_per_base_unit);
+CREATE INDEX IF NOT EXISTS idx_products_search ON products USING gin(search_vector);
+CREATE INDEX IF NOT EXISTS idx_products_canonical ON products(canonical_id);
+CREATE INDEX IF NOT EXISTS idx_products_categories ON products USING gin(categories);
 CREATE INDEX IF NOT EXISTS idx_promotions_supermarket ON promotions(supermarket_code);
 CREATE INDEX IF NOT EXISTS idx_promotions_end_date ON promotions(end_date);
-
--- Enable trigram extension for fuzzy search
-CREATE EXTENSION IF NOT EXISTS pg_trgm;
+CREATE INDEX IF NOT EXISTS idx_promotions_product ON promotions(product_id);
+CREATE INDEX IF NOT EXISTS idx_promotions_categories ON promotions USING gin(categories);
+CREATE INDEX IF NOT EXISTS idx_recepten_ingredient_tokens ON recepten USING gin(ingredient_tokens);
+CREATE INDEX IF NOT EXISTS idx_recepten_tag_tokens ON recepten USING gin(tag_tokens);
+CREATE INDEX IF NOT EXISTS idx_recepten_naam_trgm ON recepten USING gin(naam gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS idx_promotion_history_key ON promotion_history(match_key);
+CREATE INDEX IF NOT EXISTS idx_promotion_history_archived ON promotion_history(archived_at);
+CREATE INDEX IF NOT EXISTS idx_promo_cycle_stats_name_trgm ON promo_cycle_stats USING gin(product_name gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS idx_promo_cycle_stats_product ON promo_cycle_stats(product_id);
 
 -- Insert default supermarkets
 INSERT INTO supermarkets (code, name, icon) VALUES
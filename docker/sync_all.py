@@ -1,11 +1,34 @@
 #!/usr/bin/env python3
-"""Master sync script voor Docker - kan alle syncs of specifieke syncs draaien"""
+"""
+Master sync script voor Docker - draait de syncs als afhankelijkheidsgraaf.
 
+prices, folderz en recepten zijn onafhankelijk en draaien parallel. matching
+start zodra prices klaar is, price_drops zodra prices en folderz klaar zijn, en
+analyze (planner statistieken bijwerken) na beide. Elke sync commit zelf, dus een
+stage begint pas als zijn inputs gecommit zijn. Per stage worden start en duur
+getoond en eventueel als JSON bewaard (--report).
+
+    python sync_all.py                      # alles
+    python sync_all.py prices matching      # alleen deze stages
+    python sync_all.py --skip recepten      # alles behalve recepten
+"""
+
+import argparse
+import json
 import os
+import subprocess
 import sys
+import threading
 import time
 import psycopg2
 
+HERE = os.path.dirname(os.path.abspath(__file__))
+# In de container staat dit script naast de syncs, in de repo in docker/
+APP_DIR = HERE if os.path.exists(os.path.join(HERE, 'sync_prices.py')) else os.path.dirname(HERE)
+sys.path.insert(0, APP_DIR)
+
+from src import sync_dag
+
 DB_CONFIG = {
     'host': os.environ.get('DB_HOST', 'db'),
     'port': int(os.environ.get('DB_PORT', '5432')),
@@ -14,6 +37,34 @@ DB_CONFIG = {
     'password': os.environ.get('DB_PASSWORD', 'supermarkt123')
 }
 
+# stage: afhankelijkheden
+SYNC_GRAPH = {
+    'prices': (),
+    'folderz': (),
+    'recepten': (),
+    'matching': ('prices',),
+    'price_drops': ('prices', 'folderz'),
+    'analyze': ('matching', 'price_drops'),
+}
+
+STAGE_SCRIPTS = {
+    'prices': 'sync_prices.py',
+    'folderz': 'sync_folderz.py',
+    'recepten': 'sync_recepten.py',
+    'matching': 'match_products.py',
+    'price_drops': 'detect_price_drops.py',
+}
+
+ANALYZE_TABLES = ['products', 'price_history', 'promotions', 'canonical_products', 'store_stats']
+
+_print_lock = threading.Lock()
+
+
+def log(stage, line):
+    with _print_lock:
+        print(f'[{stage:11}] {line}', flush=True)
+
+
 def wait_for_db():
     print('Wachten op database...')
     for i in range(30):
@@ -22,92 +73,97 @@ def wait_for_db():
             conn.close()
             print('Database beschikbaar!')
             return True
-        except:
+        except psycopg2.OperationalError:
             time.sleep(2)
     print('Database niet beschikbaar na 60 seconden')
     return False
 
-def patch_db_config(module_name):
-    """Patch DB_CONFIG in een sync module"""
-    import importlib.util
-    spec = importlib.util.spec_from_file_location(module_name, f'{module_name}.py')
-    module = importlib.util.module_from_spec(spec)
-    module.DB_CONFIG = DB_CONFIG
-    spec.loader.exec_module(module)
-    return module
-
-def run_sync(sync_type):
-    """Run een specifieke sync"""
-    print(f'\n{"="*60}')
-    print(f'Starting {sync_type} sync...')
-    print(f'{"="*60}')
-    
+
+def run_script(stage, script):
+    """Sync als subproces (eigen connectie en geheugen); output per regel met de stage ervoor"""
+    env = dict(os.environ, DB_HOST=DB_CONFIG['host'], DB_PORT=str(DB_CONFIG['port']), DB_NAME=DB_CONFIG['database'],
+               DB_USER=DB_CONFIG['user'], DB_PASSWORD=DB_CONFIG['password'])
+    proc = subprocess.Popen([sys.executable, script], cwd=APP_DIR, env=env, text=True,
+                            stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
+    for line in proc.stdout:
+        log(stage, line.rstrip())
+    return proc.wait() == 0
+
+
+def analyze():
+    """Planner statistieken bijwerken na de bulk writes, zodat de prepared statements goede plannen kiezen"""
+    conn = psycopg2.connect(**DB_CONFIG)
+    conn.autocommit = True
     try:
-        if sync_type == 'prices':
-            module = patch_db_config('sync_prices')
-            module.main()
-        elif sync_type == 'folderz':
-            module = patch_db_config('sync_folderz')
-            module.main()
-        elif sync_type == 'recepten':
-            module = patch_db_config('sync_recepten')
-            module.main()
-        else:
-            print(f'Onbekende sync type: {sync_type}')
-            return False
-        print(f'{sync_type} sync voltooid!')
-        return True
-    except Exception as e:
-        print(f'Fout bij {sync_type} sync: {e}')
-        return False
+        cur = conn.cursor()
+        for table in ANALYZE_TABLES:
+            cur.execute(f'ANALYZE {table}')
+    finally:
+        conn.close()
+    return True
 
-def main():
-    if not wait_for_db():
-        sys.exit(1)
-    
-    # Check of specifieke sync gevraagd wordt
-    if len(sys.argv) > 1:
-        sync_type = sys.argv[1]
-        success = run_sync(sync_type)
-        sys.exit(0 if success else 1)
-    
-    # Anders alle syncs draaien
-    print('\nStarting all syncs...')
-    
-    syncs = ['prices', 'folderz', 'recepten']
-    results = {}
-    
-    for sync in syncs:
-        results[sync] = run_sync(sync)
-    
-    # Summary
+
+def run_stage(stage):
+    log(stage, 'start')
+    ok = analyze() if stage == 'analyze' else run_script(stage, STAGE_SCRIPTS[stage])
+    log(stage, 'voltooid' if ok else 'MISLUKT')
+    return ok
+
+
+def print_summary(graph, results):
     print(f'\n{"="*60}')
     print('SYNC SUMMARY')
     print(f'{"="*60}')
-    for sync, success in results.items():
-        status = 'OK' if success else 'FAILED'
-        print(f'  {sync:15} {status}')
-    
+    for stage, r in results.items():
+        timing = f'{r["start"]:7.1f}s +{r["duration"]:7.1f}s' if r['start'] is not None else ' ' * 18
+        error = f'  ({r["error"]})' if r['error'] else ''
+        print(f'  {stage:12} {r["status"]:8} {timing}{error}')
+    total, path = sync_dag.critical_path(graph, results)
+    print(f'\nKritiek pad: {" -> ".join(path)} ({total:.1f}s)')
+
     # Database stats
     try:
         conn = psycopg2.connect(**DB_CONFIG)
         cur = conn.cursor()
-        cur.execute('SELECT COUNT(*) FROM products')
+        cur.execute('SELECT COUNT(*) FROM products WHERE missing_since IS NULL')
         products = cur.fetchone()[0]
         cur.execute('SELECT COUNT(*) FROM promotions')
         promotions = cur.fetchone()[0]
         cur.execute('SELECT COUNT(*) FROM recepten')
         recepten = cur.fetchone()[0]
         conn.close()
-        
+
         print(f'\nDatabase:')
         print(f'  Producten:  {products:,}')
         print(f'  Promoties:  {promotions:,}')
         print(f'  Recepten:   {recepten:,}')
     except Exception as e:
         print(f'Kon database stats niet ophalen: {e}')
-    
+
     print(f'{"="*60}')
 
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Draai de syncs als afhankelijkheidsgraaf')
+    parser.add_argument('stages', nargs='*', help=f'Alleen deze stages ({", ".join(SYNC_GRAPH)})')
+    parser.add_argument('--skip', nargs='+', default=[], help='Stages overslaan')
+    parser.add_argument('--report', help='Timings per stage als JSON naar dit bestand')
+    args = parser.parse_args(argv)
+
+    graph = sync_dag.select(SYNC_GRAPH, args.stages, args.skip)
+    if not wait_for_db():
+        sys.exit(1)
+
+    print(f'\nStarting syncs: {", ".join(graph)}')
+    results = sync_dag.run_dag(graph, run_stage)
+    print_summary(graph, results)
+
+    if args.report:
+        with open(args.report, 'w') as f:
+            json.dump({'graph': graph, 'stages': results}, f, indent=2)
+
+    sys.exit(0 if all(r['status'] == sync_dag.OK for r in results.values()) else 1)
+
+
 if __name__ == '__main__':
     main()
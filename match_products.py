@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Koppel gelijke producten tussen ketens (draait na sync_prices).
+
+Clustert de producten met src/matching.py en schrijft de clusters naar
+canonical_products; products.canonical_id verwijst naar het cluster. Zo kan
+vergelijk_prijzen met één index lookup alle ketens voor hetzelfde product vinden.
+"""
+import os
+import time
+import logging
+
+import psycopg2
+from psycopg2.extras import execute_values
+
+from src.matching import cluster_products, canonical_name, diff_clusters
+from src.sync_runs import run_locked
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+DB_CONFIG = {
+    'host': os.environ.get('DB_HOST', '127.0.0.1'),
+    'port': int(os.environ.get('DB_PORT', '5433')),
+    'database': os.environ.get('DB_NAME', 'supermarkt_db'),
+    'user': os.environ.get('DB_USER', 'postgres'),
+    'password': os.environ.get('DB_PASSWORD', '')
+}
+
+
+def ensure_schema(cur):
+    cur.execute('''
+        CREATE TABLE IF NOT EXISTS canonical_products (
+            id SERIAL PRIMARY KEY,
+            name VARCHAR(500) NOT NULL,
+            base_unit VARCHAR(10),
+            unit_quantity DECIMAL(14,6),
+            product_count INTEGER NOT NULL,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    cur.execute('''
+        ALTER TABLE products ADD COLUMN IF NOT EXISTS canonical_id INTEGER
+            REFERENCES canonical_products(id) ON DELETE SET NULL
+    ''')
+    cur.execute('CREATE INDEX IF NOT EXISTS idx_products_canonical ON products(canonical_id)')
+
+
+def load_products(cur):
+    cur.execute('SELECT id, supermarket_code, name, unit_quantity, base_unit FROM products WHERE missing_since IS NULL')
+    return cur.fetchall()
+
+
+def write_clusters(cur, clusters, products):
+    """Schrijf alleen wat veranderd is: ongewijzigde clusters houden hun id en hun producten worden niet aangeraakt"""
+    by_id = {p[0]: p for p in products}
+    cur.execute('SELECT id, canonical_id FROM products WHERE canonical_id IS NOT NULL')
+    current = dict(cur.fetchall())
+    cur.execute('SELECT id, name, base_unit, unit_quantity, product_count FROM canonical_products')
+    stored = {row[0]: tuple(row[1:]) for row in cur.fetchall()}
+    reuse, fresh, stale = diff_clusters(clusters, current)
+
+    def row(ids):
+        first = by_id[ids[0]]
+        return (canonical_name([by_id[i][2] for i in ids]), first[4], first[3], len(ids))
+
+    changed = [(canonical_id,) + row(ids) for canonical_id, ids in reuse if stored.get(canonical_id) != row(ids)]
+    if changed:
+        execute_values(cur, '''
+            UPDATE canonical_products c SET name = v.name, base_unit = v.base_unit, unit_quantity = v.unit_quantity,
+                product_count = v.product_count, updated_at = NOW()
+            FROM (VALUES %s) AS v(id, name, base_unit, unit_quantity, product_count) WHERE c.id = v.id
+        ''', changed, template='(%s, %s, %s, %s::numeric, %s)', page_size=1000)
+
+    target = {product_id: canonical_id for canonical_id, ids in reuse for product_id in ids}
+    if fresh:
+        canonical_ids = execute_values(cur, '''
+            INSERT INTO canonical_products (name, base_unit, unit_quantity, product_count) VALUES %s RETURNING id
+        ''', [row(ids) for ids in fresh], page_size=1000, fetch=True)
+        target.update((product_id, canonical_id[0]) for ids, canonical_id in zip(fresh, canonical_ids) for product_id in ids)
+
+    # Alleen producten waarvan het cluster veranderd is; producten buiten elk cluster worden ontkoppeld
+    mapping = [(product_id, canonical_id) for product_id, canonical_id in target.items()
+               if current.get(product_id) != canonical_id]
+    mapping += [(product_id, None) for product_id in current if product_id not in target]
+    if mapping:
+        execute_values(cur, '''
+            UPDATE products p SET canonical_id = m.canonical_id
+            FROM (VALUES %s) AS m(product_id, canonical_id) WHERE p.id = m.product_id
+        ''', mapping, template='(%s, %s::integer)', page_size=5000)
+    if stale:
+        cur.execute('DELETE FROM canonical_products WHERE id = ANY(%s)', (sorted(stale),))
+    logger.info(f'{len(fresh):,} nieuwe en {len(changed):,} gewijzigde clusters, {len(stale):,} vervallen, '
+                f'{len(mapping):,} producten opnieuw gekoppeld')
+    return len(target)
+
+
+def main():
+    conn = psycopg2.connect(**DB_CONFIG)
+    try:
+        cur = conn.cursor()
+        # Schema eerst committen: de ALTER TABLE products houdt anders een ACCESS EXCLUSIVE lock
+        # vast tijdens het clusteren en blokkeert alle reads van de server
+        ensure_schema(cur)
+        conn.commit()
+        products = load_products(cur)
+
+        start = time.perf_counter()
+        clusters = cluster_products(products)
+        logger.info(f'{len(products):,} producten geclusterd in {time.perf_counter() - start:.1f}s: '
+                    f'{len(clusters):,} canonieke producten')
+
+        linked = write_clusters(cur, clusters, products)
+        conn.commit()
+        logger.info(f'{linked:,} producten gekoppeld aan een canoniek product')
+        return linked
+    except Exception as e:
+        conn.rollback()
+        logger.error(f'Matching failed: {e}')
+        raise
+    finally:
+        conn.close()
+
+
+if __name__ == '__main__':
+    run_locked(DB_CONFIG, 'matching', main)
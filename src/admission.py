@@ -0,0 +1,97 @@
+"""
+Admission control per tool.
+
+Eén tabel bepaalt per tool de klasse, het maximaal aantal gelijktijdige calls
+en de statement_timeout. Zware tools delen samen een beperkt aantal slots,
+zodat er altijd connecties overblijven voor lichte tools als zoek_producten.
+Een call die binnen ADMISSION_WAIT seconden geen slot krijgt wordt geweigerd.
+"""
+
+import asyncio
+import os
+from contextlib import asynccontextmanager
+
+LIGHT = 'licht'
+HEAVY = 'zwaar'
+
+# tool: (klasse, max gelijktijdige calls of None, statement_timeout in ms)
+TOOL_LIMITS = {
+    'zoek_producten': (LIGHT, None, 2000),
+    'vergelijk_prijzen': (LIGHT, None, 2000),
+    'lijst_drogisten': (LIGHT, None, 2000),
+    'lijst_supermarkten': (LIGHT, None, 2000),
+    'bekijk_aanbiedingen': (LIGHT, None, 3000),
+    'zoek_recepten': (LIGHT, None, 3000),
+    'prijshistorie': (LIGHT, None, 3000),
+    'prijs_alert': (LIGHT, None, 2000),
+    'bewaar_boodschappenlijst': (LIGHT, None, 3000),
+    'laad_boodschappenlijst': (LIGHT, None, 3000),
+    'lijst_boodschappenlijsten': (LIGHT, None, 2000),
+    'set_budget': (LIGHT, None, 2000),
+    'optimaliseer_boodschappenlijst': (HEAVY, 4, 8000),
+    'budget_check': (HEAVY, 4, 8000),
+    'bespaar_tips': (HEAVY, 4, 8000),
+    'vind_winkels': (HEAVY, 4, 5000),
+    'wacht_met_kopen': (HEAVY, 3, 10000),
+    'plan_winkelroute': (HEAVY, 3, 10000),
+    'check_alerts': (HEAVY, 2, 10000),
+    'plan_boodschappen': (HEAVY, 2, 15000),
+}
+DEFAULT_LIMIT = (HEAVY, 2, 5000)
+
+ADMISSION_WAIT = float(os.environ.get('ADMISSION_WAIT', '5'))
+
+
+class Rejected(Exception):
+    """Geen slot vrijgekomen binnen de wachttijd"""
+
+
+def limits(name):
+    return TOOL_LIMITS.get(name, DEFAULT_LIMIT)
+
+
+def statement_timeout_ms(name):
+    return limits(name)[2]
+
+
+class Admission:
+    def __init__(self, heavy_capacity, wait=ADMISSION_WAIT):
+        self.wait = wait
+        self.heavy = asyncio.Semaphore(max(1, heavy_capacity))
+        self._per_tool = {}
+
+    def _semaphores(self, name):
+        klasse, max_calls, _ = limits(name)
+        semaphores = []
+        if max_calls:
+            if name not in self._per_tool:
+                self._per_tool[name] = asyncio.Semaphore(max_calls)
+            semaphores.append(self._per_tool[name])
+        if klasse == HEAVY:
+            semaphores.append(self.heavy)
+        return semaphores
+
+    @asynccontextmanager
+    async def slot(self, name):
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.wait
+        acquired = []
+        try:
+            # Eerst het tool-slot, zodat een tool die zijn eigen limiet bereikt geen gedeeld slot bezet
+            for semaphore in self._semaphores(name):
+                # Vrij slot: direct nemen. wait_for met timeout 0 geeft op Python < 3.12 altijd TimeoutError
+                if semaphore.locked():
+                    remaining = deadline - loop.time()
+                    if remaining <= 0:
+                        raise Rejected(name)
+                    try:
+                        await asyncio.wait_for(semaphore.acquire(), remaining)
+                    except asyncio.TimeoutError:
+                        raise Rejected(name) from None
+                else:
+                    await semaphore.acquire()
+                acquired.append(semaphore)
+            yield
+        finally:
+            for semaphore in acquired:
+                semaphore.release()
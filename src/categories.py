@@ -0,0 +1,91 @@
+"""
+Categorie-indeling van producten en aanbiedingen.
+
+De syncs classificeren elke rij één keer bij het inlezen (kolom categories,
+TEXT[] met GIN index); bekijk_aanbiedingen zoekt daarna met categories @> ARRAY[..].
+"""
+
+import re
+import unicodedata
+
+# Category mapping: categorie -> lijst van product keywords
+CATEGORY_MAPPING = {
+    # Drogist categorieën
+    'haarverzorging': ['shampoo', 'conditioner', 'haarverf', 'haargel', 'haarspray', 'haar'],
+    'mondverzorging': ['tandpasta', 'tandenborstel', 'tandenstokers', 'mondwater', 'floss'],
+    'lichaamsverzorging': ['deodorant', 'douchegel', 'bodylotion', 'zeep', 'scheermesjes', 'scheerschuim', 'aftershave'],
+    'huidverzorging': ['dagcreme', 'nachtcreme', 'bodylotion', 'zonnebrand', 'aftersun', 'lippenbalsem', 'creme'],
+    'make-up': ['mascara', 'eyeliner', 'oogschaduw', 'lippenstift', 'lipgloss', 'foundation', 'nagellak', 'make-up'],
+    'parfum': ['parfum', 'eau de toilette', 'geur'],
+    'gezondheid': ['vitamines', 'hoestdrank', 'neusspray', 'pleister', 'oogdruppels', 'paracetamol'],
+    'oogzorg': ['lenzen', 'contactlenzen', 'oogdruppels', 'lenzenvloeistof'],
+    'hygiene': ['maandverband', 'tampons', 'wattenschijfjes', 'tissues'],
+    # Supermarkt categorieën
+    'vlees': ['gehakt', 'kip', 'rund', 'varken', 'biefstuk', 'worst', 'ham', 'schnitzel', 'spek', 'bacon'],
+    'vis': ['zalm', 'kabeljauw', 'tonijn', 'garnalen', 'vis', 'haring', 'makreel'],
+    'zuivel': ['melk', 'kaas', 'yoghurt', 'boter', 'kwark', 'vla', 'eieren', 'slagroom'],
+    'groenten': ['tomaat', 'komkommer', 'sla', 'paprika', 'ui', 'wortel', 'broccoli', 'aardappel'],
+    'fruit': ['appel', 'peer', 'banaan', 'sinaasappel', 'aardbei', 'druiven', 'mango'],
+    'dranken': ['cola', 'fanta', 'sap', 'water', 'bier', 'wijn', 'koffie', 'thee'],
+}
+
+# Folderz pagina's (merken en verzamelnamen) waarvan de naam zelf geen keyword bevat
+FOLDERZ_CATEGORIES = {
+    'campina': ['zuivel'], 'danone': ['zuivel'], 'almhof': ['zuivel'], 'mona': ['zuivel'],
+    'kalkoen': ['vlees'], 'gourmet': ['vlees'], 'bbq': ['vlees'],
+    'groenten': ['groenten'], 'tomaten': ['groenten'], 'spinazie': ['groenten'], 'bloemkool': ['groenten'],
+    'aardappelen': ['groenten'],
+    'fruit': ['fruit'], 'appels': ['fruit'], 'aardbeien': ['fruit'], 'ananas': ['fruit'], 'kiwi': ['fruit'],
+    'frisdrank': ['dranken'], 'coca-cola': ['dranken'], 'pepsi': ['dranken'], 'sprite': ['dranken'],
+    'lipton': ['dranken'], 'red-bull': ['dranken'], 'chocomel': ['dranken', 'zuivel'],
+    'heineken': ['dranken'], 'grolsch': ['dranken'], 'hertog-jan': ['dranken'], 'amstel': ['dranken'],
+    'bavaria': ['dranken'], 'jupiler': ['dranken'], 'brand': ['dranken'], 'warsteiner': ['dranken'],
+    'desperados': ['dranken'], 'affligem': ['dranken'], 'leffe': ['dranken'], 'corona': ['dranken'],
+    'radler': ['dranken'], 'douwe-egberts': ['dranken'], 'nespresso': ['dranken'], 'senseo': ['dranken'],
+    'oral-b': ['mondverzorging'], 'sensodyne': ['mondverzorging'], 'colgate': ['mondverzorging'],
+    'dove': ['lichaamsverzorging'], 'axe': ['lichaamsverzorging'], 'nivea': ['lichaamsverzorging'],
+    'gillette': ['lichaamsverzorging'],
+    'andrelon': ['haarverzorging'], 'head-shoulders': ['haarverzorging'], 'loreal': ['haarverzorging'],
+    'always': ['hygiene'],
+}
+
+# Korte keywords ('ui', 'sap', 'kip') alleen aan het begin of eind van een woord
+# ('kipfilet', 'appelsap'), anders matcht 'ui' ook 'fruit'; langere keywords
+# ook midden in samenstellingen ('dagcreme')
+_SHORT = 3
+
+
+def _normalize(text):
+    return unicodedata.normalize('NFKD', text or '').encode('ascii', 'ignore').decode().lower()
+
+
+def _pattern(keyword):
+    escaped = re.escape(_normalize(keyword))
+    return escaped if len(keyword) > _SHORT else rf'\b{escaped}|{escaped}\b'
+
+
+_PATTERNS = {
+    code: re.compile('|'.join(_pattern(kw) for kw in keywords))
+    for code, keywords in CATEGORY_MAPPING.items()
+}
+
+
+def classify(name, sources=()):
+    """Gesorteerde lijst categoriecodes voor een productnaam.
+
+    sources: Folderz categorieën (paginanamen) waaronder het product gevonden is;
+    die tellen mee via FOLDERZ_CATEGORIES of hun eigen keywords.
+    """
+    codes = {code for code, pattern in _PATTERNS.items() if pattern.search(_normalize(name))}
+    for source in sources:
+        if source in FOLDERZ_CATEGORIES:
+            codes.update(FOLDERZ_CATEGORIES[source])
+        else:
+            codes.update(code for code, pattern in _PATTERNS.items() if pattern.search(_normalize(source)))
+    return sorted(codes)
+
+
+def ensure_schema(cur, table):
+    """Categorie kolom met GIN index voor products of promotions"""
+    cur.execute(f"ALTER TABLE {table} ADD COLUMN IF NOT EXISTS categories TEXT[] NOT NULL DEFAULT '{{}}'")
+    cur.execute(f'CREATE INDEX IF NOT EXISTS idx_{table}_categories ON {table} USING gin(categories)')
@@ -0,0 +1,178 @@
+"""
+Connection pool met begrensde wachtrij.
+
+psycopg2's ThreadedConnectionPool gooit direct PoolError als alle connecties
+uitgeleend zijn. Deze pool laat callers in volgorde van aankomst (FIFO) wachten
+tot er een connectie vrijkomt, met een timeout. Een vrijgegeven connectie gaat
+direct naar de eerste wachtende, zodat nieuwe callers niet voordringen.
+
+Bij checkout wordt een connectie gevalideerd: gesloten connecties worden
+vervangen en connecties die langer dan validate_idle seconden ongebruikt waren
+krijgen een 'SELECT 1' (bijv. na een herstart van de database).
+"""
+
+import threading
+import time
+from collections import deque
+
+import psycopg2
+from psycopg2 import extensions, pool
+
+
+class PoolTimeout(pool.PoolError):
+    """Geen connectie vrijgekomen binnen de timeout"""
+
+
+# Signaal aan een wachtende: er is een plek vrij, open zelf een nieuwe connectie
+_CREATE = object()
+
+
+class _Waiter:
+    __slots__ = ('event', 'value')
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.value = None
+
+
+class BoundedPool:
+    def __init__(self, minconn, maxconn, timeout=5.0, validate_idle=30.0, connect=psycopg2.connect, **kwargs):
+        if maxconn < 1 or minconn > maxconn:
+            raise ValueError('ongeldige pool grootte')
+        self.minconn = minconn
+        self.maxconn = maxconn
+        self.timeout = timeout
+        self.validate_idle = validate_idle
+        self._connect = connect
+        self._kwargs = kwargs
+        self._lock = threading.Lock()
+        self._idle = []  # (conn, tijdstip vrijgegeven), laatst gebruikte bovenaan
+        self._waiters = deque()
+        self._size = 0
+        self._closed = False
+
+    def warmup(self):
+        """Open connecties tot minconn"""
+        opened = []
+        with self._lock:
+            missing = max(0, self.minconn - self._size)
+            self._size += missing
+        try:
+            for _ in range(missing):
+                opened.append(self._connect(**self._kwargs))
+        except Exception:
+            with self._lock:
+                self._size -= missing - len(opened)
+            raise
+        finally:
+            for conn in opened:
+                self.putconn(conn)
+        return len(opened)
+
+    def getconn(self, timeout=None):
+        timeout = self.timeout if timeout is None else timeout
+        waiter = None
+        with self._lock:
+            if self._closed:
+                raise pool.PoolError('pool is gesloten')
+            if not self._waiters and self._idle:
+                conn, released = self._idle.pop()
+                value = (conn, released)
+            elif not self._waiters and self._size < self.maxconn:
+                self._size += 1
+                value = _CREATE
+            else:
+                waiter = _Waiter()
+                self._waiters.append(waiter)
+
+        if waiter is not None:
+            if not waiter.event.wait(timeout):
+                with self._lock:
+                    if waiter.value is None:
+                        self._waiters.remove(waiter)
+                        raise PoolTimeout(f'geen database connectie beschikbaar binnen {timeout:g}s')
+            value = waiter.value
+
+        if value is _CREATE:
+            return self._open()
+        conn, released = value
+        return self._validated(conn, released)
+
+    def putconn(self, conn, close=False):
+        if not close and not conn.closed:
+            try:
+                if conn.get_transaction_status() != extensions.TRANSACTION_STATUS_IDLE:
+                    conn.rollback()
+            except psycopg2.Error:
+                close = True
+        if close or conn.closed or self._closed:
+            try:
+                conn.close()
+            except psycopg2.Error:
+                pass
+            self._release_slot()
+            return
+
+        with self._lock:
+            if self._waiters:
+                waiter = self._waiters.popleft()
+                waiter.value = (conn, time.monotonic())
+                waiter.event.set()
+            else:
+                self._idle.append((conn, time.monotonic()))
+
+    def closeall(self):
+        with self._lock:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            self._size -= len(idle)
+        for conn, _ in idle:
+            try:
+                conn.close()
+            except psycopg2.Error:
+                pass
+
+    def stats(self):
+        with self._lock:
+            return {
+                'size': self._size,
+                'idle': len(self._idle),
+                'in_use': self._size - len(self._idle),
+                'waiting': len(self._waiters),
+                'max_size': self.maxconn,
+            }
+
+    def _open(self):
+        try:
+            return self._connect(**self._kwargs)
+        except Exception:
+            self._release_slot()
+            raise
+
+    def _release_slot(self):
+        """Een connectie is weg; geef de plek aan de eerste wachtende of geef hem vrij"""
+        with self._lock:
+            if self._waiters and not self._closed:
+                waiter = self._waiters.popleft()
+                waiter.value = _CREATE
+                waiter.event.set()
+            else:
+                self._size -= 1
+
+    def _validated(self, conn, released):
+        if not conn.closed and time.monotonic() - released < self.validate_idle:
+            return conn
+        if not conn.closed:
+            try:
+                cur = conn.cursor(cursor_factory=extensions.cursor)
+                cur.execute('SELECT 1')
+                cur.close()
+                conn.rollback()
+                return conn
+            except psycopg2.Error:
+                pass
+        try:
+            conn.close()
+        except psycopg2.Error:
+            pass
+        return self._open()
@@ -0,0 +1,517 @@
+"""
+Folderz.nl bron voor de sync engine: supermarkten én drogisterijen.
+
+Eén STORE_MAPPING, één set winkels en één lijst Folderz pagina's voor zowel
+sync_folderz.py (alle pagina's, vervangt de folder aanbiedingen) als
+sync_drogist_only.py (alleen drogisterij pagina's, langzamer, voegt toe).
+
+Elke opgehaalde pagina wordt direct als checkpoint in folderz_checkpoints
+gecommit. Een herstart binnen FOLDERZ_CHECKPOINT_HOURS haalt alleen de
+ontbrekende pagina's op. Pas de laatste commit publiceert de nieuwe aanbiedingen
+en ruimt de checkpoints op.
+
+Niet elke pagina wordt elke run opgehaald. folderz_pages houdt per pagina de
+opbrengst, hoe vaak de inhoud verandert (churn) en de laatste wijziging bij;
+daaruit volgen een prioriteit (volgorde van ophalen) en het volgende moment
+(next_due). Pagina's die vaak veranderen komen elke run aan de beurt, stabiele
+pagina's steeds minder vaak (tot MAX_INTERVAL_HOURS) en lege pagina's alleen
+nog als steekproef. Voor pagina's die niet aan de beurt zijn gaan de laatst
+opgehaalde aanbiedingen mee, zodat 'replace' ze niet weggooit.
+"""
+
+import hashlib
+import os
+import random
+import re
+from datetime import date, datetime, timedelta
+from html import unescape
+
+from psycopg2.extras import Json, execute_values
+
+from src import categories
+from src.matching import ProductIndex
+from src import promo_history
+from src.promo_history import archive_and_refresh
+from src import store_stats
+from src.store_stats import refresh_store_stats
+from src.sync_engine import Source
+
+BASE_URL = 'https://www.folderz.nl/aanbiedingen'
+
+# Checkpoints ouder dan dit horen bij een vorige run (de syncs draaien 8 uur na elkaar)
+CHECKPOINT_HOURS = float(os.environ.get('FOLDERZ_CHECKPOINT_HOURS', '6'))
+# Zoveel mislukte pagina's achter elkaar: stoppen (rate limit), niets publiceren, later hervatten
+MAX_FAILED_PAGES = 5
+
+# Adaptieve planning per pagina; FOLDERZ_ADAPTIVE=0 haalt elke run alle pagina's op
+ADAPTIVE = os.environ.get('FOLDERZ_ADAPTIVE', '1') != '0'
+# Ook een pagina die nooit verandert minstens eens per drie dagen ophalen
+MAX_INTERVAL_HOURS = 72
+# Zoveel lege runs achter elkaar: de pagina is dood en wordt eens per week geprobeerd
+DEAD_AFTER_RUNS = 3
+DEAD_INTERVAL_HOURS = 168
+# Gewicht van de laatste run in de gemiddelden van churn en opbrengst
+ALPHA = 0.3
+# De cron tijden schuiven wat; een pagina die binnen dit aantal uur aan de beurt is telt mee
+SCHEDULE_SLACK_HOURS = 2
+
+# Folderz winkelnaam (deel van de alt tekst van het logo) -> onze code; eerste match wint
+STORE_MAPPING = {
+    'albert heijn': 'ah', 'ah': 'ah', 'jumbo': 'jumbo', 'lidl': 'lidl',
+    'aldi': 'aldi', 'plus': 'plus', 'coop': 'coop', 'dekamarkt': 'dekamarkt', 'deka': 'dekamarkt',
+    'dirk': 'dirk', 'vomar': 'vomar', 'hoogvliet': 'hoogvliet', 'spar': 'spar',
+    'poiesz': 'poiesz', 'picnic': 'picnic', 'nettorama': 'nettorama', 'jan linders': 'janlinders',
+    'boni': 'boni', 'ekoplaza': 'ekoplaza',
+    'kruidvat': 'kruidvat', 'etos': 'etos', 'trekpleister': 'trekpleister',
+    'da': 'da', 'holland & barrett': 'hollandbarrett', 'holland &amp; barrett': 'hollandbarrett',
+    'douglas': 'douglas', 'de online drogist': 'onlinedrogist', 'makro': 'makro',
+}
+
+# Winkels die niet uit de prijzen sync komen
+STORES = [
+    ('kruidvat', 'Kruidvat', '💊'), ('etos', 'Etos', '💄'),
+    ('trekpleister', 'Trekpleister', '🏪'), ('da', 'DA Drogist', '💊'),
+    ('hollandbarrett', 'Holland & Barrett', '🌿'), ('douglas', 'Douglas', '💐'),
+    ('onlinedrogist', 'De Online Drogist', '📦'), ('ekoplaza', 'Ekoplaza', '🌱'),
+    ('makro', 'Makro', '🏭'),
+]
+
+SUPERMARKT_CATEGORIES = [
+    'gehakt', 'kip', 'kipfilet', 'rund', 'biefstuk', 'worst', 'rookworst',
+    'bacon', 'spek', 'ham', 'schnitzel', 'kalkoen', 'gourmet', 'bbq',
+    'vis', 'zalm', 'tonijn', 'garnalen', 'haring',
+    'melk', 'yoghurt', 'kwark', 'vla', 'kaas', 'boter', 'eieren', 'slagroom',
+    'campina', 'danone', 'almhof', 'mona',
+    'brood', 'croissant', 'crackers',
+    'groenten', 'tomaten', 'paprika', 'broccoli', 'aardappelen', 'friet',
+    'komkommer', 'wortel', 'spinazie', 'bloemkool',
+    'fruit', 'appels', 'banaan', 'sinaasappel', 'aardbeien', 'ananas', 'mango', 'druiven', 'kiwi',
+    'muesli', 'pindakaas', 'jam', 'hagelslag', 'nutella', 'havermout',
+    'pasta', 'spaghetti', 'rijst', 'noodles',
+    'saus', 'ketchup', 'mayonaise', 'soep', 'heinz', 'unox', 'knorr',
+    'pizza', 'ijs', 'magnum',
+    'frisdrank', 'cola', 'sap', 'water', 'koffie', 'thee',
+    'coca-cola', 'pepsi', 'fanta', 'sprite', 'lipton', 'red-bull', 'chocomel',
+    'bier', 'heineken', 'grolsch', 'hertog-jan', 'amstel', 'bavaria', 'jupiler', 'brand',
+    'warsteiner', 'desperados', 'affligem', 'leffe', 'corona', 'radler', 'wijn',
+    'douwe-egberts', 'nespresso', 'senseo',
+    'chips', 'noten', 'koek', 'chocolade', 'drop', 'snoep',
+    'lays', 'doritos', 'pringles', 'oreo', 'milka', 'kitkat', 'mars', 'haribo',
+    'wasmiddel', 'wasverzachter', 'toiletpapier', 'tissues', 'afwasmiddel',
+    'ariel', 'persil', 'robijn', 'dreft', 'page',
+    'luiers', 'pampers', 'huggies',
+]
+
+DROGIST_CATEGORIES = [
+    # Mondverzorging
+    'tandpasta', 'tandenborstel', 'tandenstokers', 'mondwater', 'oral-b', 'sensodyne', 'colgate',
+    # Lichaamsverzorging
+    'deodorant', 'douchegel', 'handzeep', 'scheermesjes', 'scheerschuim', 'aftershave',
+    'dove', 'axe', 'nivea', 'gillette',
+    # Haarverzorging
+    'shampoo', 'conditioner', 'haarverf', 'andrelon', 'head-shoulders', 'loreal',
+    # Huidverzorging
+    'dagcreme', 'bodylotion', 'zonnebrand', 'aftersun', 'lippenbalsem',
+    # Make-up
+    'mascara', 'eyeliner', 'oogschaduw', 'lippenstift', 'lipgloss', 'foundation', 'nagellak',
+    # Parfum
+    'parfum',
+    # Gezondheid
+    'vitamines', 'hoestdrank', 'neusspray', 'pleister', 'oogdruppels',
+    # Oogzorg
+    'lenzen', 'contactlenzen',
+    # Hygiene
+    'maandverband', 'tampons', 'always', 'wattenschijfjes',
+]
+
+
+def parse_price(s):
+    if not s:
+        return None
+    s = re.sub(r'[^\d,.]', '', s).replace(',', '.')
+    try:
+        v = float(s)
+        return v if v < 500 else None
+    except ValueError:
+        return None
+
+
+def parse(html):
+    """Aanbiedingen op een Folderz pagina: name, price, original, store, badge_pct, days"""
+    products = []
+    blocks = re.findall(r'<div class="product">(.*?)</div>\s*</div>\s*</div>\s*</div>', html, re.DOTALL)
+    for b in blocks:
+        p = {}
+        m = re.search(r'product__name[^>]*>([^<]+)', b)
+        if m: p['name'] = unescape(m.group(1).strip())
+        m = re.search(r'product__price-offer[^>]*>([^<]+)', b)
+        if m: p['price'] = parse_price(m.group(1))
+        m = re.search(r'product__price-normal[^>]*>([^<]+)', b)
+        if m: p['original'] = parse_price(m.group(1))
+        m = re.search(r'<img[^>]*alt="([^"]+)"', b)
+        if m: p['store'] = unescape(m.group(1).strip())
+        m = re.search(r'badge--secondary">([^<]+)', b)
+        if m:
+            pct = re.search(r'(\d+)\s*%', m.group(1))
+            if pct: p['badge_pct'] = int(pct.group(1))
+        m = re.search(r'product-date[^>]*>([^<]+)', b)
+        if m:
+            days = re.search(r'(\d+)\s*dag', m.group(1))
+            weeks = re.search(r'(\d+)\s*wee?k', m.group(1))
+            if days: p['days'] = int(days.group(1))
+            elif weeks: p['days'] = int(weeks.group(1)) * 7
+        if p.get('name') and p.get('price') and p.get('store') and p['price'] > 0:
+            products.append(p)
+    return products
+
+
+def store_code(store, known=None):
+    """Code voor een Folderz winkelnaam; None als onbekend of (bij known) niet in supermarkets"""
+    store = store.lower()
+    for pattern, code in STORE_MAPPING.items():
+        if pattern in store:
+            return code if known is None or code in known else None
+    return None
+
+
+def discount(p):
+    """(originele prijs, kortingspercentage); uit de badge als er geen originele prijs is"""
+    price, orig, pct = p['price'], p.get('original'), None
+    if orig and orig > price and orig < price * 5:
+        pct = round((orig - price) / orig * 100)
+    elif p.get('badge_pct'):
+        pct = p['badge_pct']
+        if not orig and 0 < pct < 100:
+            orig = price / (1 - pct / 100)
+    return orig, pct
+
+
+def dedupe(products):
+    """Eén aanbieding per (winkel, naam); Folderz pagina's samen in 'categories'"""
+    seen = {}
+    for p in products:
+        key = (p['store'].lower(), p['name'].lower())
+        if key in seen:
+            seen[key]['categories'] |= p['categories']
+        else:
+            seen[key] = p
+    return list(seen.values())
+
+
+def ensure_schema(cur):
+    """Koppeling aanbieding -> product voor bestaande databases"""
+    cur.execute('ALTER TABLE promotions ADD COLUMN IF NOT EXISTS product_id INTEGER REFERENCES products(id) ON DELETE SET NULL')
+    cur.execute('CREATE INDEX IF NOT EXISTS idx_promotions_product ON promotions(product_id)')
+    categories.ensure_schema(cur, 'promotions')
+    # product_index koppelt alleen aan actieve producten (kolom van sync_prices)
+    cur.execute('ALTER TABLE products ADD COLUMN IF NOT EXISTS missing_since TIMESTAMP')
+
+
+def ensure_checkpoints(cur):
+    cur.execute('''
+        CREATE TABLE IF NOT EXISTS folderz_checkpoints (
+            source VARCHAR(50) NOT NULL,
+            page VARCHAR(100) NOT NULL,
+            products JSONB NOT NULL,
+            fetched_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (source, page)
+        )
+    ''')
+
+
+def load_checkpoints(cur, source, hours=None):
+    """{pagina: aanbiedingen} van de huidige run van deze bron"""
+    cur.execute('''
+        SELECT page, products FROM folderz_checkpoints
+        WHERE source = %s AND fetched_at > NOW() - make_interval(secs => %s)
+    ''', (source, (CHECKPOINT_HOURS if hours is None else hours) * 3600))
+    return dict(cur.fetchall())
+
+
+def save_checkpoint(cur, source, page, products):
+    cur.execute('''
+        INSERT INTO folderz_checkpoints (source, page, products) VALUES (%s, %s, %s)
+        ON CONFLICT (source, page) DO UPDATE SET products = EXCLUDED.products, fetched_at = NOW()
+    ''', (source, page, Json(products)))
+
+
+PAGE_COLUMNS = ('products', 'content_hash', 'fetched_at', 'changed_at', 'runs', 'churn', 'yield_avg',
+                'empty_runs', 'priority', 'next_due')
+
+
+def ensure_page_stats(cur):
+    cur.execute('''
+        CREATE TABLE IF NOT EXISTS folderz_pages (
+            source VARCHAR(50) NOT NULL,
+            page VARCHAR(100) NOT NULL,
+            products JSONB NOT NULL,
+            content_hash TEXT NOT NULL,
+            fetched_at TIMESTAMP NOT NULL,
+            changed_at TIMESTAMP NOT NULL,
+            runs INTEGER NOT NULL,
+            churn REAL NOT NULL,
+            yield_avg REAL NOT NULL,
+            empty_runs INTEGER NOT NULL,
+            priority REAL NOT NULL,
+            next_due TIMESTAMP NOT NULL,
+            PRIMARY KEY (source, page)
+        )
+    ''')
+
+
+def load_page_stats(cur, source):
+    """{pagina: statistieken} van deze bron"""
+    cur.execute(f'SELECT page, {", ".join(PAGE_COLUMNS)} FROM folderz_pages WHERE source = %s', (source,))
+    return {row[0]: dict(zip(PAGE_COLUMNS, row[1:])) for row in cur.fetchall()}
+
+
+def save_page_stats(cur, source, observed):
+    """observed: {pagina: statistieken uit observe()}"""
+    if not observed:
+        return
+    rows = [(source, page, Json(s['products']), *(s[c] for c in PAGE_COLUMNS[1:])) for page, s in observed.items()]
+    execute_values(cur, f'''
+        INSERT INTO folderz_pages (source, page, {", ".join(PAGE_COLUMNS)}) VALUES %s
+        ON CONFLICT (source, page) DO UPDATE SET
+            {", ".join(f"{c} = EXCLUDED.{c}" for c in PAGE_COLUMNS)}
+    ''', rows)
+
+
+def page_hash(products):
+    """Inhoud van een pagina, los van de volgorde op de pagina"""
+    key = sorted((p['store'].lower(), p['name'].lower(), p['price'], p.get('original')) for p in products)
+    return hashlib.md5(repr(key).encode()).hexdigest()
+
+
+def interval_hours(stats, now):
+    """Uren tot de volgende keer: half zo lang als de pagina al stabiel is, korter naarmate de churn hoger is"""
+    if stats['empty_runs'] >= DEAD_AFTER_RUNS:
+        return DEAD_INTERVAL_HOURS
+    stable = (now - stats['changed_at']).total_seconds() / 3600
+    return min(MAX_INTERVAL_HOURS, stable / 2 * (1 - stats['churn']))
+
+
+def priority(stats):
+    """Verwachte nieuwe aanbiedingen per request: opbrengst maal churn (nooit helemaal 0)"""
+    return stats['yield_avg'] * (0.1 + stats['churn'])
+
+
+def observe(stats, products, now):
+    """
+    Nieuwe statistieken na het ophalen van een pagina; stats None bij de eerste
+    keer. Elke aanbieding houdt de start_date van de run waarin hij voor het eerst
+    op deze pagina stond, zodat een herhaalde run geen nieuwe aanbieding maakt.
+    """
+    previous = {(p['store'].lower(), p['name'].lower()): p.get('start_date') for p in stats['products']} if stats else {}
+    first_seen = now.date().isoformat()
+    products = [dict(p, start_date=previous.get((p['store'].lower(), p['name'].lower())) or first_seen)
+                for p in products]
+    content = page_hash(products)
+    if stats is None:
+        changed, churn, yield_avg, runs, empty_runs = True, 1.0, float(len(products)), 0, 0
+    else:
+        changed = content != stats['content_hash']
+        churn = ALPHA * changed + (1 - ALPHA) * stats['churn']
+        yield_avg = ALPHA * len(products) + (1 - ALPHA) * stats['yield_avg']
+        runs, empty_runs = stats['runs'], stats['empty_runs']
+    new = {
+        'products': products, 'content_hash': content, 'fetched_at': now,
+        'changed_at': now if changed else stats['changed_at'], 'runs': runs + 1, 'churn': churn,
+        'yield_avg': yield_avg, 'empty_runs': 0 if products else empty_runs + 1,
+    }
+    new['priority'] = priority(new)
+    new['next_due'] = now + timedelta(hours=interval_hours(new, now))
+    return new
+
+
+def schedule(pages, stats, now):
+    """(op te halen pagina's, hoogste prioriteit eerst; pagina's die nog niet aan de beurt zijn)"""
+    horizon = now + timedelta(hours=SCHEDULE_SLACK_HOURS)
+    due = [page for page in pages if page not in stats or stats[page]['next_due'] <= horizon]
+    rest = [page for page in pages if page in stats and stats[page]['next_due'] > horizon]
+    # Nieuwe pagina's eerst: daar is nog niets over bekend
+    due.sort(key=lambda page: -stats[page]['priority'] if page in stats else float('-inf'))
+    return due, rest
+
+
+def carry(stats, now):
+    """De laatst opgehaalde aanbiedingen van een pagina, met de resterende looptijd; verlopen vallen af"""
+    elapsed = (now.date() - stats['fetched_at'].date()).days
+    fetched = stats['fetched_at'].date().isoformat()
+    return [dict(p, days=p.get('days', 7) - elapsed, start_date=p.get('start_date') or fetched)
+            for p in stats['products'] if p.get('days', 7) > elapsed]
+
+
+def start_date(p, today):
+    """Eerste dag dat de aanbieding gezien is (adaptieve planning), anders vandaag"""
+    return date.fromisoformat(p['start_date']) if p.get('start_date') else today
+
+
+def ensure_stores(cur):
+    for code, name, icon in STORES:
+        cur.execute('INSERT INTO supermarkets (code, name, icon) VALUES (%s, %s, %s) '
+                    'ON CONFLICT (code) DO UPDATE SET name = EXCLUDED.name, icon = EXCLUDED.icon', (code, name, icon))
+
+
+def product_index(cur, code, cache):
+    """ProductIndex over de producten van een keten, één keer per sync geladen"""
+    if code not in cache:
+        cur.execute('SELECT id, name FROM products WHERE supermarket_code = %s AND missing_since IS NULL', (code,))
+        cache[code] = ProductIndex(cur.fetchall())
+    return cache[code]
+
+
+class FolderzSource(Source):
+    """
+    Folderz pagina's als bron. replace: eerst alle folder aanbiedingen verwijderen
+    (in dezelfde transactie als de nieuwe, dus lezers zien nooit een lege tabel).
+    adaptive: alleen de pagina's ophalen die volgens folderz_pages aan de beurt zijn.
+    """
+
+    lock = 'folderz'
+
+    def __init__(self, name, pages, replace=True, delay=2.0, jitter=1.0, pause_every=15, pause=8, adaptive=None):
+        self.name = name
+        self.pages = pages
+        self.replace = replace
+        self.adaptive = ADAPTIVE if adaptive is None else adaptive
+        self.observed = {}
+        self.delay = delay
+        self.jitter = jitter
+        self.pause_every = pause_every
+        self.pause = pause
+
+    def fetch_page(self, ctx, page, retries=3):
+        for attempt in range(retries):
+            try:
+                r = ctx.get(f'{BASE_URL}/{page}')
+                if r.status_code == 404:
+                    return ''
+                elif r.status_code == 200 and len(r.text) > 1000:
+                    return r.text
+                elif r.status_code in [202, 429] or len(r.text) < 500:
+                    wait = (2 ** attempt) * 5 + random.uniform(1, 3)
+                    print(f'    [rate limit, wacht {wait:.0f}s]', end='', flush=True)
+                    ctx.sleep(wait)
+            except Exception:
+                if attempt < retries - 1:
+                    ctx.sleep(3)
+        return None
+
+    def fetch(self, ctx, now=None):
+        """
+        De geplande pagina's, met checkpoints; '' (404) is een lege pagina, None een
+        mislukte. Voor niet geplande en mislukte pagina's gaan de laatst bekende
+        aanbiedingen mee.
+        """
+        now = now or datetime.now()
+        stats = load_page_stats(ctx.cur, self.name) if self.adaptive else {}
+        due, rest = schedule(self.pages, stats, now)
+        done = load_checkpoints(ctx.cur, self.name)
+        if done:
+            print(f'Hervat: {len(done)}/{len(due)} pagina\'s uit checkpoints')
+        if rest:
+            print(f'Gepland: {len(due)}/{len(self.pages)} pagina\'s, {len(rest)} uit de vorige runs')
+        self.observed = {}
+        found = []
+        fetched = failed = 0
+        for i, page in enumerate(due):
+            if page in done:
+                prods = done[page]
+            else:
+                print(f'[{i+1:3}/{len(due)}] {page:20}', end=' ', flush=True)
+                html = self.fetch_page(ctx, page)
+                if html is None:
+                    print('-> SKIP')
+                    failed += 1
+                    if failed >= MAX_FAILED_PAGES:
+                        raise RuntimeError(f'{failed} pagina\'s achter elkaar mislukt (tot {page}); '
+                                           f'opnieuw starten hervat vanaf de checkpoints')
+                    prods = None
+                else:
+                    failed = 0
+                    prods = parse(html)
+                    save_checkpoint(ctx.cur, self.name, page, prods)
+                    ctx.conn.commit()
+                    print(f'-> {len(prods):3}')
+                fetched += 1
+                ctx.sleep(self.delay + random.uniform(0, self.jitter))
+                if self.pause_every and fetched % self.pause_every == 0:
+                    print(f'  ... pauze {self.pause}s ...')
+                    ctx.sleep(self.pause)
+            if prods is None:
+                prods = carry(stats[page], now) if page in stats else []
+            elif self.adaptive:
+                self.observed[page] = observe(stats.get(page), prods, now)
+                prods = [dict(p) for p in self.observed[page]['products']]
+            found.extend(self.tag(prods, page))
+        # Na de opgehaalde pagina's: bij dubbele aanbiedingen wint de verse versie
+        for page in rest:
+            found.extend(self.tag(carry(stats[page], now), page))
+        unique = dedupe(found)
+        print(f'\nTotaal uniek: {len(unique)}')
+        return unique
+
+    @staticmethod
+    def tag(prods, page):
+        for p in prods:
+            p['categories'] = {page}
+        return prods
+
+    def prepare(self, ctx):
+        ensure_schema(ctx.cur)
+        ensure_checkpoints(ctx.cur)
+        ensure_page_stats(ctx.cur)
+        ensure_stores(ctx.cur)
+        store_stats.ensure_schema(ctx.cur)
+        promo_history.prepare(ctx.cur)
+
+    def write(self, ctx, items):
+        cur = ctx.cur
+        cur.execute('SELECT code FROM supermarkets')
+        known = {r[0] for r in cur.fetchall()}
+        if self.replace:
+            cur.execute("DELETE FROM promotions WHERE promo_type = 'folder'")
+            print(f'Vervangen: {cur.rowcount} oude folder aanbiedingen')
+
+        today = datetime.now().date()
+        inserted = linked = 0
+        indexes = {}
+        for p in items:
+            code = store_code(p['store'], known)
+            if not code:
+                continue
+            orig, pct = discount(p)
+            product_id = product_index(cur, code, indexes).match(p['name'])
+            cur.execute('''
+                INSERT INTO promotions (supermarket_code, product_name, original_price, discount_price,
+                    discount_percent, promo_type, start_date, end_date, product_id, categories)
+                VALUES (%s, %s, %s, %s, %s, 'folder', %s, %s, %s, %s) ON CONFLICT DO NOTHING
+            ''', (code, p['name'], orig, p['price'], pct, start_date(p, today), today + timedelta(days=p.get('days', 7)),
+                  product_id, categories.classify(p['name'], sorted(p['categories']))))
+            if cur.rowcount > 0:
+                inserted += 1
+                linked += product_id is not None
+
+        archived, cycles = archive_and_refresh(cur)
+        refresh_store_stats(cur, promotions=True)
+        # Zelfde transactie als de aanbiedingen: na de commit begint de volgende run opnieuw
+        cur.execute('DELETE FROM folderz_checkpoints WHERE source = %s', (self.name,))
+        save_page_stats(cur, self.name, self.observed)
+        print(f'Geinserteerd: {inserted} | Gekoppeld aan product: {linked}')
+        print(f'Gearchiveerd: {archived} | Aanbiedingscycli bijgewerkt: {cycles}')
+        return inserted
+
+    def summary(self, ctx):
+        cur = ctx.cur
+        cur.execute("SELECT supermarket_code, COUNT(*) FROM promotions WHERE promo_type = 'folder' "
+                    "GROUP BY supermarket_code ORDER BY COUNT(*) DESC LIMIT 10")
+        print('\nTop winkels:')
+        for code, count in cur.fetchall():
+            print(f'  {code:15} {count:4}')
+
+
+# sync_folderz.py: alle pagina's, twee keer per dag
+FOLDERZ = FolderzSource('folderz', SUPERMARKT_CATEGORIES + DROGIST_CATEGORIES)
+# sync_drogist_only.py: alleen drogisterij, met vaste lange pauzes; voegt toe zonder te verwijderen
+DROGIST = FolderzSource('drogist_only', DROGIST_CATEGORIES, replace=False, delay=2.0, jitter=0, pause_every=0)
@@ -0,0 +1,157 @@
+"""
+Opnemen en afspelen van HTTP responses voor de sync scripts.
+
+SYNC_HTTP_MODE=record schrijft elke response (status, content-type, body) naar
+een gzip JSON-lines archief (SYNC_HTTP_ARCHIVE). SYNC_HTTP_MODE=replay speelt
+dat archief af zonder netwerk en zonder wachttijden, zodat een sync end-to-end
+op een vaste corpus gemeten en getest kan worden. Standaard (live) verandert
+er niets.
+"""
+
+import asyncio
+import atexit
+import base64
+import gzip
+import json
+import os
+import threading
+import time
+from collections import defaultdict
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+import httpx
+
+LIVE = 'live'
+RECORD = 'record'
+REPLAY = 'replay'
+
+MODE = os.environ.get('SYNC_HTTP_MODE', LIVE)
+ARCHIVE = os.environ.get('SYNC_HTTP_ARCHIVE', 'http_archive.jsonl.gz')
+
+
+def request_key(method, url):
+    """Methode en URL met gesorteerde query parameters"""
+    parts = urlsplit(str(url))
+    query = urlencode(sorted(parse_qsl(parts.query, keep_blank_values=True)))
+    return f'{method.upper()} {urlunsplit((parts.scheme, parts.netloc, parts.path, query, ""))}'
+
+
+class Archive:
+    """Responses per request key; bij herhaalde requests in opnamevolgorde"""
+
+    def __init__(self, path, mode):
+        self.path = path
+        self.mode = mode
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._responses = defaultdict(list)
+        self._served = defaultdict(int)
+        self._file = None
+        if mode == REPLAY:
+            with gzip.open(path, 'rt', encoding='utf-8') as f:
+                for line in f:
+                    entry = json.loads(line)
+                    self._responses[entry['key']].append(entry)
+        elif mode == RECORD:
+            if os.path.dirname(path):
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+            self._file = gzip.open(path, 'wt', encoding='utf-8')
+
+    def __len__(self):
+        return sum(len(entries) for entries in self._responses.values())
+
+    def record(self, request, response):
+        entry = {
+            'key': request_key(request.method, request.url),
+            'status': response.status_code,
+            'content_type': response.headers.get('content-type'),
+            'body': base64.b64encode(response.content).decode('ascii'),
+        }
+        with self._lock:
+            self._file.write(json.dumps(entry) + '\n')
+            self._responses[entry['key']].append(entry)
+
+    def replay(self, request):
+        key = request_key(request.method, request.url)
+        with self._lock:
+            entries = self._responses.get(key)
+            if not entries:
+                self.misses += 1
+                return httpx.Response(404, headers={'x-replay': 'miss'}, request=request)
+            # Na de laatste opgenomen response blijft die terugkomen
+            entry = entries[min(self._served[key], len(entries) - 1)]
+            self._served[key] += 1
+        headers = {'content-type': entry['content_type']} if entry['content_type'] else {}
+        return httpx.Response(entry['status'], headers=headers, content=base64.b64decode(entry['body']),
+                              request=request)
+
+    def close(self):
+        if self._file:
+            self._file.close()
+            self._file = None
+
+
+class ArchiveTransport(httpx.BaseTransport):
+    def __init__(self, archive, wrapped=None):
+        self.archive = archive
+        self.wrapped = wrapped or httpx.HTTPTransport()
+
+    def handle_request(self, request):
+        if self.archive.mode == REPLAY:
+            return self.archive.replay(request)
+        response = self.wrapped.handle_request(request)
+        response.read()
+        self.archive.record(request, response)
+        return response
+
+    def close(self):
+        self.wrapped.close()
+
+
+class AsyncArchiveTransport(httpx.AsyncBaseTransport):
+    def __init__(self, archive, wrapped=None):
+        self.archive = archive
+        self.wrapped = wrapped or httpx.AsyncHTTPTransport()
+
+    async def handle_async_request(self, request):
+        if self.archive.mode == REPLAY:
+            return self.archive.replay(request)
+        response = await self.wrapped.handle_async_request(request)
+        await response.aread()
+        self.archive.record(request, response)
+        return response
+
+    async def aclose(self):
+        await self.wrapped.aclose()
+
+
+_archive = None
+
+
+def archive():
+    """Het archief van dit proces (None in live modus)"""
+    global _archive
+    if _archive is None and MODE != LIVE:
+        _archive = Archive(ARCHIVE, MODE)
+        atexit.register(_archive.close)
+    return _archive
+
+
+def transport():
+    """httpx transport voor de huidige modus; None betekent gewoon netwerk"""
+    return ArchiveTransport(archive()) if MODE != LIVE else None
+
+
+def async_transport():
+    return AsyncArchiveTransport(archive()) if MODE != LIVE else None
+
+
+def sleep(seconds):
+    """time.sleep, behalve bij replay: afspelen gaat op volle snelheid"""
+    if MODE != REPLAY:
+        time.sleep(seconds)
+
+
+async def async_sleep(seconds):
+    if MODE != REPLAY:
+        await asyncio.sleep(seconds)
@@ -0,0 +1,239 @@
+"""
+Koppelen van gelijke producten tussen ketens.
+
+Producten worden genormaliseerd (kleine letters, zonder accenten, hoeveelheden
+en huismerk-prefix) en daarna alleen vergeleken binnen een blok met dezelfde
+basiseenheid en hoeveelheid, en alleen als ze een woord delen. Het merk (eerste
+woord als het geen huismerk is) moet in de naam van de ander voorkomen. Zo blijft het aantal vergelijkingen ruim onder n² bij 110k
+producten. Paren boven de drempel (Dice over karakter-trigrammen) worden
+van sterk naar zwak samengevoegd, met hoogstens één product per keten per
+cluster.
+"""
+
+import re
+import unicodedata
+from collections import Counter, defaultdict
+
+# Merknamen die op een huismerk wijzen; die producten zijn onderling vergelijkbaar
+# (na normalisatie, dus '1 de beste' staat er als 'de beste')
+HOUSE_BRANDS = [
+    'albert heijn', 'ah basic', 'ah biologisch', 'ah excellent', 'ah terra', 'ah',
+    'jumbo', 'lidl', 'aldi', 'plus', 'dirk', 'vomar', 'dekamarkt', 'deka', 'hoogvliet',
+    'coop', 'spar', 'poiesz', 'jan linders', 'boni', 'nettorama', 'ekoplaza', 'picnic',
+    'kruidvat', 'etos', 'trekpleister', 'de beste', "g'woon", 'gwoon', 'euroshopper', 'perfekt',
+]
+HOUSE_BRAND = 'huismerk'
+
+STOPWORDS = {'de', 'het', 'een', 'en', 'met', 'van', 'in', 'voor', 'op', 'of', 'per', 'stuk', 'stuks'}
+
+_QUANTITY = re.compile(
+    r'\b\d+(?:[.,]\d+)?\s*(?:x\s*\d+(?:[.,]\d+)?\s*)?'
+    r'(?:kg|kilo|g|gr|gram|mg|l|liter|ltr|ml|cl|dl|st|stuks?|rol|rollen|zakjes|tabletten|capsules|pack|pak)?\b'
+)
+_NON_WORD = re.compile(r"[^a-z0-9' ]+")
+_SPACES = re.compile(r'\s+')
+
+_BRAND_PATTERN = re.compile(
+    r'^(?:' + '|'.join(re.escape(b) for b in sorted(HOUSE_BRANDS, key=len, reverse=True)) + r')\b'
+)
+
+DEFAULT_THRESHOLD = 0.6
+# Woorden die in meer producten van een blok voorkomen zijn te algemeen om op te blokken
+MAX_POSTING = 300
+
+
+def normalize_name(name):
+    text = unicodedata.normalize('NFKD', name or '').encode('ascii', 'ignore').decode().lower()
+    text = text.replace('-', ' ').replace('&', ' en ')
+    text = _NON_WORD.sub(' ', text)
+    text = _QUANTITY.sub(' ', text)
+    return _SPACES.sub(' ', text).strip()
+
+
+def split_brand(normalized):
+    """(merk, naam): huismerken worden 'huismerk' en uit de naam gehaald, anders het eerste woord"""
+    m = _BRAND_PATTERN.match(normalized)
+    if m:
+        return HOUSE_BRAND, normalized[m.end():].strip()
+    return normalized.partition(' ')[0], normalized
+
+
+def trigrams(text):
+    padded = f'  {text} '
+    return frozenset(padded[i:i + 3] for i in range(len(padded) - 2))
+
+
+def dice(a, b):
+    if not a or not b:
+        return 0.0
+    return 2 * len(a & b) / (len(a) + len(b))
+
+
+def quantity_key(quantity, base_unit):
+    if quantity is None:
+        return base_unit or '', None
+    return base_unit or '', round(float(quantity), 3)
+
+
+class _Item:
+    __slots__ = ('id', 'chain', 'brand', 'tokens', 'grams')
+
+    def __init__(self, product_id, chain, brand, text):
+        self.id = product_id
+        self.chain = chain
+        self.brand = brand
+        self.tokens = {t for t in text.split() if len(t) > 1 and t not in STOPWORDS}
+        self.grams = trigrams(text)
+
+
+def same_brand(a, b):
+    """Een A-merk moet in de naam van de ander staan; twee huismerken passen altijd"""
+    if a.brand != HOUSE_BRAND and a.brand not in b.tokens:
+        return False
+    return b.brand == HOUSE_BRAND or b.brand in a.tokens
+
+
+def cluster_products(products, threshold=DEFAULT_THRESHOLD, max_posting=MAX_POSTING):
+    """Cluster gelijke producten over ketens heen.
+
+    products: iterable van (id, supermarket_code, name, unit_quantity, base_unit).
+    Geeft een lijst clusters terug (lijsten van product ids) met producten van
+    minstens twee ketens.
+    """
+    items = []
+    blocks = defaultdict(list)
+    for product_id, chain, name, quantity, base_unit in products:
+        brand, text = split_brand(normalize_name(name))
+        if not text:
+            continue
+        blocks[quantity_key(quantity, base_unit)].append(len(items))
+        items.append(_Item(product_id, chain, brand, text))
+
+    edges = []
+    for members in blocks.values():
+        if len(members) < 2 or len({items[i].chain for i in members}) < 2:
+            continue
+        postings = defaultdict(list)
+        for i in members:
+            for token in items[i].tokens:
+                postings[token].append(i)
+        seen = set()
+        for posting in postings.values():
+            if len(posting) < 2 or len(posting) > max_posting:
+                continue
+            for n, a in enumerate(posting):
+                for b in posting[n + 1:]:
+                    if items[a].chain == items[b].chain or (a, b) in seen:
+                        continue
+                    seen.add((a, b))
+                    if not same_brand(items[a], items[b]):
+                        continue
+                    similarity = dice(items[a].grams, items[b].grams)
+                    if similarity >= threshold:
+                        edges.append((similarity, a, b))
+
+    # Union-find: sterkste paren eerst, nooit twee producten van dezelfde keten in één cluster
+    parent = list(range(len(items)))
+    chains = [{item.chain} for item in items]
+
+    def find(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    for _, a, b in sorted(edges, key=lambda e: -e[0]):
+        ra, rb = find(a), find(b)
+        if ra == rb or chains[ra] & chains[rb]:
+            continue
+        if len(chains[ra]) < len(chains[rb]):
+            ra, rb = rb, ra
+        parent[rb] = ra
+        chains[ra] |= chains[rb]
+
+    clusters = defaultdict(list)
+    for i, item in enumerate(items):
+        root = find(i)
+        if len(chains[root]) > 1:
+            clusters[root].append(item.id)
+    return list(clusters.values())
+
+
+def canonical_name(names):
+    """Kortste naam zonder huismerk-prefix als weergavenaam van een cluster"""
+    best = min(names, key=lambda n: (len(split_brand(normalize_name(n))[1]), n))
+    brand, text = split_brand(normalize_name(best))
+    return text if brand == HOUSE_BRAND else best
+
+
+def diff_clusters(clusters, current):
+    """Vergelijk nieuwe clusters met de opgeslagen koppeling {product_id: canonical_id}.
+
+    Een ongewijzigd cluster houdt zijn id; een gewijzigd cluster neemt het id
+    over dat de meeste van zijn producten al hadden (als dat nog vrij is).
+    Geeft (reuse als [(canonical_id, ids)], nieuwe clusters, ongebruikte ids).
+    """
+    stored = defaultdict(set)
+    for product_id, canonical_id in current.items():
+        stored[canonical_id].add(product_id)
+    reuse, pending, claimed = [], [], set()
+    for ids in clusters:
+        canonical_id = current.get(ids[0])
+        if canonical_id is not None and stored[canonical_id] == set(ids):
+            reuse.append((canonical_id, ids))
+            claimed.add(canonical_id)
+        else:
+            pending.append(ids)
+    fresh = []
+    for ids in pending:
+        counts = Counter(current[i] for i in ids if i in current and current[i] not in claimed)
+        if counts:
+            canonical_id = counts.most_common(1)[0][0]
+            reuse.append((canonical_id, ids))
+            claimed.add(canonical_id)
+        else:
+            fresh.append(ids)
+    return reuse, fresh, set(stored) - claimed
+
+
+PROMO_THRESHOLD = 0.55
+
+
+class ProductIndex:
+    """Zoekt bij een aanbieding het product van dezelfde keten (in het geheugen).
+
+    products: iterable van (id, name). Kandidaten komen uit de zeldzaamste woorden
+    van de aanbiedingsnaam; het beste product boven de drempel wint.
+    """
+
+    def __init__(self, products, threshold=PROMO_THRESHOLD):
+        self.threshold = threshold
+        self._items = []
+        self._postings = defaultdict(list)
+        for product_id, name in products:
+            brand, text = split_brand(normalize_name(name))
+            if not text:
+                continue
+            item = _Item(product_id, None, brand, text)
+            for token in item.tokens:
+                self._postings[token].append(len(self._items))
+            self._items.append(item)
+
+    def __len__(self):
+        return len(self._items)
+
+    def match(self, name, rarest=3):
+        brand, text = split_brand(normalize_name(name))
+        probe = _Item(None, None, brand, text)
+        postings = sorted((self._postings[t] for t in probe.tokens if t in self._postings), key=len)
+        usable = [p for p in postings[:rarest] if len(p) <= MAX_POSTING] or postings[:1]
+        best_id, best = None, self.threshold
+        for posting in usable:
+            for i in posting:
+                item = self._items[i]
+                if not same_brand(probe, item):
+                    continue
+                similarity = dice(probe.grams, item.grams)
+                if similarity >= best:
+                    best_id, best = item.id, similarity
+        return best_id
@@ -0,0 +1,88 @@
+"""
+Recepten kiezen voor plan_boodschappen in twee fases.
+
+Fase 1 haalt een begrensde, seedbare steekproef lichte kandidaten op (id en
+ingredient_tokens): alle eigen recepten plus CANDIDATES recepten op willekeurig
+getrokken ids (elk bestaand recept even veel kans, ook naast gaten in de ids).
+Die worden gescoord op de actuele aanbiedingen.
+Fase 2 haalt alleen voor de gekozen recepten de volledige rij op. Geheugen en
+looptijd hangen zo niet af van het aantal recepten.
+"""
+
+import os
+
+CANDIDATES = int(os.environ.get('PLAN_CANDIDATES', '200'))
+# Aanbiedingen om tegen te scoren (hoogste korting eerst)
+MAX_PROMOTIONS = 500
+# Rondes willekeurige ids voordat de steekproef uit het gefilterde aanbod zelf komt
+SAMPLE_ROUNDS = 3
+
+_CANDIDATE_COLUMNS = "id, bron = 'eigen' AS eigen, COALESCE(ingredient_tokens, '{}') AS ingredienten"
+
+
+def _candidate_query(where, condition):
+    return f"SELECT {_CANDIDATE_COLUMNS} FROM recepten WHERE {' AND '.join(where + [condition])}"
+
+
+def fetch_candidates(cur, where, params, rng, limit=CANDIDATES):
+    """Fase 1: eigen recepten plus een steekproef van willekeurige ids"""
+    cur.execute(_candidate_query(where, "bron = 'eigen'") + ' LIMIT %s', params + [limit])
+    candidates = cur.fetchall()
+
+    cur.execute('SELECT MIN(id) AS lo, MAX(id) AS hi FROM recepten')
+    bounds = cur.fetchone()
+    if bounds['lo'] is None:
+        return candidates
+    query = _candidate_query(where, "bron IS DISTINCT FROM 'eigen'")
+    sample, tried = [], set()
+    for _ in range(SAMPLE_ROUNDS):
+        need = limit - len(sample)
+        if need <= 0:
+            break
+        # Ruim trekken: ids in gaten of buiten het filter vallen af; de volgorde van trekken blijft
+        ids = list(dict.fromkeys(rng.randint(bounds['lo'], bounds['hi']) for _ in range(need * 2)))
+        ids = [i for i in ids if i not in tried]
+        if not ids:
+            break
+        tried.update(ids)
+        cur.execute(query + ' AND id = ANY(%s::int[]) ORDER BY array_position(%s::int[], id) LIMIT %s',
+                    params + [ids, ids, need])
+        sample.extend(cur.fetchall())
+    if len(sample) < limit:
+        # Klein of sterk gefilterd aanbod: de rest in een seedbare willekeurige volgorde uit het filter zelf
+        cur.execute('SELECT setseed(%s)', (rng.uniform(-1, 1),))
+        cur.execute(query + ' AND NOT (id = ANY(%s::int[])) ORDER BY random() LIMIT %s',
+                    params + [[r['id'] for r in sample], limit - len(sample)])
+        sample.extend(cur.fetchall())
+    return candidates + sample
+
+
+def score_recipe(ingredienten, aanbiedingen):
+    """Som van de kortingen van aanbiedingen die een woord van een ingrediënt bevatten"""
+    s = 0
+    matches = []
+    for a in aanbiedingen:
+        name = a['product_name'].lower()
+        for ing in ingredienten:
+            if any(w in name for w in (ing or '').split()):
+                s += (a['discount_percent'] or 5)
+                matches.append((ing, a))
+                break
+    return s, matches
+
+
+def pick_recipes(candidates, aanbiedingen, dagen, rng):
+    """Beste 'dagen' kandidaten: hoogste score, dan eigen recepten, dan willekeurig (seedbaar)"""
+    candidates = list(candidates)
+    rng.shuffle(candidates)
+    scored = [(c, *score_recipe(c['ingredienten'], aanbiedingen)) for c in candidates]
+    scored.sort(key=lambda x: (-x[1], not x[0]['eigen']))
+    return [(c['id'], s, matches) for c, s, matches in scored[:dagen]]
+
+
+def fetch_recipes(cur, ids):
+    """Fase 2: volledige rijen voor de gekozen recepten, per id"""
+    if not ids:
+        return {}
+    cur.execute('SELECT * FROM recepten WHERE id = ANY(%s)', (list(ids),))
+    return {r['id']: r for r in cur.fetchall()}
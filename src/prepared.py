@@ -0,0 +1,93 @@
+"""
+Registry van server-side prepared statements voor veelgebruikte queries.
+
+Statements worden met $1, $2, ... geregistreerd en per connectie pas bij het
+eerste gebruik ge-PREPARE-d. Een nieuwe connectie (na een reconnect of een
+vervangen pool connectie) wordt automatisch opnieuw voorbereid. Kent de server
+het statement niet meer (26000, bijv. na DISCARD ALL) of past het bewaarde plan
+niet meer bij het schema (0A000 "cached plan must not change result type"), dan
+wordt het statement opnieuw voorbereid en de EXECUTE herhaald.
+
+Zo'n herhaling begint met een rollback van de lopende transactie (een savepoint
+per EXECUTE zou zich opstapelen). Prepared statements zijn daarom voor reads;
+sessie-instellingen die met setting() gezet zijn (zoals de statement_timeout)
+worden na de rollback opnieuw gezet.
+
+Met PREPARED_STATEMENTS=0 worden dezelfde queries als gewone tekst uitgevoerd
+(handig om het verschil te benchmarken).
+"""
+
+import os
+import re
+import weakref
+
+import psycopg2
+
+ENABLED = os.environ.get('PREPARED_STATEMENTS', '1') != '0'
+
+_PARAM = re.compile(r'\$(\d+)')
+
+STATEMENTS = {}
+
+# connectie -> namen van statements die op die connectie voorbereid zijn
+_prepared = weakref.WeakKeyDictionary()
+# connectie -> {instelling: waarde}, opnieuw gezet na een rollback in execute
+_settings = weakref.WeakKeyDictionary()
+
+
+def register(name, sql):
+    if not re.fullmatch(r'[a-z_][a-z0-9_]*', name):
+        raise ValueError(f'ongeldige statement naam: {name}')
+    STATEMENTS[name] = sql
+    return name
+
+
+def plain_sql(name, params):
+    """Zelfde query als gewone tekst met %s placeholders"""
+    order = []
+
+    def placeholder(m):
+        order.append(params[int(m.group(1)) - 1])
+        return '%s'
+
+    sql = _PARAM.sub(placeholder, STATEMENTS[name].replace('%', '%%'))
+    return sql, order
+
+
+def setting(cur, name, value):
+    """SET op sessieniveau die ook na een herhaling in execute blijft gelden"""
+    if not re.fullmatch(r'[a-z_]+', name):
+        raise ValueError(f'ongeldige instelling: {name}')
+    cur.execute(f'SET {name} = %s', (value,))
+    _settings.setdefault(cur.connection, {})[name] = value
+
+
+def _prepare(cur, name, done):
+    cur.execute(f'PREPARE {name} AS {STATEMENTS[name]}')
+    done.add(name)
+
+
+def execute(cur, name, params=()):
+    if not ENABLED:
+        sql, values = plain_sql(name, params)
+        return cur.execute(sql, values)
+
+    conn = cur.connection
+    done = _prepared.setdefault(conn, set())
+    call = f'EXECUTE {name} ({", ".join(["%s"] * len(params))})' if params else f'EXECUTE {name}'
+    if name not in done:
+        _prepare(cur, name, done)
+    try:
+        return cur.execute(call, params)
+    except (psycopg2.errors.InvalidSqlStatementName, psycopg2.errors.FeatureNotSupported) as e:
+        # De mislukte EXECUTE breekt de transactie af; een SET in die transactie is dan ook weg
+        conn.rollback()
+        for key, value in _settings.get(conn, {}).items():
+            cur.execute(f'SET {key} = %s', (value,))
+        if isinstance(e, psycopg2.errors.InvalidSqlStatementName):
+            done.clear()
+        else:
+            cur.execute(f'DEALLOCATE {name}')
+            done.discard(name)
+        _prepare(cur, name, done)
+        return cur.execute(call, params)
@@ -0,0 +1,212 @@
+"""
+Archief van aanbiedingen en statistieken per product over aanbiedingscycli.
+
+De promotions tabel bevat alleen actuele aanbiedingen (syncs verwijderen oude
+rijen). Na elke sync worden alle actuele aanbiedingen toegevoegd aan
+promotion_history (per maand gepartitioneerd op start_date); een aanbieding die
+een bestaande cyclus voortzet verlengt die rij in plaats van een nieuwe te
+beginnen. Daarna worden de statistieken in promo_cycle_stats bijgewerkt voor
+alleen de producten met nieuwe archiefrijen.
+
+Schema en maandpartities komen uit prepare(), in de prepare stap (eigen commit) van
+een sync; archive_and_refresh doet alleen DML in de schrijftransactie.
+"""
+
+from datetime import date, timedelta
+
+from psycopg2.extras import execute_values
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS promotion_history (
+    supermarket_code VARCHAR(20) NOT NULL,
+    product_name VARCHAR(500) NOT NULL,
+    product_id INTEGER,
+    original_price DECIMAL(10,2),
+    discount_price DECIMAL(10,2),
+    discount_percent INTEGER,
+    promo_type VARCHAR(50),
+    start_date DATE NOT NULL,
+    end_date DATE,
+    match_key TEXT GENERATED ALWAYS AS (COALESCE(product_id::text, supermarket_code || '|' || lower(product_name))) STORED,
+    archived_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    UNIQUE (supermarket_code, product_name, start_date)
+) PARTITION BY RANGE (start_date);
+
+CREATE TABLE IF NOT EXISTS promotion_history_default PARTITION OF promotion_history DEFAULT;
+CREATE INDEX IF NOT EXISTS idx_promotion_history_key ON promotion_history(match_key);
+CREATE INDEX IF NOT EXISTS idx_promotion_history_archived ON promotion_history(archived_at);
+
+CREATE TABLE IF NOT EXISTS promo_cycle_stats (
+    match_key TEXT PRIMARY KEY,
+    supermarket_code VARCHAR(20),
+    product_id INTEGER,
+    product_name VARCHAR(500) NOT NULL,
+    promo_count INTEGER NOT NULL,
+    first_seen DATE,
+    last_seen DATE,
+    avg_interval_days DECIMAL(8,1),
+    expected_next DATE,
+    avg_discount INTEGER,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+CREATE INDEX IF NOT EXISTS idx_promo_cycle_stats_name_trgm ON promo_cycle_stats USING gin(product_name gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS idx_promo_cycle_stats_product ON promo_cycle_stats(product_id);
+'''
+
+
+def ensure_schema(cur):
+    cur.execute(SCHEMA)
+
+
+# Partities vooruit, en minstens zover terug (eerder gezien bij Folderz); de rest valt in de default partitie
+PARTITION_AHEAD_DAYS = 31
+PARTITION_BACK_DAYS = 60
+
+
+def partition_name(day):
+    return f'promotion_history_y{day.year}m{day.month:02d}'
+
+
+def ensure_partitions(cur, first, last):
+    """Maandpartities voor alle maanden van first t/m last"""
+    year, month = first.year, first.month
+    while (year, month) <= (last.year, last.month):
+        start = date(year, month, 1)
+        year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+        end = date(year, month, 1)
+        cur.execute(f'''
+            CREATE TABLE IF NOT EXISTS {partition_name(start)} PARTITION OF promotion_history
+            FOR VALUES FROM ('{start.isoformat()}') TO ('{end.isoformat()}')
+        ''')
+
+
+def prepare(cur, today=None):
+    """Schema en partities voor de actuele aanbiedingen; in een eigen transactie voor het schrijven"""
+    ensure_schema(cur)
+    today = today or date.today()
+    cur.execute('SELECT MIN(start_date) FROM promotions')
+    oldest = cur.fetchone()[0]
+    first = today - timedelta(days=PARTITION_BACK_DAYS)
+    ensure_partitions(cur, min(oldest, first) if oldest else first, today + timedelta(days=PARTITION_AHEAD_DAYS))
+
+
+def match_key(code, name, product_id):
+    """Zelfde sleutel als de gegenereerde kolom promotion_history.match_key"""
+    return str(product_id) if product_id is not None else f'{code}|{name.lower()}'
+
+
+def merge_cycles(cycles, promotions, today):
+    """
+    Eén archiefrij per aanbiedingscyclus. Een sync die een aanbieding opnieuw
+    ziet met een latere start_date (Folderz en de prijsdalingen zetten die op de
+    dag van de run) verlengt de cyclus van dezelfde match_key waar hij op
+    aansluit of mee overlapt, in plaats van een nieuwe cyclus te beginnen.
+
+    cycles: archiefrijen (supermarket_code, product_name, product_id, start_date,
+    end_date) die nog kunnen aansluiten; promotions: rijen uit promotions.
+    Geeft (nieuwe archiefrijen, verlengingen als (end_date, supermarket_code,
+    product_name, start_date)).
+    """
+    open_cycles = {}
+    for code, name, product_id, start, end in cycles:
+        open_cycles.setdefault(match_key(code, name, product_id), []).append([code, name, start, end or start])
+    inserts, extended = [], {}
+    for code, name, product_id, orig, price, pct, promo_type, start, end in promotions:
+        start = start or today
+        end = end or start
+        key = match_key(code, name, product_id)
+        for cycle in open_cycles.get(key, []):
+            if cycle[2] <= end + timedelta(days=1) and cycle[3] >= start - timedelta(days=1):
+                if end > cycle[3]:
+                    cycle[3] = end
+                    extended[(cycle[0], cycle[1], cycle[2])] = end
+                break
+        else:
+            inserts.append((code, name, product_id, orig, price, pct, promo_type, start, end))
+            open_cycles.setdefault(key, []).append([code, name, start, end])
+    return inserts, [(end, code, name, start) for (code, name, start), end in extended.items()]
+
+
+def archive_promotions(cur):
+    """Voeg actuele aanbiedingen toe aan het archief; geeft het aantal nieuwe cycli terug"""
+    cur.execute('''
+        SELECT supermarket_code, product_name, product_id, original_price, discount_price, discount_percent,
+            promo_type, start_date, end_date
+        FROM promotions WHERE supermarket_code IS NOT NULL
+    ''')
+    promotions = cur.fetchall()
+    if not promotions:
+        return 0
+    today = date.today()
+    starts = [row[7] or today for row in promotions]
+    cur.execute('''
+        SELECT supermarket_code, product_name, product_id, start_date, end_date FROM promotion_history
+        WHERE COALESCE(end_date, start_date) >= %s
+    ''', (min(starts) - timedelta(days=1),))
+    inserts, extensions = merge_cycles(cur.fetchall(), promotions, today)
+    if extensions:
+        execute_values(cur, '''
+            UPDATE promotion_history h SET end_date = v.end_date
+            FROM (VALUES %s) AS v(end_date, supermarket_code, product_name, start_date)
+            WHERE h.supermarket_code = v.supermarket_code AND h.product_name = v.product_name
+              AND h.start_date = v.start_date
+        ''', extensions, template='(%s::date, %s, %s, %s::date)')
+    if inserts:
+        execute_values(cur, '''
+            INSERT INTO promotion_history (supermarket_code, product_name, product_id, original_price,
+                discount_price, discount_percent, promo_type, start_date, end_date)
+            VALUES %s ON CONFLICT DO NOTHING
+        ''', inserts)
+    return len(inserts)
+
+
+def refresh_cycle_stats(cur, since=None):
+    """Herbereken de statistieken voor producten met archiefrijen sinds 'since' (standaard: deze transactie)"""
+    cur.execute('''
+        INSERT INTO promo_cycle_stats AS s (match_key, supermarket_code, product_id, product_name, promo_count,
+            first_seen, last_seen, avg_interval_days, expected_next, avg_discount, updated_at)
+        SELECT h.match_key,
+            (array_agg(h.supermarket_code ORDER BY h.start_date DESC))[1],
+            (array_agg(h.product_id ORDER BY h.start_date DESC))[1],
+            (array_agg(h.product_name ORDER BY h.start_date DESC))[1],
+            COUNT(*), MIN(h.start_date), MAX(h.start_date),
+            CASE WHEN COUNT(*) > 1 THEN (MAX(h.start_date) - MIN(h.start_date))::numeric / (COUNT(*) - 1) END,
+            CASE WHEN COUNT(*) > 1 THEN MAX(h.start_date) + ROUND((MAX(h.start_date) - MIN(h.start_date))::numeric / (COUNT(*) - 1))::int END,
+            ROUND(AVG(h.discount_percent)),
+            NOW()
+        FROM promotion_history h
+        WHERE h.match_key IN (SELECT DISTINCT match_key FROM promotion_history WHERE archived_at >= COALESCE(%s, NOW()))
+        GROUP BY h.match_key
+        ON CONFLICT (match_key) DO UPDATE SET
+            supermarket_code = EXCLUDED.supermarket_code, product_id = EXCLUDED.product_id,
+            product_name = EXCLUDED.product_name, promo_count = EXCLUDED.promo_count,
+            first_seen = EXCLUDED.first_seen, last_seen = EXCLUDED.last_seen,
+            avg_interval_days = EXCLUDED.avg_interval_days, expected_next = EXCLUDED.expected_next,
+            avg_discount = EXCLUDED.avg_discount, updated_at = EXCLUDED.updated_at
+    ''', (since,))
+    return cur.rowcount
+
+
+def archive_and_refresh(cur):
+    """Na een sync: archiveren en statistieken bijwerken (in de transactie van de caller, na prepare)"""
+    archived = archive_promotions(cur)
+    updated = refresh_cycle_stats(cur)
+    return archived, updated
+
+
+# Wachten loont alleen als de volgende aanbieding binnen deze termijn verwacht wordt
+WAIT_HORIZON_DAYS = 14
+MIN_PROMOS = 3
+
+
+def expected_soon(stats, today, horizon=WAIT_HORIZON_DAYS):
+    """True als een product volgens zijn cyclus binnen 'horizon' dagen weer in aanbieding komt.
+
+    stats: rij uit promo_cycle_stats. Een verwachte datum die al langer dan één
+    interval voorbij is telt niet mee (de cyclus is dan waarschijnlijk gestopt).
+    """
+    if not stats or stats['promo_count'] < MIN_PROMOS or stats['expected_next'] is None:
+        return False
+    interval = float(stats['avg_interval_days'] or 0)
+    days = (stats['expected_next'] - today).days
+    return -interval <= days <= horizon
@@ -0,0 +1,54 @@
+"""
+Genormaliseerde zoektokens voor recepten.
+
+sync_recepten schrijft per recept ingredient_tokens en tag_tokens (TEXT[] met
+GIN index); zoek_recepten en plan_boodschappen filteren daarop met @> en &&
+in plaats van ILIKE over de JSONB tekst.
+"""
+
+import re
+import unicodedata
+
+STOPWORDS = {'de', 'het', 'een', 'en', 'met', 'van', 'in', 'voor', 'op', 'of', 'and', 'the', 'with'}
+
+_WORD = re.compile(r'[a-z0-9]+')
+
+
+def tokenize(text):
+    """Woorden in kleine letters zonder accenten, zonder stopwoorden en losse letters"""
+    text = unicodedata.normalize('NFKD', text or '').encode('ascii', 'ignore').decode().lower()
+    return [w for w in _WORD.findall(text) if len(w) > 1 and w not in STOPWORDS]
+
+
+def _unique(tokens):
+    return sorted(set(tokens))
+
+
+def ingredient_tokens(ingredienten):
+    """Tokens van alle ingrediëntnamen (ingredienten: lijst van {'naam': ..., 'hoeveelheid': ...})"""
+    return _unique(t for ing in ingredienten or [] for t in tokenize(ing.get('naam')))
+
+
+def tag_tokens(tags):
+    return _unique(t for tag in tags or [] for t in tokenize(tag))
+
+
+def ensure_schema(cur):
+    cur.execute('''
+        ALTER TABLE recepten
+            ADD COLUMN IF NOT EXISTS ingredient_tokens TEXT[],
+            ADD COLUMN IF NOT EXISTS tag_tokens TEXT[]
+    ''')
+    cur.execute('CREATE INDEX IF NOT EXISTS idx_recepten_ingredient_tokens ON recepten USING gin(ingredient_tokens)')
+    cur.execute('CREATE INDEX IF NOT EXISTS idx_recepten_tag_tokens ON recepten USING gin(tag_tokens)')
+    cur.execute('CREATE INDEX IF NOT EXISTS idx_recepten_naam_trgm ON recepten USING gin(naam gin_trgm_ops)')
+
+
+def backfill_tokens(cur):
+    """Vul de tokens voor bestaande recepten zonder tokens (na een upgrade)"""
+    cur.execute('SELECT id, ingredienten, tags FROM recepten WHERE ingredient_tokens IS NULL OR tag_tokens IS NULL')
+    rows = cur.fetchall()
+    for recipe_id, ingredienten, tags in rows:
+        cur.execute('UPDATE recepten SET ingredient_tokens = %s, tag_tokens = %s WHERE id = %s',
+                    (ingredient_tokens(ingredienten), tag_tokens(tags), recipe_id))
+    return len(rows)
@@ -2,17 +2,31 @@
 """NL Supermarkt MCP Server - Extended Edition met Prijshistorie, Budget, Winkels & Recepten"""
 
 import os
+import sys
+import time
 import asyncio
 import json
+import random
 from datetime import datetime, timedelta
 from math import radians, sin, cos, sqrt, atan2
 import psycopg2
-from psycopg2 import pool
-from psycopg2.extras import RealDictCursor
 from mcp.server import Server
 from mcp.server.stdio import stdio_server
 from mcp.types import Tool, TextContent
 
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import admission
+import categories
+import planner
+import recipes
+import db_pool as bounded_pool
+import prepared
+import promo_history
+import singleflight
+import tool_metrics
+import tool_profiler
+
 DB_CONFIG = {
     'host': os.environ.get('DB_HOST', '127.0.0.1'),
     'port': int(os.environ.get('DB_PORT', '5433')),
@@ -24,44 +38,118 @@ DB_CONFIG = {
 # Drogisterij codes
 DROGIST_CODES = ['kruidvat', 'etos', 'trekpleister', 'da', 'hollandbarrett', 'douglas', 'onlinedrogist']
 
-# Category mapping: zoekterm -> lijst van product keywords
-CATEGORY_MAPPING = {
-    # Drogist categorieën
-    'haarverzorging': ['shampoo', 'conditioner', 'haarverf', 'haargel', 'haarspray', 'haar'],
-    'mondverzorging': ['tandpasta', 'tandenborstel', 'tandenstokers', 'mondwater', 'floss'],
-    'lichaamsverzorging': ['deodorant', 'douchegel', 'bodylotion', 'zeep', 'scheermesjes', 'scheerschuim', 'aftershave'],
-    'huidverzorging': ['dagcreme', 'nachtcreme', 'bodylotion', 'zonnebrand', 'aftersun', 'lippenbalsem', 'creme'],
-    'make-up': ['mascara', 'eyeliner', 'oogschaduw', 'lippenstift', 'lipgloss', 'foundation', 'nagellak', 'make-up'],
-    'parfum': ['parfum', 'eau de toilette', 'geur'],
-    'gezondheid': ['vitamines', 'hoestdrank', 'neusspray', 'pleister', 'oogdruppels', 'paracetamol'],
-    'oogzorg': ['lenzen', 'contactlenzen', 'oogdruppels', 'lenzenvloeistof'],
-    'hygiene': ['maandverband', 'tampons', 'wattenschijfjes', 'tissues'],
-    # Supermarkt categorieën
-    'vlees': ['gehakt', 'kip', 'rund', 'varken', 'biefstuk', 'worst', 'ham', 'schnitzel', 'spek', 'bacon'],
-    'vis': ['zalm', 'kabeljauw', 'tonijn', 'garnalen', 'vis', 'haring', 'makreel'],
-    'zuivel': ['melk', 'kaas', 'yoghurt', 'boter', 'kwark', 'vla', 'eieren', 'slagroom'],
-    'groenten': ['tomaat', 'komkommer', 'sla', 'paprika', 'ui', 'wortel', 'broccoli', 'aardappel'],
-    'fruit': ['appel', 'peer', 'banaan', 'sinaasappel', 'aardbei', 'druiven', 'mango'],
-    'dranken': ['cola', 'fanta', 'sap', 'water', 'bier', 'wijn', 'koffie', 'thee'],
-}
+# Pool grootte en wachttijd (seconden) voordat een call 'server druk' krijgt
+POOL_MIN = int(os.environ.get('DB_POOL_MIN', '1'))
+POOL_MAX = int(os.environ.get('DB_POOL_MAX', '10'))
+POOL_TIMEOUT = float(os.environ.get('DB_POOL_TIMEOUT', '5'))
+POOL_WARMUP = os.environ.get('DB_POOL_WARMUP', '0') == '1'
+# Connecties die zware tools nooit mogen gebruiken (gereserveerd voor lichte tools)
+POOL_RESERVED = int(os.environ.get('DB_POOL_RESERVED', '3'))
 
 db_pool = None
 
 def init_pool():
     global db_pool
     if db_pool is None:
-        db_pool = pool.ThreadedConnectionPool(1, 10, **DB_CONFIG)
+        db_pool = bounded_pool.BoundedPool(POOL_MIN, POOL_MAX, timeout=POOL_TIMEOUT, **DB_CONFIG)
+        tool_metrics.register_pool_stats(db_pool.stats)
     return db_pool
 
+def warmup_pool():
+    """Open bij het starten alvast DB_POOL_MIN connecties (DB_POOL_WARMUP=1)"""
+    if POOL_WARMUP:
+        try:
+            init_pool().warmup()
+        except psycopg2.Error as e:
+            print(f'Pool warmup mislukt: {e}', file=sys.stderr)
+
 def get_db():
     p = init_pool()
-    conn = p.getconn()
-    conn.cursor_factory = RealDictCursor
+    start = time.perf_counter()
+    try:
+        conn = p.getconn()
+    except bounded_pool.PoolTimeout:
+        tool_metrics.record_pool_exhausted()
+        raise
+    tool_metrics.record_checkout(time.perf_counter() - start, p.maxconn)
+    conn.cursor_factory = tool_metrics.InstrumentedCursor
     return conn
 
 def release_db(conn):
     if db_pool:
         db_pool.putconn(conn)
+        tool_metrics.record_release()
+
+# Sorteervolgorde per sorteer-modus (eenheidsprijs = prijs per kg, liter of stuk)
+SORT_ORDERS = {
+    'prijs': 'p.price ASC',
+    'eenheidsprijs': 'p.price_per_base_unit ASC NULLS LAST, p.price ASC',
+}
+
+# zoek_producten sorteert standaard op relevantie (ts_rank of trigram similarity)
+SEARCH_ORDERS = {
+    'relevantie': 'rank DESC, p.price ASC',
+    **SORT_ORDERS,
+}
+
+def sort_mode(arguments, orders=SORT_ORDERS, default='prijs'):
+    mode = arguments.get('sorteer', default)
+    return mode if mode in orders else default
+
+def sort_order(arguments):
+    return SORT_ORDERS[sort_mode(arguments)]
+
+# Vaste kolommen i.p.v. p.* / s.*: een kolom die een sync later toevoegt (content_hash,
+# categories, ...) verandert zo het resultaattype van een al voorbereid statement niet
+PRODUCT_COLUMNS = ', '.join(f'p.{c}' for c in ('id', 'supermarket_code', 'name', 'price', 'unit', 'link',
+                                               'unit_quantity', 'base_unit', 'price_per_base_unit'))
+SUPERMARKET_COLUMNS = 's.id, s.code, s.name, s.icon'
+
+# Prepared statements voor de meest gebruikte (read-only) queries, per sorteer-modus
+# Full-text zoeken (dutch stemming, 'tomaten' vindt ook 'tomaat'); zonder treffers
+# valt zoek_producten terug op trigram similarity (tikfouten, stopwoorden)
+for _mode, _order in SEARCH_ORDERS.items():
+    prepared.register(f'zoek_producten_{_mode}', f"SELECT {PRODUCT_COLUMNS}, s.name as supermarket_name, s.icon, ts_rank(p.search_vector, q) AS rank FROM products p JOIN supermarkets s ON p.supermarket_code = s.code, websearch_to_tsquery('dutch', $1) q WHERE p.search_vector @@ q AND p.missing_since IS NULL ORDER BY {_order} LIMIT $2")
+    prepared.register(f'zoek_producten_keten_{_mode}', f"SELECT {PRODUCT_COLUMNS}, s.name as supermarket_name, s.icon, ts_rank(p.search_vector, q) AS rank FROM products p JOIN supermarkets s ON p.supermarket_code = s.code, websearch_to_tsquery('dutch', $1) q WHERE p.search_vector @@ q AND p.supermarket_code = $2 AND p.missing_since IS NULL ORDER BY {_order} LIMIT $3")
+    prepared.register(f'zoek_producten_trgm_{_mode}', f'SELECT {PRODUCT_COLUMNS}, s.name as supermarket_name, s.icon, word_similarity($1, p.name) AS rank FROM products p JOIN supermarkets s ON p.supermarket_code = s.code WHERE $1 <% p.name AND p.missing_since IS NULL ORDER BY {_order} LIMIT $2')
+    prepared.register(f'zoek_producten_trgm_keten_{_mode}', f'SELECT {PRODUCT_COLUMNS}, s.name as supermarket_name, s.icon, word_similarity($1, p.name) AS rank FROM products p JOIN supermarkets s ON p.supermarket_code = s.code WHERE $1 <% p.name AND p.supermarket_code = $2 AND p.missing_since IS NULL ORDER BY {_order} LIMIT $3')
+for _mode, _order in SORT_ORDERS.items():
+    prepared.register(f'vergelijk_prijzen_{_mode}', f'SELECT DISTINCT ON (p.supermarket_code) {PRODUCT_COLUMNS}, s.name as supermarket_name, s.icon FROM products p JOIN supermarkets s ON p.supermarket_code = s.code WHERE p.name ILIKE $1 AND p.missing_since IS NULL ORDER BY p.supermarket_code, {_order}')
+    prepared.register(f'goedkoopste_product_{_mode}', f'SELECT {PRODUCT_COLUMNS}, s.name as sn, s.icon FROM products p JOIN supermarkets s ON p.supermarket_code = s.code WHERE p.name ILIKE $1 AND p.missing_since IS NULL ORDER BY {_order} LIMIT 1')
+    prepared.register(f'goedkoopste_product_ketens_{_mode}', f'SELECT {PRODUCT_COLUMNS}, s.name as sn, s.icon FROM products p JOIN supermarkets s ON p.supermarket_code = s.code WHERE p.name ILIKE $1 AND p.supermarket_code = ANY($2) AND p.missing_since IS NULL ORDER BY {_order} LIMIT 1')
+# Canoniek product dat het best bij de zoekopdracht past (meeste ketens bij gelijke relevantie)
+prepared.register('canoniek_product', "SELECT c.id, c.name, c.product_count FROM products p JOIN canonical_products c ON c.id = p.canonical_id, websearch_to_tsquery('dutch', $1) q WHERE p.search_vector @@ q AND p.missing_since IS NULL ORDER BY ts_rank(p.search_vector, q) DESC, c.product_count DESC LIMIT 1")
+prepared.register('canoniek_prijzen', f'SELECT {PRODUCT_COLUMNS}, s.name as supermarket_name, s.icon FROM products p JOIN supermarkets s ON p.supermarket_code = s.code WHERE p.canonical_id = $1 AND p.missing_since IS NULL')
+prepared.register('goedkoopste_prijs', 'SELECT name, price, supermarket_code FROM products WHERE name ILIKE $1 AND missing_since IS NULL ORDER BY price LIMIT 1')
+prepared.register('goedkoopste_prijs_ketens', 'SELECT name, price, supermarket_code FROM products WHERE name ILIKE $1 AND supermarket_code = ANY($2) AND missing_since IS NULL ORDER BY price LIMIT 1')
+# Tellers uit store_stats (bijgewerkt door de syncs), geen COUNT over products/promotions
+prepared.register('lijst_supermarkten', f'SELECT {SUPERMARKET_COLUMNS}, COALESCE(st.product_count, 0) as cnt FROM supermarkets s LEFT JOIN store_stats st ON st.supermarket_code = s.code ORDER BY s.name')
+prepared.register('lijst_drogisten', f'SELECT {SUPERMARKET_COLUMNS}, COALESCE(st.promo_count, 0) as promo_count, st.avg_discount, st.last_promo_sync FROM supermarkets s LEFT JOIN store_stats st ON st.supermarket_code = s.code WHERE s.code = ANY($1) ORDER BY s.name')
+prepared.register('prijshistorie_producten', 'SELECT p.id, p.name, p.price, p.supermarket_code, s.name as sm_name FROM products p JOIN supermarkets s ON p.supermarket_code = s.code WHERE p.name ILIKE $1 AND p.missing_since IS NULL ORDER BY p.price ASC LIMIT 5')
+prepared.register('prijshistorie_verloop', "SELECT price, recorded_at FROM price_history WHERE product_id = $1 AND recorded_at > NOW() - make_interval(days => $2) ORDER BY recorded_at DESC")
+# Aanbiedingen via promotions.product_id (gekoppeld bij de sync); de ILIKE varianten
+# zijn de terugval voor aanbiedingen zonder gekoppeld product
+prepared.register('aanbieding_product', 'SELECT discount_price, discount_percent, promo_type FROM promotions WHERE product_id = $1 AND (end_date IS NULL OR end_date >= CURRENT_DATE) ORDER BY discount_percent DESC NULLS LAST LIMIT 1')
+for _name, _order in (('beste_aanbieding', 'discount_percent DESC NULLS LAST'), ('goedkoopste_aanbieding', 'discount_price')):
+    prepared.register(_name, f"SELECT pr.product_name, pr.discount_price, pr.discount_percent, pr.promo_type, pr.supermarket_code, pr.end_date FROM promotions pr JOIN products p ON p.id = pr.product_id, websearch_to_tsquery('dutch', $1) q WHERE p.search_vector @@ q AND (pr.end_date IS NULL OR pr.end_date >= CURRENT_DATE) ORDER BY pr.{_order} LIMIT 1")
+    prepared.register(f'{_name}_naam', f'SELECT product_name, discount_price, discount_percent, promo_type, supermarket_code, end_date FROM promotions WHERE product_name ILIKE $1 AND (end_date IS NULL OR end_date >= CURRENT_DATE) ORDER BY {_order} LIMIT 1')
+# Aanbiedingscyclus uit promo_cycle_stats (bijgewerkt na elke sync, trigram index op de naam)
+prepared.register('promo_cyclus', 'SELECT product_name, supermarket_code, promo_count, avg_interval_days, expected_next, avg_discount FROM promo_cycle_stats WHERE product_name ILIKE $1 ORDER BY promo_count DESC, last_seen DESC LIMIT 1')
+
+def format_unit_price(r):
+    """Toon eenheidsprijs als 'EUR 2.49/kg', of lege string als onbekend"""
+    if r.get('price_per_base_unit') is None:
+        return ''
+    return f' [EUR {float(r["price_per_base_unit"]):.2f}/{r["base_unit"]}]'
+
+def find_promotion(cur, statement, query):
+    """Actieve aanbieding voor een zoekterm: eerst via gekoppelde producten, anders op naam"""
+    prepared.execute(cur, statement, (query,))
+    promo = cur.fetchone()
+    if promo is None:
+        prepared.execute(cur, f'{statement}_naam', (f'%{query}%',))
+        promo = cur.fetchone()
+    return promo
 
 def haversine(lat1, lon1, lat2, lon2):
     """Bereken afstand tussen twee punten in km"""
@@ -81,14 +169,19 @@ async def list_tools():
         # Bestaande tools
         Tool(name='zoek_producten', description='Zoek producten op naam bij supermarkten en drogisten.',
              inputSchema={'type': 'object', 'properties': {
-                 'query': {'type': 'string'}, 'supermarkt': {'type': 'string'}, 'limit': {'type': 'integer', 'default': 10}
+                 'query': {'type': 'string', 'description': 'Zoekwoorden, bijv. "halfvolle melk", "kaas -geraspt" of "\"rode paprika\""'}, 'supermarkt': {'type': 'string'}, 'limit': {'type': 'integer', 'default': 10},
+                 'sorteer': {'type': 'string', 'enum': ['relevantie', 'prijs', 'eenheidsprijs'], 'default': 'relevantie', 'description': 'Sorteer op relevantie, prijs of kilo/liter/stukprijs'}
              }, 'required': ['query']}),
         Tool(name='vergelijk_prijzen', description='Vergelijk prijzen bij supermarkten en drogisterijen.',
-             inputSchema={'type': 'object', 'properties': {'product': {'type': 'string'}}, 'required': ['product']}),
+             inputSchema={'type': 'object', 'properties': {
+                 'product': {'type': 'string'},
+                 'sorteer': {'type': 'string', 'enum': ['prijs', 'eenheidsprijs'], 'default': 'prijs', 'description': 'Sorteer op prijs of op kilo/liter/stukprijs'}
+             }, 'required': ['product']}),
         Tool(name='optimaliseer_boodschappenlijst', description='Optimaliseer boodschappenlijst voor supermarkten en drogisten.',
              inputSchema={'type': 'object', 'properties': {
                  'producten': {'type': 'array', 'items': {'type': 'string'}},
-                 'supermarkten': {'type': 'array', 'items': {'type': 'string'}}
+                 'supermarkten': {'type': 'array', 'items': {'type': 'string'}},
+                 'sorteer': {'type': 'string', 'enum': ['prijs', 'eenheidsprijs'], 'default': 'prijs', 'description': 'Sorteer op prijs of op kilo/liter/stukprijs'}
              }, 'required': ['producten']}),
         Tool(name='lijst_supermarkten', description='Toon alle supermarkten en drogisterijen (Kruidvat, Etos, Trekpleister, etc).',
              inputSchema={'type': 'object', 'properties': {}}),
@@ -98,7 +191,8 @@ async def list_tools():
              inputSchema={'type': 'object', 'properties': {
                  'supermarkt': {'type': 'string', 'description': 'Code: ah, jumbo, lidl, kruidvat, etos, trekpleister, hollandbarrett, douglas'},
                  'categorie': {'type': 'string', 'description': 'Categorie: haarverzorging, mondverzorging, lichaamsverzorging, huidverzorging, make-up, parfum, gezondheid, oogzorg'},
-                 'limit': {'type': 'integer', 'default': 15}
+                 'limit': {'type': 'integer', 'default': 15},
+                 'pagina': {'type': 'integer', 'default': 1, 'description': 'Paginanummer (per limit aanbiedingen)'}
              }}),
         Tool(name='zoek_recepten', description='Zoek recepten met filters voor dieet.',
              inputSchema={'type': 'object', 'properties': {
@@ -117,7 +211,8 @@ async def list_tools():
                  'voorkeuren': {'type': 'array', 'items': {'type': 'string'}},
                  'dieet': {'type': 'string', 'description': 'vegetarisch, vegan, glutenvrij'},
                  'budget': {'type': 'number', 'description': 'Max budget in EUR'},
-                 'basics': {'type': 'boolean', 'default': True}
+                 'basics': {'type': 'boolean', 'default': True},
+                 'seed': {'type': 'integer', 'description': 'Zelfde seed geeft hetzelfde weekmenu'}
              }, 'required': ['supermarkten']}),
         
         # === NIEUWE TOOLS ===
@@ -198,12 +293,41 @@ async def list_tools():
              }, 'required': ['producten']}),
     ]
 
+# Tools die schrijven worden nooit samengevoegd
+WRITE_TOOLS = {'prijs_alert', 'bewaar_boodschappenlijst', 'set_budget'}
+SINGLEFLIGHT = os.environ.get('SINGLEFLIGHT', '1') != '0'
+
+inflight = singleflight.SingleFlight()
+admission_control = admission.Admission(POOL_MAX - POOL_RESERVED)
+
 @server.call_tool()
 async def call_tool(name: str, arguments: dict):
+    if not SINGLEFLIGHT or name in WRITE_TOOLS:
+        return await run_tool(name, arguments)
+    # Identieke gelijktijdige calls delen één uitvoering
+    result, shared = await inflight.do(singleflight.call_key(name, arguments), lambda: run_tool(name, arguments))
+    if shared:
+        tool_metrics.record_coalesced(name)
+    return result
+
+async def run_tool(name: str, arguments: dict):
+    with tool_metrics.track_tool(name):
+        try:
+            async with admission_control.slot(name):
+                # In een worker thread, zodat trage queries de event loop niet blokkeren
+                return await asyncio.to_thread(tool_profiler.run, name, arguments, handle_tool)
+        except admission.Rejected:
+            tool_metrics.mark_error()
+            tool_metrics.record_rejected(name)
+            return [TextContent(type='text', text=f'Fout: er lopen al te veel zware aanvragen ({name}). Probeer het over een paar seconden opnieuw.')]
+
+def handle_tool(name: str, arguments: dict):
     conn = None
     try:
         conn = get_db()
         cur = conn.cursor()
+        # Op sessieniveau (geen SET LOCAL): blijft gelden na een commit in de handler en na een herhaling in prepared.execute
+        prepared.setting(cur, 'statement_timeout', admission.statement_timeout_ms(name))
 
         # === BESTAANDE TOOLS ===
         
@@ -211,48 +335,62 @@ async def call_tool(name: str, arguments: dict):
             query = arguments.get('query', '')
             supermarkt = arguments.get('supermarkt')
             limit = arguments.get('limit', 10)
-            if supermarkt:
-                cur.execute('SELECT p.*, s.name as supermarket_name, s.icon FROM products p JOIN supermarkets s ON p.supermarket_code = s.code WHERE p.name ILIKE %s AND p.supermarket_code = %s ORDER BY p.price ASC LIMIT %s', (f'%{query}%', supermarkt, limit))
-            else:
-                cur.execute('SELECT p.*, s.name as supermarket_name, s.icon FROM products p JOIN supermarkets s ON p.supermarket_code = s.code WHERE p.name ILIKE %s ORDER BY p.price ASC LIMIT %s', (f'%{query}%', limit))
+            mode = sort_mode(arguments, SEARCH_ORDERS, 'relevantie')
+            keten = '_keten' if supermarkt else ''
+            params = (query, supermarkt, limit) if supermarkt else (query, limit)
+            prepared.execute(cur, f'zoek_producten{keten}_{mode}', params)
             results = cur.fetchall()
+            if not results:
+                prepared.execute(cur, f'zoek_producten_trgm{keten}_{mode}', params)
+                results = cur.fetchall()
             if not results:
                 return [TextContent(type='text', text=f'Geen producten gevonden voor "{query}"')]
             lines = [f'Zoekresultaten voor "{query}" ({len(results)} gevonden)\n']
             for r in results:
-                lines.append(f'- {r["icon"]} {r["supermarket_name"]}: {r["name"]} - EUR {float(r["price"]):.2f} ({r["unit"]})')
+                lines.append(f'- {r["icon"]} {r["supermarket_name"]}: {r["name"]} - EUR {float(r["price"]):.2f} ({r["unit"]}){format_unit_price(r)}')
             return [TextContent(type='text', text='\n'.join(lines))]
 
         elif name == 'vergelijk_prijzen':
             query = arguments.get('product', '')
-            cur.execute('SELECT DISTINCT ON (p.supermarket_code) p.*, s.name as supermarket_name, s.icon FROM products p JOIN supermarkets s ON p.supermarket_code = s.code WHERE p.name ILIKE %s ORDER BY p.supermarket_code, p.price ASC', (f'%{query}%',))
+            per_eenheid = arguments.get('sorteer') == 'eenheidsprijs'
+            # Eerst via het canonieke product: hetzelfde product bij elke keten
+            prepared.execute(cur, 'canoniek_product', (query,))
+            canoniek = cur.fetchone()
+            if canoniek:
+                prepared.execute(cur, 'canoniek_prijzen', (canoniek['id'],))
+            else:
+                prepared.execute(cur, f'vergelijk_prijzen_{sort_mode(arguments)}', (f'%{query}%',))
             results = cur.fetchall()
             if not results:
                 return [TextContent(type='text', text=f'Product "{query}" niet gevonden')]
-            results = sorted(results, key=lambda x: float(x['price']))
-            lines = [f'Prijsvergelijking: "{query}"\n']
+            if per_eenheid:
+                results = sorted(results, key=lambda x: (x['price_per_base_unit'] is None, float(x['price_per_base_unit'] or 0), float(x['price'])))
+            else:
+                results = sorted(results, key=lambda x: float(x['price']))
+            lines = [f'Prijsvergelijking: "{canoniek["name"] if canoniek else query}"\n']
             for r in results:
                 marker = ' GOEDKOOPST' if r == results[0] else ''
-                lines.append(f'- {r["icon"]} {r["supermarket_name"]}: EUR {float(r["price"]):.2f}{marker}')
+                lines.append(f'- {r["icon"]} {r["supermarket_name"]}: EUR {float(r["price"]):.2f}{format_unit_price(r)}{marker}')
             return [TextContent(type='text', text='\n'.join(lines))]
 
         elif name == 'optimaliseer_boodschappenlijst':
             producten = arguments.get('producten', [])
             supermarkten = arguments.get('supermarkten')
+            mode = sort_mode(arguments)
             plan = {}
             total = 0.0
             not_found = []
             for product in producten:
                 if supermarkten:
-                    cur.execute('SELECT p.*, s.name as sn, s.icon FROM products p JOIN supermarkets s ON p.supermarket_code = s.code WHERE p.name ILIKE %s AND p.supermarket_code = ANY(%s) ORDER BY p.price LIMIT 1', (f'%{product}%', supermarkten))
+                    prepared.execute(cur, f'goedkoopste_product_ketens_{mode}', (f'%{product}%', supermarkten))
                 else:
-                    cur.execute('SELECT p.*, s.name as sn, s.icon FROM products p JOIN supermarkets s ON p.supermarket_code = s.code WHERE p.name ILIKE %s ORDER BY p.price LIMIT 1', (f'%{product}%',))
+                    prepared.execute(cur, f'goedkoopste_product_{mode}', (f'%{product}%',))
                 r = cur.fetchone()
                 if r:
                     sm = r['supermarket_code']
                     if sm not in plan:
                         plan[sm] = {'name': r['sn'], 'icon': r['icon'], 'items': [], 'sub': 0.0}
-                    plan[sm]['items'].append({'name': r['name'], 'price': float(r['price'])})
+                    plan[sm]['items'].append({'name': r['name'], 'price': float(r['price']), 'unit_price': format_unit_price(r)})
                     plan[sm]['sub'] += float(r['price'])
                     total += float(r['price'])
                 else:
@@ -261,13 +399,13 @@ async def call_tool(name: str, arguments: dict):
             for sm, p in plan.items():
                 lines.append(f'\n{p["icon"]} {p["name"]} (EUR {p["sub"]:.2f}):')
                 for i in p['items']:
-                    lines.append(f'  [] {i["name"]} - EUR {i["price"]:.2f}')
+                    lines.append(f'  [] {i["name"]} - EUR {i["price"]:.2f}{i["unit_price"]}')
             if not_found:
                 lines.append(f'\nNiet gevonden: {", ".join(not_found)}')
             return [TextContent(type='text', text='\n'.join(lines))]
 
         elif name == 'lijst_supermarkten':
-            cur.execute('SELECT s.*, COUNT(p.id) as cnt FROM supermarkets s LEFT JOIN products p ON s.code = p.supermarket_code GROUP BY s.id ORDER BY s.name')
+            prepared.execute(cur, 'lijst_supermarkten')
             supermarkten = []
             drogisten = []
             for r in cur.fetchall():
@@ -285,13 +423,7 @@ async def call_tool(name: str, arguments: dict):
 
         elif name == 'lijst_drogisten':
             # Haal drogist info uit supermarkets tabel
-            cur.execute('''
-                SELECT s.*, COUNT(pr.id) as promo_count
-                FROM supermarkets s
-                LEFT JOIN promotions pr ON s.code = pr.supermarket_code AND (pr.end_date IS NULL OR pr.end_date >= CURRENT_DATE)
-                WHERE s.code = ANY(%s)
-                GROUP BY s.id ORDER BY s.name
-            ''', (DROGIST_CODES,))
+            prepared.execute(cur, 'lijst_drogisten', (DROGIST_CODES,))
             results = cur.fetchall()
 
             lines = ['DROGISTERIJEN MET AANBIEDINGEN:\n']
@@ -299,7 +431,10 @@ async def call_tool(name: str, arguments: dict):
 
             for r in results:
                 lines.append(f'\n{r["icon"]} {r["name"]} ({r["code"]})')
-                lines.append(f'   Aanbiedingen: {r["promo_count"]}')
+                korting = f' (gemiddeld -{r["avg_discount"]}%)' if r['avg_discount'] else ''
+                lines.append(f'   Aanbiedingen: {r["promo_count"]}{korting}')
+                if r['last_promo_sync']:
+                    lines.append(f'   Bijgewerkt: {r["last_promo_sync"].strftime("%d-%m %H:%M")}')
 
             # Toon top categorieën
             lines.append('\n\nBESCHIKBARE CATEGORIEËN:')
@@ -319,32 +454,33 @@ async def call_tool(name: str, arguments: dict):
             supermarkt = arguments.get('supermarkt')
             categorie = arguments.get('categorie', '')
             limit = arguments.get('limit', 15)
+            pagina = max(1, arguments.get('pagina', 1))
             params, where = [], ["(end_date IS NULL OR end_date >= CURRENT_DATE)"]
             if supermarkt:
                 where.append("supermarket_code = %s")
                 params.append(supermarkt)
             if categorie:
-                # Check of categorie een mapping heeft
                 cat_lower = categorie.lower()
-                if cat_lower in CATEGORY_MAPPING:
-                    # Zoek op alle keywords voor deze categorie
-                    keywords = CATEGORY_MAPPING[cat_lower]
-                    keyword_clauses = " OR ".join(["product_name ILIKE %s" for _ in keywords])
-                    where.append(f"({keyword_clauses})")
-                    params.extend([f'%{kw}%' for kw in keywords])
+                if cat_lower in categories.CATEGORY_MAPPING:
+                    # Categorieën zijn bij de sync toegekend (GIN index op categories)
+                    where.append("categories @> ARRAY[%s]")
+                    params.append(cat_lower)
                 else:
                     # Zoek letterlijk op de categorie
                     where.append("product_name ILIKE %s")
                     params.append(f'%{categorie}%')
-            params.append(limit)
-            cur.execute(f'SELECT * FROM promotions WHERE {" AND ".join(where)} ORDER BY discount_percent DESC NULLS LAST LIMIT %s', params)
+            # Eén rij extra om te weten of er een volgende pagina is
+            params.extend([limit + 1, (pagina - 1) * limit])
+            cur.execute(f'SELECT * FROM promotions WHERE {" AND ".join(where)} ORDER BY discount_percent DESC NULLS LAST, id LIMIT %s OFFSET %s', params)
             results = cur.fetchall()
             if results:
-                lines = ['Aanbiedingen:\n']
-                for r in results:
+                lines = [f'Aanbiedingen (pagina {pagina}):\n' if pagina > 1 else 'Aanbiedingen:\n']
+                for r in results[:limit]:
                     pct = f' (-{r["discount_percent"]}%)' if r['discount_percent'] else ''
                     promo = f' [{r["promo_type"]}]' if r['promo_type'] else ''
                     lines.append(f'- {r["supermarket_code"].upper()}: {r["product_name"]} EUR {float(r["discount_price"]):.2f}{pct}{promo}')
+                if len(results) > limit:
+                    lines.append(f'\nMeer aanbiedingen: gebruik pagina {pagina + 1}')
                 return [TextContent(type='text', text='\n'.join(lines))]
             return [TextContent(type='text', text='Geen aanbiedingen')]
 
@@ -357,14 +493,20 @@ async def call_tool(name: str, arguments: dict):
             
             params, where = [], []
             if query:
-                where.append("(naam ILIKE %s OR ingredienten::text ILIKE %s OR tags::text ILIKE %s)")
-                params.extend([f'%{query}%'] * 3)
+                # Naam via trigram index, ingrediënten en tags via de token arrays (GIN)
+                tokens = recipes.tokenize(query)
+                if tokens:
+                    where.append("(naam ILIKE %s OR ingredient_tokens @> %s OR tag_tokens @> %s)")
+                    params.extend([f'%{query}%', tokens, tokens])
+                else:
+                    where.append("naam ILIKE %s")
+                    params.append(f'%{query}%')
             if categorie:
                 where.append("categorie = %s")
                 params.append(categorie)
             if dieet:
-                where.append("tags::text ILIKE %s")
-                params.append(f'%{dieet}%')
+                where.append("tag_tokens @> %s")
+                params.append(recipes.tokenize(dieet))
             if max_tijd:
                 where.append("bereidingstijd <= %s")
                 params.append(max_tijd)
@@ -391,14 +533,15 @@ async def call_tool(name: str, arguments: dict):
             dieet = arguments.get('dieet')
             budget = arguments.get('budget')
             basics = arguments.get('basics', True)
+            rng = random.Random(arguments.get('seed'))
 
             sm_ph = ','.join(['%s'] * len(supermarkten))
             cur.execute(f'''
                 SELECT supermarket_code, product_name, discount_price, discount_percent, promo_type
                 FROM promotions WHERE supermarket_code IN ({sm_ph})
                 AND (end_date IS NULL OR end_date >= CURRENT_DATE)
-                ORDER BY discount_percent DESC NULLS LAST
-            ''', supermarkten)
+                ORDER BY discount_percent DESC NULLS LAST LIMIT %s
+            ''', [*supermarkten, planner.MAX_PROMOTIONS])
             aanbiedingen = cur.fetchall()
 
             # Query recepten met dieet filter
@@ -409,27 +552,14 @@ async def call_tool(name: str, arguments: dict):
                 query_parts.append(f'({voorkeur_clause})')
                 params.extend(voorkeuren)
             if dieet:
-                query_parts.append("tags::text ILIKE %s")
-                params.append(f'%{dieet}%')
-            
-            where_clause = f"WHERE {' AND '.join(query_parts)}" if query_parts else ""
-            cur.execute(f'SELECT * FROM recepten {where_clause} ORDER BY CASE WHEN bron = \'eigen\' THEN 0 ELSE 1 END, RANDOM()', params)
-            recepten = cur.fetchall()
-
-            def score(recept):
-                s = 0
-                matches = []
-                for a in aanbiedingen:
-                    for ing in recept['ingredienten']:
-                        if any(w in a['product_name'].lower() for w in ing['naam'].lower().split()):
-                            s += (a['discount_percent'] or 5)
-                            matches.append((ing['naam'], a))
-                            break
-                return s, matches
-
-            scored = [(r, *score(r)) for r in recepten]
-            scored.sort(key=lambda x: x[1], reverse=True)
-            gekozen = scored[:dagen]
+                query_parts.append("tag_tokens @> %s")
+                params.append(recipes.tokenize(dieet))
+            
+            # Fase 1: lichte kandidaten scoren, fase 2: alleen de gekozen recepten volledig ophalen
+            candidates = planner.fetch_candidates(cur, query_parts, params, rng)
+            picked = planner.pick_recipes(candidates, aanbiedingen, dagen, rng)
+            recepten = planner.fetch_recipes(cur, [recipe_id for recipe_id, _, _ in picked])
+            gekozen = [(recepten[i], s, matches) for i, s, matches in picked if i in recepten]
 
             boodschappen = {}
             output = []
@@ -446,8 +576,7 @@ async def call_tool(name: str, arguments: dict):
                 output.append('\nINGREDIENTEN:')
                 for ing in recept['ingredienten']:
                     output.append(f'  - {ing["hoeveelheid"]} {ing["naam"]}')
-                    cur.execute('SELECT name, price, supermarket_code FROM products WHERE name ILIKE %s AND supermarket_code = ANY(%s) ORDER BY price LIMIT 1', 
-                                (f'%{ing["naam"]}%', supermarkten))
+                    prepared.execute(cur, 'goedkoopste_prijs_ketens', (f'%{ing["naam"]}%', supermarkten))
                     prod = cur.fetchone()
                     if prod and prod['name'] not in boodschappen:
                         boodschappen[prod['name']] = (float(prod['price']), prod['supermarket_code'], None, False)
@@ -472,8 +601,7 @@ async def call_tool(name: str, arguments: dict):
                 output.append('BASISPRODUCTEN')
                 output.append('=' * 60)
                 for item in ['halfvolle melk', 'wit brood', 'eieren', 'roomboter', 'goudse kaas']:
-                    cur.execute('SELECT name, price, supermarket_code FROM products WHERE name ILIKE %s AND supermarket_code = ANY(%s) ORDER BY price LIMIT 1', 
-                                (f'%{item}%', supermarkten))
+                    prepared.execute(cur, 'goedkoopste_prijs_ketens', (f'%{item}%', supermarkten))
                     r = cur.fetchone()
                     if r:
                         output.append(f'  - {r["name"]} EUR {float(r["price"]):.2f} ({r["supermarket_code"].upper()})')
@@ -523,14 +651,7 @@ async def call_tool(name: str, arguments: dict):
             dagen = arguments.get('dagen', 30)
             
             # Zoek product
-            cur.execute('''
-                SELECT p.id, p.name, p.price, p.supermarket_code, s.name as sm_name
-                FROM products p
-                JOIN supermarkets s ON p.supermarket_code = s.code
-                WHERE p.name ILIKE %s
-                ORDER BY p.price ASC
-                LIMIT 5
-            ''', (f'%{product}%',))
+            prepared.execute(cur, 'prijshistorie_producten', (f'%{product}%',))
             products = cur.fetchall()
             
             if not products:
@@ -541,13 +662,7 @@ async def call_tool(name: str, arguments: dict):
             
             for p in products:
                 # Haal prijshistorie op
-                cur.execute('''
-                    SELECT price, recorded_at 
-                    FROM price_history 
-                    WHERE product_id = %s 
-                    AND recorded_at > NOW() - INTERVAL '%s days'
-                    ORDER BY recorded_at DESC
-                ''', (p['id'], dagen))
+                prepared.execute(cur, 'prijshistorie_verloop', (p['id'], dagen))
                 history = cur.fetchall()
                 
                 huidige_prijs = float(p['price'])
@@ -560,14 +675,7 @@ async def call_tool(name: str, arguments: dict):
                     hoogste_prijs = max(prijzen + [huidige_prijs])
                 
                 # Check aanbiedingen
-                cur.execute('''
-                    SELECT discount_price, discount_percent, promo_type
-                    FROM promotions
-                    WHERE product_name ILIKE %s
-                    AND (end_date IS NULL OR end_date >= CURRENT_DATE)
-                    ORDER BY discount_percent DESC NULLS LAST
-                    LIMIT 1
-                ''', (f'%{p["name"]}%',))
+                prepared.execute(cur, 'aanbieding_product', (p['id'],))
                 promo = cur.fetchone()
                 
                 lines.append(f'\n{p["sm_name"]}: {p["name"]}')
@@ -629,7 +737,7 @@ async def call_tool(name: str, arguments: dict):
                 # Check huidige prijs
                 cur.execute('''
                     SELECT name, price, supermarket_code FROM products
-                    WHERE name ILIKE %s ORDER BY price LIMIT 1
+                    WHERE name ILIKE %s AND missing_since IS NULL ORDER BY price LIMIT 1
                 ''', (f'%{query}%',))
                 product = cur.fetchone()
                 
@@ -674,7 +782,7 @@ async def call_tool(name: str, arguments: dict):
             totaal = 0.0
             items = []
             for p in producten:
-                cur.execute('SELECT name, price FROM products WHERE name ILIKE %s ORDER BY price LIMIT 1', (f'%{p}%',))
+                cur.execute('SELECT name, price FROM products WHERE name ILIKE %s AND missing_since IS NULL ORDER BY price LIMIT 1', (f'%{p}%',))
                 r = cur.fetchone()
                 if r:
                     items.append({'query': p, 'name': r['name'], 'price': float(r['price'])})
@@ -719,17 +827,11 @@ async def call_tool(name: str, arguments: dict):
                 query = item.get('query', item.get('name', ''))
                 
                 # Zoek huidige prijs
-                cur.execute('SELECT name, price, supermarket_code FROM products WHERE name ILIKE %s ORDER BY price LIMIT 1', (f'%{query}%',))
+                prepared.execute(cur, 'goedkoopste_prijs', (f'%{query}%',))
                 product = cur.fetchone()
                 
                 # Zoek aanbieding
-                cur.execute('''
-                    SELECT product_name, discount_price, discount_percent, promo_type, supermarket_code
-                    FROM promotions WHERE product_name ILIKE %s
-                    AND (end_date IS NULL OR end_date >= CURRENT_DATE)
-                    ORDER BY discount_price LIMIT 1
-                ''', (f'%{query}%',))
-                promo = cur.fetchone()
+                promo = find_promotion(cur, 'goedkoopste_aanbieding', query)
                 
                 if promo:
                     prijs = float(promo['discount_price'])
@@ -779,27 +881,20 @@ async def call_tool(name: str, arguments: dict):
             
             for p in producten:
                 # Check huidige aanbiedingen
-                cur.execute('''
-                    SELECT product_name, discount_price, discount_percent, promo_type, end_date
-                    FROM promotions WHERE product_name ILIKE %s
-                    AND (end_date IS NULL OR end_date >= CURRENT_DATE)
-                    ORDER BY discount_percent DESC NULLS LAST LIMIT 1
-                ''', (f'%{p}%',))
-                promo = cur.fetchone()
+                promo = find_promotion(cur, 'beste_aanbieding', p)
                 
-                # Check of dit product regelmatig in aanbieding is
-                cur.execute('''
-                    SELECT COUNT(*) as cnt FROM promotions
-                    WHERE product_name ILIKE %s
-                ''', (f'%{p}%',))
-                promo_count = cur.fetchone()['cnt']
+                # Aanbiedingscyclus uit het archief
+                prepared.execute(cur, 'promo_cyclus', (f'%{p}%',))
+                cyclus = cur.fetchone()
                 
                 if promo:
                     pct = promo['discount_percent'] or 0
                     end = promo['end_date'].strftime('%d-%m') if promo['end_date'] else 'onbekend'
                     nu_kopen.append(f'  {p}: NU IN AANBIEDING (-{pct}%) - geldig t/m {end}')
-                elif promo_count > 2:
-                    wachten.append(f'  {p}: komt regelmatig in aanbieding - WACHT')
+                elif promo_history.expected_soon(cyclus, datetime.now().date()):
+                    korting = f', meestal -{cyclus["avg_discount"]}%' if cyclus['avg_discount'] else ''
+                    wachten.append(f'  {p}: volgende aanbieding verwacht rond {cyclus["expected_next"].strftime("%d-%m")} '
+                                   f'(gemiddeld elke {float(cyclus["avg_interval_days"]):.0f} dagen{korting}) - WACHT')
                 else:
                     nu_kopen.append(f'  {p}: geen aanbieding verwacht - gewoon kopen')
             
@@ -871,7 +966,7 @@ async def call_tool(name: str, arguments: dict):
             for p in producten:
                 cur.execute('''
                     SELECT name, price, supermarket_code 
-                    FROM products WHERE name ILIKE %s 
+                    FROM products WHERE name ILIKE %s AND missing_since IS NULL
                     ORDER BY price LIMIT 1
                 ''', (f'%{p}%',))
                 r = cur.fetchone()
@@ -935,7 +1030,7 @@ async def call_tool(name: str, arguments: dict):
             items = []
             
             for p in producten:
-                cur.execute('SELECT name, price, supermarket_code FROM products WHERE name ILIKE %s ORDER BY price LIMIT 1', (f'%{p}%',))
+                prepared.execute(cur, 'goedkoopste_prijs', (f'%{p}%',))
                 r = cur.fetchone()
                 if r:
                     items.append({'query': p, 'name': r['name'], 'price': float(r['price']), 'sm': r['supermarket_code']})
@@ -960,7 +1055,7 @@ async def call_tool(name: str, arguments: dict):
                     cur.execute('''
                         SELECT name, price, supermarket_code 
                         FROM products 
-                        WHERE name ILIKE %s AND price < %s
+                        WHERE name ILIKE %s AND price < %s AND missing_since IS NULL
                         ORDER BY price LIMIT 1
                     ''', (f'%{item["query"]}%', item['price'] * 0.8))
                     alt = cur.fetchone()
@@ -982,25 +1077,19 @@ async def call_tool(name: str, arguments: dict):
             
             for p in producten:
                 # Check aanbieding
-                cur.execute('''
-                    SELECT product_name, discount_price, discount_percent, promo_type, supermarket_code
-                    FROM promotions WHERE product_name ILIKE %s
-                    AND (end_date IS NULL OR end_date >= CURRENT_DATE)
-                    ORDER BY discount_percent DESC NULLS LAST LIMIT 1
-                ''', (f'%{p}%',))
-                promo = cur.fetchone()
+                promo = find_promotion(cur, 'beste_aanbieding', p)
                 
                 # Check goedkoopste variant
                 cur.execute('''
                     SELECT name, price, supermarket_code FROM products
-                    WHERE name ILIKE %s ORDER BY price LIMIT 1
+                    WHERE name ILIKE %s AND missing_since IS NULL ORDER BY price LIMIT 1
                 ''', (f'%{p}%',))
                 goedkoopst = cur.fetchone()
                 
                 # Check huismerk alternatief
                 cur.execute('''
                     SELECT name, price, supermarket_code FROM products
-                    WHERE name ILIKE %s 
+                    WHERE name ILIKE %s AND missing_since IS NULL
                     AND (name ILIKE '%%huismerk%%' OR name ILIKE '%%basic%%' OR name ILIKE '%%1 de beste%%')
                     ORDER BY price LIMIT 1
                 ''', (f'%{p}%',))
@@ -1038,14 +1127,23 @@ async def call_tool(name: str, arguments: dict):
 
         return [TextContent(type='text', text=f'Onbekende tool: {name}')]
 
+    except bounded_pool.PoolTimeout:
+        tool_metrics.mark_error()
+        return [TextContent(type='text', text=f'Fout: de server is op dit moment erg druk (geen databaseverbinding vrij binnen {POOL_TIMEOUT:g}s). Probeer het over een paar seconden opnieuw.')]
+    except psycopg2.errors.QueryCanceled:
+        tool_metrics.mark_error()
+        tool_metrics.record_timeout(name)
+        return [TextContent(type='text', text=f'Fout: deze vraag duurde te lang (limiet {admission.statement_timeout_ms(name) / 1000:g}s). Maak de vraag specifieker, bijv. met minder producten of een supermarkt.')]
     except Exception as e:
         import traceback
+        tool_metrics.mark_error()
         return [TextContent(type='text', text=f'Fout: {str(e)}\n{traceback.format_exc()}')]
     finally:
         if conn:
             release_db(conn)
 
 async def main():
+    warmup_pool()
     async with stdio_server() as (read_stream, write_stream):
         await server.run(read_stream, write_stream, server.create_initialization_options())
 
@@ -9,7 +9,8 @@ import logging
 # Add src to path for imports
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
-from server import server
+from server import server, warmup_pool
+import tool_metrics
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -19,7 +20,7 @@ def main():
     from mcp.server.sse import SseServerTransport
     from starlette.applications import Starlette
     from starlette.routing import Route
-    from starlette.responses import JSONResponse
+    from starlette.responses import JSONResponse, PlainTextResponse
     from starlette.requests import Request
 
     sse = SseServerTransport("/messages")
@@ -36,14 +37,19 @@ def main():
     async def health(request: Request):
         return JSONResponse({"status": "healthy"})
 
+    async def metrics(request: Request):
+        return PlainTextResponse(tool_metrics.render(), media_type="text/plain; version=0.0.4")
+
     app = Starlette(
         routes=[
             Route("/sse", endpoint=handle_sse),
             Route("/messages", endpoint=handle_messages, methods=["POST"]),
             Route("/health", endpoint=health),
+            Route("/metrics", endpoint=metrics),
         ]
     )
 
+    warmup_pool()
     port = int(os.environ.get('PORT', 8000))
     logger.info(f"Starting server on port {port}")
     uvicorn.run(app, host="0.0.0.0", port=port)
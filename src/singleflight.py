@@ -0,0 +1,42 @@
+"""
+Single-flight voor identieke gelijktijdige tool calls.
+
+Als een call met dezelfde naam en argumenten al loopt, wacht een nieuwe call op
+dat resultaat in plaats van dezelfde queries nog eens uit te voeren. Er wordt
+niets bewaard: zodra de call klaar is, start de volgende identieke call opnieuw.
+"""
+
+import asyncio
+import json
+
+
+def call_key(name, arguments):
+    return name, json.dumps(arguments or {}, sort_keys=True, separators=(',', ':'), default=str)
+
+
+class SingleFlight:
+    def __init__(self):
+        self._inflight = {}
+
+    def __len__(self):
+        return len(self._inflight)
+
+    async def do(self, key, func):
+        """Voer func() uit, of deel het resultaat van een lopende call met dezelfde key.
+
+        Geeft (resultaat, gedeeld) terug. De gedeelde uitvoering loopt in een eigen
+        task, zodat een afgebroken client de andere wachtenden niet meeneemt.
+        """
+        task = self._inflight.get(key)
+        shared = task is not None
+        if task is None:
+            task = asyncio.ensure_future(func())
+            self._inflight[key] = task
+            task.add_done_callback(lambda t: self._done(key, t))
+        return await asyncio.shield(task), shared
+
+    def _done(self, key, task):
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        if not task.cancelled():
+            task.exception()  # voorkomt 'exception was never retrieved' als niemand meer wacht
@@ -0,0 +1,54 @@
+"""
+Tellers per winkel voor lijst_supermarkten en lijst_drogisten.
+
+De syncs herberekenen store_stats aan het eind van elke run (één GROUP BY per
+tabel); de tools lezen alleen deze kleine tabel, onafhankelijk van het aantal
+producten of aanbiedingen. ensure_schema hoort in de prepare stap van een sync
+(eigen commit); refresh_store_stats doet alleen DML, zodat parallelle syncs in
+hun schrijftransactie geen ACCESS EXCLUSIVE lock op products vragen.
+"""
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS store_stats (
+    supermarket_code VARCHAR(20) PRIMARY KEY REFERENCES supermarkets(code) ON DELETE CASCADE,
+    product_count INTEGER NOT NULL DEFAULT 0,
+    promo_count INTEGER NOT NULL DEFAULT 0,
+    avg_discount INTEGER,
+    last_product_sync TIMESTAMP,
+    last_promo_sync TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+)
+'''
+
+
+def ensure_schema(cur):
+    cur.execute(SCHEMA)
+    # Alleen actieve producten tellen; de kolom komt van sync_prices, maar elke sync kan als eerste draaien
+    cur.execute('ALTER TABLE products ADD COLUMN IF NOT EXISTS missing_since TIMESTAMP')
+
+
+def refresh_store_stats(cur, products=False, promotions=False):
+    """Herbereken alle tellers; products/promotions: welke sync net gedraaid heeft (voor de synctijd)"""
+    cur.execute('''
+        INSERT INTO store_stats (supermarket_code, product_count, promo_count, avg_discount,
+            last_product_sync, last_promo_sync, updated_at)
+        SELECT s.code, COALESCE(p.cnt, 0), COALESCE(pr.cnt, 0), pr.avg_discount,
+            CASE WHEN %(products)s THEN NOW() END, CASE WHEN %(promotions)s THEN NOW() END, NOW()
+        FROM supermarkets s
+        LEFT JOIN (SELECT supermarket_code, COUNT(*) AS cnt FROM products WHERE missing_since IS NULL GROUP BY supermarket_code) p
+            ON p.supermarket_code = s.code
+        LEFT JOIN (
+            SELECT supermarket_code, COUNT(*) AS cnt, ROUND(AVG(discount_percent)) AS avg_discount
+            FROM promotions WHERE end_date IS NULL OR end_date >= CURRENT_DATE
+            GROUP BY supermarket_code
+        ) pr ON pr.supermarket_code = s.code
+        -- Vaste volgorde: syncs die tegelijk klaar zijn locken de rijen in dezelfde volgorde (geen deadlock)
+        ORDER BY s.code
+        ON CONFLICT (supermarket_code) DO UPDATE SET
+            product_count = EXCLUDED.product_count, promo_count = EXCLUDED.promo_count,
+            avg_discount = EXCLUDED.avg_discount,
+            last_product_sync = COALESCE(EXCLUDED.last_product_sync, store_stats.last_product_sync),
+            last_promo_sync = COALESCE(EXCLUDED.last_promo_sync, store_stats.last_promo_sync),
+            updated_at = EXCLUDED.updated_at
+    ''', {'products': products, 'promotions': promotions})
+    return cur.rowcount
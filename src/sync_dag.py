@@ -0,0 +1,102 @@
+"""
+Syncs als afhankelijkheidsgraaf in plaats van vaste cron tijden.
+
+Elke stage noemt de stages waarvan hij afhangt. Stages zonder openstaande
+afhankelijkheden draaien direct en parallel; een stage start zodra al zijn
+inputs geslaagd (en dus gecommit) zijn. Faalt een stage, dan worden de stages
+die ervan afhangen overgeslagen. Per stage worden start en duur bijgehouden.
+"""
+
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+OK = 'ok'
+FAILED = 'failed'
+SKIPPED = 'skipped'
+
+
+def validate(graph):
+    """graph: {stage: (afhankelijkheden, ...)}; ValueError bij onbekende stages of een cyclus"""
+    for name, deps in graph.items():
+        unknown = set(deps) - set(graph)
+        if unknown:
+            raise ValueError(f'{name} hangt af van onbekende stage(s): {", ".join(sorted(unknown))}')
+    done = set()
+    remaining = dict(graph)
+    while remaining:
+        ready = [name for name, deps in remaining.items() if set(deps) <= done]
+        if not ready:
+            raise ValueError(f'Cyclus tussen: {", ".join(sorted(remaining))}')
+        for name in ready:
+            done.add(name)
+            del remaining[name]
+
+
+def select(graph, stages=None, skip=()):
+    """Deelgraaf met alleen 'stages' (standaard alle) zonder 'skip'; afhankelijkheden buiten de selectie vervallen"""
+    for name in list(stages or []) + list(skip):
+        if name not in graph:
+            raise ValueError(f'Onbekende stage: {name}')
+    chosen = set(stages or graph) - set(skip)
+    return {name: tuple(dep for dep in deps if dep in chosen) for name, deps in graph.items() if name in chosen}
+
+
+def run_dag(graph, run, max_workers=None, clock=time.monotonic):
+    """
+    Draai run(stage) voor elke stage zodra zijn afhankelijkheden OK zijn.
+    Een exception of False als resultaat telt als mislukt.
+    Geeft {stage: {'status', 'start', 'duration', 'error'}} met tijden in seconden
+    vanaf de start van de run.
+    """
+    validate(graph)
+    t0 = clock()
+    results = {}
+    running = {}
+
+    def record(name, status, start=None, error=None):
+        end = clock() - t0
+        results[name] = {'status': status, 'start': start, 'duration': None if start is None else end - start,
+                         'error': error}
+
+    def timed(name):
+        start = clock() - t0
+        try:
+            return start, run(name) is not False, None
+        except Exception as e:
+            return start, False, str(e) or type(e).__name__
+
+    with ThreadPoolExecutor(max_workers=max_workers or max(1, len(graph))) as pool:
+        while True:
+            changed = True
+            while changed:
+                changed = False
+                for name, deps in graph.items():
+                    if name in results or name in running.values():
+                        continue
+                    if any(results.get(dep, {}).get('status') in (FAILED, SKIPPED) for dep in deps):
+                        record(name, SKIPPED, error='afhankelijkheid mislukt')
+                        changed = True
+                    elif all(results.get(dep, {}).get('status') == OK for dep in deps):
+                        running[pool.submit(timed, name)] = name
+            if not running:
+                break
+            finished, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in finished:
+                name = running.pop(future)
+                start, ok, error = future.result()
+                record(name, OK if ok else FAILED, start, error=None if ok else (error or 'mislukt'))
+    return {name: results[name] for name in graph}
+
+
+def critical_path(graph, results):
+    """Langste keten van stages (som van de duur): die bepaalt wanneer de refresh klaar is"""
+    best = {}
+
+    def length(name):
+        if name not in best:
+            own = results[name]['duration'] or 0
+            prev = max((length(dep) for dep in graph[name]), key=lambda x: x[0], default=(0, []))
+            best[name] = (prev[0] + own, prev[1] + [name])
+        return best[name]
+
+    return max((length(name) for name in graph), key=lambda x: x[0], default=(0, []))
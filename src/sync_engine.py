@@ -0,0 +1,108 @@
+"""
+Gedeelde sync engine voor alle databronnen.
+
+Een bron (Source) zet eerst het schema klaar (prepare), haalt dan alles op
+(fetch) en schrijft het daarna in één transactie weg (write). fetch schrijft
+niets naar de tabellen die write vult; wel mag hij hervatbare tussenstand
+committen (zoals de checkpoints per Folderz pagina), zodat een afgebroken run
+verder kan waar hij gebleven was. De engine geeft elke run precies één database
+connectie en, als de bron hem gebruikt, één httpx client met keep-alive, zodat
+niet per pagina of per stap opnieuw een TCP/TLS of database verbinding opgezet
+wordt.
+Elke run draait onder de advisory lock van src/sync_runs.py.
+"""
+
+import time
+
+import httpx
+import psycopg2
+
+from src import http_replay
+from src.sync_runs import run_locked
+
+USER_AGENT = 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36'
+
+
+class SyncContext:
+    """Eén database connectie en (met http=True) één HTTP client voor de duur van een run"""
+
+    def __init__(self, db_config, headers=None, timeout=30, http=True):
+        self.conn = psycopg2.connect(**db_config)
+        self.cur = self.conn.cursor()
+        self.http = httpx.Client(transport=http_replay.transport(), timeout=timeout, follow_redirects=True,
+                                 headers={'User-Agent': USER_AGENT, **(headers or {})}) if http else None
+        self.requests = 0
+        self.http_seconds = 0.0
+
+    def get(self, url, **kwargs):
+        self.requests += 1
+        start = time.perf_counter()
+        try:
+            return self.http.get(url, **kwargs)
+        finally:
+            self.http_seconds += time.perf_counter() - start
+
+    def sleep(self, seconds):
+        http_replay.sleep(seconds)
+
+    def close(self):
+        if self.http is not None:
+            self.http.close()
+        self.conn.close()
+
+
+class Source:
+    """
+    Een databron voor de engine; name is ook de naam in sync_runs, lock standaard
+    gelijk aan name. http = False voor een bron die zijn eigen client meebrengt:
+    dan opent de engine geen gedeelde client (ctx.http is None).
+    """
+
+    name = None
+    lock = None
+    headers = None
+    http = True
+
+    def prepare(self, ctx):
+        """Schema en vaste rijen; wordt direct gecommit (geen DDL locks tijdens het ophalen)"""
+
+    def fetch(self, ctx):
+        """
+        Alles ophalen; niets naar de tabellen van write schrijven. Hervatbare
+        tussenstand mag fetch zelf via ctx.conn committen.
+        """
+        raise NotImplementedError
+
+    def write(self, ctx, items):
+        """items wegschrijven via ctx.cur (de engine commit); geeft het aantal geschreven rijen"""
+        raise NotImplementedError
+
+    def summary(self, ctx):
+        """Optioneel overzicht na de commit"""
+
+
+def sync(source, db_config):
+    """Eén run van een bron op een eigen connectie en HTTP client; geeft het aantal geschreven rijen"""
+    start = time.perf_counter()
+    ctx = SyncContext(db_config, source.headers, http=source.http)
+    try:
+        source.prepare(ctx)
+        ctx.conn.commit()
+        items = source.fetch(ctx)
+        ctx.conn.commit()  # leesacties van fetch afsluiten, write krijgt een verse transactie
+        rows = source.write(ctx, items)
+        ctx.conn.commit()
+        source.summary(ctx)
+    except Exception:
+        ctx.conn.rollback()
+        raise
+    finally:
+        ctx.close()
+    print(f'{source.name}: {rows} rijen in {time.perf_counter() - start:.1f}s '
+          f'({ctx.requests} requests, {ctx.http_seconds:.1f}s HTTP)')
+    return rows
+
+
+def run(source, db_config):
+    """sync() onder de advisory lock van de bron, vastgelegd in sync_runs"""
+    return run_locked(db_config, source.name, lambda: sync(source, db_config), lock=source.lock)
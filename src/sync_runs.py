@@ -0,0 +1,133 @@
+"""
+Eén run tegelijk per sync, en een logboek van alle runs.
+
+run_locked() neemt een pg advisory lock op een eigen connectie (de sync zelf
+opent zijn connecties zoals altijd) en houdt de run bij in sync_runs: start,
+einde, geschreven rijen en uitkomst. Draait dezelfde sync al, dan bepaalt
+SYNC_LOCK_POLICY wat er gebeurt: 'skip' (standaard) slaat de run over, 'wait'
+wacht maximaal SYNC_LOCK_WAIT seconden (0 = onbeperkt) op de lopende run.
+De lock verdwijnt met de connectie, ook als het proces hard stopt.
+"""
+
+import os
+import socket
+
+import psycopg2
+
+SKIP = 'skip'
+WAIT = 'wait'
+
+POLICY = os.environ.get('SYNC_LOCK_POLICY', SKIP)
+LOCK_WAIT = float(os.environ.get('SYNC_LOCK_WAIT', '0'))
+
+# Eerste sleutel van pg_advisory_lock(int, int): houdt deze locks apart van andere gebruikers
+LOCK_NAMESPACE = 7301
+
+RUNNING = 'running'
+OK = 'ok'
+FAILED = 'failed'
+SKIPPED = 'skipped'
+ABORTED = 'aborted'
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS sync_runs (
+    id SERIAL PRIMARY KEY,
+    sync_name VARCHAR(50) NOT NULL,
+    lock_name VARCHAR(50) NOT NULL,
+    status VARCHAR(20) NOT NULL,
+    started_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    finished_at TIMESTAMP,
+    rows_written INTEGER,
+    error TEXT,
+    host VARCHAR(100),
+    pid INTEGER
+)
+'''
+
+
+def ensure_schema(cur):
+    cur.execute(SCHEMA)
+    cur.execute('CREATE INDEX IF NOT EXISTS idx_sync_runs_name ON sync_runs(sync_name, started_at DESC)')
+
+
+def acquire(cur, lock, policy=None, wait=None):
+    """True als de lock genomen is; False bij 'skip' als hij bezet is of bij 'wait' na de wachttijd"""
+    policy = policy or POLICY
+    if policy == SKIP:
+        cur.execute('SELECT pg_try_advisory_lock(%s, hashtext(%s))', (LOCK_NAMESPACE, lock))
+        return cur.fetchone()[0]
+    if policy != WAIT:
+        raise ValueError(f'Onbekende SYNC_LOCK_POLICY: {policy}')
+    wait = LOCK_WAIT if wait is None else wait
+    cur.execute('SET lock_timeout = %s', (int(wait * 1000),))
+    try:
+        cur.execute('SELECT pg_advisory_lock(%s, hashtext(%s))', (LOCK_NAMESPACE, lock))
+        return True
+    except psycopg2.errors.LockNotAvailable:
+        return False
+    finally:
+        cur.execute('RESET lock_timeout')
+
+
+def holder(cur, lock):
+    """De lopende run die de lock heeft (voor de melding bij overslaan)"""
+    cur.execute('''
+        SELECT id, sync_name, started_at, host, pid FROM sync_runs
+        WHERE lock_name = %s AND status = %s ORDER BY started_at DESC LIMIT 1
+    ''', (lock, RUNNING))
+    return cur.fetchone()
+
+
+def _start(cur, name, lock, status):
+    cur.execute('''
+        INSERT INTO sync_runs (sync_name, lock_name, status, host, pid) VALUES (%s, %s, %s, %s, %s) RETURNING id
+    ''', (name, lock, status, socket.gethostname(), os.getpid()))
+    return cur.fetchone()[0]
+
+
+def _finish(cur, run_id, status, rows=None, error=None):
+    cur.execute('''
+        UPDATE sync_runs SET status = %s, finished_at = NOW(), rows_written = %s, error = %s WHERE id = %s
+    ''', (status, rows, error, run_id))
+
+
+def run_with_lock(conn, name, fn, lock=None, policy=None, wait=None):
+    """
+    Draai fn() onder de lock 'lock' (standaard de naam van de sync) op conn
+    (autocommit). Geeft het resultaat van fn (het aantal geschreven rijen), of
+    None als de run is overgeslagen.
+    """
+    lock = lock or name
+    cur = conn.cursor()
+    ensure_schema(cur)
+    if not acquire(cur, lock, policy, wait):
+        current = holder(cur, lock)
+        since = f' (run {current[0]}, {current[1]} sinds {current[2]:%H:%M:%S})' if current else ''
+        run_id = _start(cur, name, lock, SKIPPED)
+        _finish(cur, run_id, SKIPPED, error=f'{lock} draait al{since}')
+        print(f'{name}: overgeslagen, {lock} draait al{since}')
+        return None
+
+    # Wij hebben de lock, dus 'running' rijen van deze lock zijn van gestopte processen
+    cur.execute('''
+        UPDATE sync_runs SET status = %s, finished_at = NOW(), error = 'proces gestopt zonder afronden'
+        WHERE lock_name = %s AND status = %s
+    ''', (ABORTED, lock, RUNNING))
+    run_id = _start(cur, name, lock, RUNNING)
+    try:
+        rows = fn()
+    except BaseException as e:
+        _finish(cur, run_id, FAILED, error=str(e) or type(e).__name__)
+        raise
+    _finish(cur, run_id, OK, rows=rows)
+    return rows
+
+
+def run_locked(db_config, name, fn, lock=None, policy=None, wait=None):
+    """run_with_lock op een eigen connectie; de lock vervalt bij het sluiten"""
+    conn = psycopg2.connect(**db_config)
+    conn.autocommit = True
+    try:
+        return run_with_lock(conn, name, fn, lock, policy, wait)
+    finally:
+        conn.close()
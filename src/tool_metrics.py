@@ -0,0 +1,283 @@
+"""Lichtgewicht metrics voor tool calls, SQL statements en de connection pool.
+
+Alles wordt in-process bijgehouden (een lock per afgeronde call of checkout) en
+via render() in het Prometheus tekstformaat geëxporteerd op /metrics.
+"""
+
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from psycopg2.extras import RealDictCursor
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+STATEMENT_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 250)
+WAIT_BUCKETS = (0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0)
+
+# Bescherm tegen onbeperkte label cardinaliteit bij onbekende tool namen
+MAX_TOOL_LABELS = 64
+
+
+class Histogram:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.sum += value
+        self.count += 1
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+
+    def render(self, metric, labels=''):
+        lines = []
+        cumulative = 0
+        sep = ',' if labels else ''
+        for bound, count in zip(self.buckets, self.counts):
+            cumulative += count
+            lines.append(f'{metric}_bucket{{{labels}{sep}le="{bound}"}} {cumulative}')
+        lines.append(f'{metric}_bucket{{{labels}{sep}le="+Inf"}} {self.count}')
+        suffix = f'{{{labels}}}' if labels else ''
+        lines.append(f'{metric}_sum{suffix} {self.sum:.6f}')
+        lines.append(f'{metric}_count{suffix} {self.count}')
+        return lines
+
+
+class CallStats:
+    """Tellers voor één lopende tool call"""
+    __slots__ = ('queries', 'query_seconds', 'rows', 'error', 'trace')
+
+    def __init__(self):
+        self.queries = 0
+        self.query_seconds = 0.0
+        self.rows = 0
+        self.error = False
+        # Lijst van (sql, seconden, rijen) als de profiler een query trace wil
+        self.trace = None
+
+
+class ToolStats:
+    def __init__(self):
+        self.calls = 0
+        self.errors = 0
+        self.coalesced = 0
+        self.rejected = 0
+        self.timeouts = 0
+        self.queries = 0
+        self.query_seconds = 0.0
+        self.rows = 0
+        self.latency = Histogram(LATENCY_BUCKETS)
+        self.statements = Histogram(STATEMENT_BUCKETS)
+
+
+_lock = threading.Lock()
+_tools = {}
+_current_call = ContextVar('tool_call_stats', default=None)
+
+_pool = {
+    'checkouts': 0,
+    'exhausted': 0,
+    'in_use': 0,
+    'max_size': 0,
+    'wait': Histogram(WAIT_BUCKETS),
+    'stats': None,
+}
+
+
+class InstrumentedCursor(RealDictCursor):
+    """RealDictCursor die aantal, duur en rijen van statements telt voor de lopende call"""
+
+    def execute(self, query, vars=None):
+        stats = _current_call.get()
+        if stats is None:
+            return super().execute(query, vars)
+        start = time.perf_counter()
+        try:
+            return super().execute(query, vars)
+        finally:
+            elapsed = time.perf_counter() - start
+            stats.queries += 1
+            stats.query_seconds += elapsed
+            if self.rowcount > 0:
+                stats.rows += self.rowcount
+            if stats.trace is not None:
+                stats.trace.append((query, elapsed, self.rowcount))
+
+
+def current_call():
+    return _current_call.get()
+
+
+def mark_error():
+    stats = _current_call.get()
+    if stats is not None:
+        stats.error = True
+
+
+@contextmanager
+def track_tool(name):
+    stats = CallStats()
+    token = _current_call.set(stats)
+    start = time.perf_counter()
+    try:
+        yield stats
+    except BaseException:
+        stats.error = True
+        raise
+    finally:
+        elapsed = time.perf_counter() - start
+        _current_call.reset(token)
+        _record_call(name, elapsed, stats)
+
+
+def _tool(name):
+    tool = _tools.get(name)
+    if tool is None:
+        if len(_tools) >= MAX_TOOL_LABELS:
+            name = 'other'
+        tool = _tools.setdefault(name, ToolStats())
+    return tool
+
+
+def _record_call(name, elapsed, stats):
+    with _lock:
+        tool = _tool(name)
+        tool.calls += 1
+        tool.errors += stats.error
+        tool.queries += stats.queries
+        tool.query_seconds += stats.query_seconds
+        tool.rows += stats.rows
+        tool.latency.observe(elapsed)
+        tool.statements.observe(stats.queries)
+
+
+def record_coalesced(name):
+    """Call die het resultaat van een identieke lopende call deelde"""
+    with _lock:
+        _tool(name).coalesced += 1
+
+
+def record_rejected(name):
+    """Call geweigerd door admission control"""
+    with _lock:
+        _tool(name).rejected += 1
+
+
+def record_timeout(name):
+    """Call afgebroken door statement_timeout"""
+    with _lock:
+        _tool(name).timeouts += 1
+
+
+def record_checkout(wait_seconds, max_size):
+    with _lock:
+        _pool['checkouts'] += 1
+        _pool['in_use'] += 1
+        _pool['max_size'] = max_size
+        _pool['wait'].observe(wait_seconds)
+
+
+def record_release():
+    with _lock:
+        _pool['in_use'] = max(0, _pool['in_use'] - 1)
+
+
+def register_pool_stats(stats_fn):
+    """Functie die de actuele pool toestand (size, waiting) teruggeeft"""
+    with _lock:
+        _pool['stats'] = stats_fn
+
+
+def record_pool_exhausted():
+    with _lock:
+        _pool['exhausted'] += 1
+
+
+def snapshot():
+    """Samenvatting per tool (gebruikt door benchmarks)"""
+    with _lock:
+        return {
+            name: {
+                'calls': t.calls, 'errors': t.errors, 'coalesced': t.coalesced,
+                'rejected': t.rejected, 'timeouts': t.timeouts, 'queries': t.queries,
+                'query_seconds': t.query_seconds, 'rows': t.rows,
+                'latency_seconds': t.latency.sum,
+            }
+            for name, t in _tools.items()
+        }
+
+
+def reset():
+    with _lock:
+        _tools.clear()
+        _pool.update(checkouts=0, exhausted=0, in_use=0, wait=Histogram(WAIT_BUCKETS))
+
+
+def _label(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def render():
+    """Alle metrics in het Prometheus tekstformaat (versie 0.0.4)"""
+    with _lock:
+        tools = sorted(_tools.items())
+        lines = []
+
+        def counter(metric, help_text, attr):
+            lines.append(f'# HELP {metric} {help_text}')
+            lines.append(f'# TYPE {metric} counter')
+            for name, t in tools:
+                lines.append(f'{metric}{{tool="{_label(name)}"}} {getattr(t, attr)}')
+
+        counter('mcp_tool_calls_total', 'Aantal tool calls.', 'calls')
+        counter('mcp_tool_errors_total', 'Aantal tool calls die met een fout eindigden.', 'errors')
+        counter('mcp_tool_rejected_total', 'Calls geweigerd omdat er geen slot vrijkwam.', 'rejected')
+        counter('mcp_tool_timeouts_total', 'Calls afgebroken door de statement_timeout.', 'timeouts')
+        counter('mcp_tool_coalesced_total', 'Calls die het resultaat van een identieke lopende call deelden.', 'coalesced')
+        counter('mcp_tool_sql_statements_total', 'Aantal uitgevoerde SQL statements.', 'queries')
+        counter('mcp_tool_sql_seconds_total', 'Totale tijd in SQL statements.', 'query_seconds')
+        counter('mcp_tool_rows_total', 'Aantal teruggegeven of gewijzigde rijen.', 'rows')
+
+        lines.append('# HELP mcp_tool_latency_seconds Latency per tool call.')
+        lines.append('# TYPE mcp_tool_latency_seconds histogram')
+        for name, t in tools:
+            lines.extend(t.latency.render('mcp_tool_latency_seconds', f'tool="{_label(name)}"'))
+
+        lines.append('# HELP mcp_tool_sql_statements_per_call SQL statements per tool call.')
+        lines.append('# TYPE mcp_tool_sql_statements_per_call histogram')
+        for name, t in tools:
+            lines.extend(t.statements.render('mcp_tool_sql_statements_per_call', f'tool="{_label(name)}"'))
+
+        in_use, max_size = _pool['in_use'], _pool['max_size']
+        lines.append('# HELP mcp_db_pool_checkouts_total Aantal connection checkouts.')
+        lines.append('# TYPE mcp_db_pool_checkouts_total counter')
+        lines.append(f'mcp_db_pool_checkouts_total {_pool["checkouts"]}')
+        lines.append('# HELP mcp_db_pool_exhausted_total Checkouts die faalden omdat de pool vol bleef tot de timeout.')
+        lines.append('# TYPE mcp_db_pool_exhausted_total counter')
+        lines.append(f'mcp_db_pool_exhausted_total {_pool["exhausted"]}')
+        lines.append('# HELP mcp_db_pool_in_use Connecties die nu uitgeleend zijn.')
+        lines.append('# TYPE mcp_db_pool_in_use gauge')
+        lines.append(f'mcp_db_pool_in_use {in_use}')
+        lines.append('# HELP mcp_db_pool_max_size Maximale grootte van de pool.')
+        lines.append('# TYPE mcp_db_pool_max_size gauge')
+        lines.append(f'mcp_db_pool_max_size {max_size}')
+        lines.append('# HELP mcp_db_pool_saturation Fractie van de pool die in gebruik is.')
+        lines.append('# TYPE mcp_db_pool_saturation gauge')
+        lines.append(f'mcp_db_pool_saturation {in_use / max_size if max_size else 0:.4f}')
+        lines.append('# HELP mcp_db_pool_checkout_wait_seconds Wachttijd bij het ophalen van een connectie.')
+        lines.append('# TYPE mcp_db_pool_checkout_wait_seconds histogram')
+        lines.extend(_pool['wait'].render('mcp_db_pool_checkout_wait_seconds'))
+        stats_fn = _pool['stats']
+    if stats_fn is not None:
+        stats = stats_fn()
+        lines.append('# HELP mcp_db_pool_waiting Callers in de wachtrij voor een connectie.')
+        lines.append('# TYPE mcp_db_pool_waiting gauge')
+        lines.append(f'mcp_db_pool_waiting {stats["waiting"]}')
+        lines.append('# HELP mcp_db_pool_open Geopende connecties (uitgeleend en vrij).')
+        lines.append('# TYPE mcp_db_pool_open gauge')
+        lines.append(f'mcp_db_pool_open {stats["size"]}')
+    return '\n'.join(lines) + '\n'
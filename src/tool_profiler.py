@@ -0,0 +1,102 @@
+"""Opt-in profiling van trage tool calls.
+
+Aanzetten met PROFILE_TOOLS=1 (elke call) of PROFILE_SAMPLE_RATE=0.05 (5% van de
+calls). Calls die langer duren dan PROFILE_THRESHOLD_MS worden weggeschreven naar
+PROFILE_DIR als:
+
+- <tijd>_<tool>_<ms>ms.prof          cProfile stats (pstats, snakeviz, flameprof)
+- <tijd>_<tool>_<ms>ms.queries.json  argumenten en timing per SQL statement
+
+Alleen de nieuwste PROFILE_MAX_FILES profielen worden bewaard.
+"""
+
+import cProfile
+import json
+import logging
+import os
+import random
+import re
+import time
+from datetime import datetime
+
+import tool_metrics
+
+logger = logging.getLogger(__name__)
+
+PROFILE_DIR = os.environ.get('PROFILE_DIR', '/tmp/mcp-profiles')
+PROFILE_THRESHOLD_MS = float(os.environ.get('PROFILE_THRESHOLD_MS', '500'))
+PROFILE_MAX_FILES = int(os.environ.get('PROFILE_MAX_FILES', '50'))
+PROFILE_SAMPLE_RATE = float(os.environ.get(
+    'PROFILE_SAMPLE_RATE', '1' if os.environ.get('PROFILE_TOOLS') == '1' else '0'))
+
+
+def should_profile():
+    return PROFILE_SAMPLE_RATE > 0 and random.random() < PROFILE_SAMPLE_RATE
+
+
+def run(name, arguments, func):
+    """Voer func(name, arguments) uit, met profiler als deze call gesampled wordt"""
+    if not should_profile():
+        return func(name, arguments)
+
+    stats = tool_metrics.current_call()
+    if stats is not None:
+        stats.trace = []
+    profiler = cProfile.Profile()
+    start = time.perf_counter()
+    profiler.enable()
+    try:
+        return func(name, arguments)
+    finally:
+        profiler.disable()
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        if elapsed_ms >= PROFILE_THRESHOLD_MS:
+            trace = stats.trace if stats is not None else []
+            try:
+                write_profile(name, arguments, elapsed_ms, profiler, trace)
+            except OSError as e:
+                logger.warning(f'Kon profiel voor {name} niet wegschrijven: {e}')
+        if stats is not None:
+            stats.trace = None
+
+
+def safe_name(name):
+    """Toolnaam als deel van een bestandsnaam: geen '/' of '..' die buiten PROFILE_DIR schrijven"""
+    return re.sub(r'[^A-Za-z0-9_-]', '_', str(name))[:64] or 'tool'
+
+
+def write_profile(name, arguments, elapsed_ms, profiler, trace):
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    stamp = datetime.now().strftime('%Y%m%d-%H%M%S-%f')
+    base = os.path.join(PROFILE_DIR, f'{stamp}_{safe_name(name)}_{elapsed_ms:.0f}ms')
+
+    profiler.dump_stats(f'{base}.prof')
+
+    sql_ms = sum(seconds for _, seconds, _ in trace) * 1000
+    with open(f'{base}.queries.json', 'w') as f:
+        json.dump({
+            'tool': name,
+            'arguments': arguments,
+            'elapsed_ms': round(elapsed_ms, 3),
+            'sql_ms': round(sql_ms, 3),
+            'python_ms': round(elapsed_ms - sql_ms, 3),
+            'queries': [
+                {'sql': re.sub(r'\s+', ' ', str(sql)).strip(), 'ms': round(seconds * 1000, 3), 'rows': rows}
+                for sql, seconds, rows in trace
+            ],
+        }, f, indent=2, default=str)
+
+    logger.info(f'Profiel geschreven: {base}.prof ({elapsed_ms:.0f} ms, {len(trace)} queries)')
+    rotate()
+
+
+def rotate():
+    """Verwijder de oudste profielen boven PROFILE_MAX_FILES"""
+    profiles = sorted(f for f in os.listdir(PROFILE_DIR) if f.endswith('.prof'))
+    for old in profiles[:max(0, len(profiles) - PROFILE_MAX_FILES)]:
+        base = os.path.join(PROFILE_DIR, old[:-len('.prof')])
+        for path in (f'{base}.prof', f'{base}.queries.json'):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
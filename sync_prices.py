@@ -1,9 +1,16 @@
 #!/usr/bin/env python3
-import httpx
-import psycopg2
-from datetime import datetime
+import hashlib
+import re
+from functools import lru_cache
 import logging
 
+from psycopg2.extras import execute_values
+
+from src import categories, sync_engine
+from src import store_stats
+from src.store_stats import refresh_store_stats
+from src.sync_runs import run_locked
+
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(message)s')
 logger = logging.getLogger(__name__)
 
@@ -32,67 +39,210 @@ SUPERMARKETS_META = {
     'picnic': {'name': 'Picnic', 'icon': '🟨'},
 }
 
-def fetch_data():
-    logger.info('Fetching data from Checkjebon.nl...')
-    response = httpx.get('https://www.checkjebon.nl/data/supermarkets.json',
-        headers={'User-Agent': 'NL-Supermarkt-MCP/1.0'}, timeout=60.0)
-    response.raise_for_status()
-    return response.json()
+# Eenheid -> (factor naar basiseenheid, basiseenheid)
+UNIT_FACTORS = {
+    'mg': (0.000001, 'kg'), 'g': (0.001, 'kg'), 'gr': (0.001, 'kg'), 'gram': (0.001, 'kg'),
+    'kg': (1, 'kg'), 'kilo': (1, 'kg'), 'kilogram': (1, 'kg'),
+    'ml': (0.001, 'l'), 'cl': (0.01, 'l'), 'dl': (0.1, 'l'),
+    'l': (1, 'l'), 'lt': (1, 'l'), 'ltr': (1, 'l'), 'liter': (1, 'l'),
+    'st': (1, 'stuk'), 'stk': (1, 'stuk'), 'stuk': (1, 'stuk'), 'stuks': (1, 'stuk'),
+    'rol': (1, 'stuk'), 'rollen': (1, 'stuk'), 'bos': (1, 'stuk'), 'tros': (1, 'stuk'),
+    'zakje': (1, 'stuk'), 'zakjes': (1, 'stuk'), 'tabletten': (1, 'stuk'), 'wasbeurten': (1, 'stuk'),
+}
+
+_UNIT_ALT = '|'.join(sorted(UNIT_FACTORS, key=len, reverse=True))
+UNIT_PATTERN = re.compile(
+    r'((?:\d+\s*[x×]\s*)*)(\d+(?:[.,]\d+)?)\s*(' + _UNIT_ALT + r')\.?(?![a-z])')
+PER_UNIT_PATTERN = re.compile(r'^\s*per\s+(' + _UNIT_ALT + r')\.?\s*$')
+
+@lru_cache(maxsize=65536)
+def parse_unit(unit):
+    """Parse een vrije-tekst eenheid ('500 g', '6 x 330 ml') naar (hoeveelheid, basiseenheid).
+
+    De hoeveelheid is uitgedrukt in de basiseenheid (kg, l of stuk). Geeft None terug
+    als de eenheid niet te herkennen is.
+    """
+    if not unit:
+        return None
+    text = unit.lower().replace('\xa0', ' ')
+    m = PER_UNIT_PATTERN.match(text)
+    if m:
+        factor, base = UNIT_FACTORS[m.group(1)]
+        return float(factor), base
+    m = UNIT_PATTERN.search(text)
+    if not m:
+        return None
+    multipliers, amount, unit_name = m.groups()
+    quantity = float(amount.replace(',', '.'))
+    for mult in re.findall(r'\d+', multipliers):
+        quantity *= int(mult)
+    factor, base = UNIT_FACTORS[unit_name]
+    quantity *= factor
+    if quantity <= 0:
+        return None
+    return round(quantity, 6), base
+
+def normalize_unit_price(price, unit):
+    """Geef (hoeveelheid, basiseenheid, prijs per basiseenheid), of Nones als de eenheid onbekend is"""
+    parsed = parse_unit(unit)
+    if not parsed or not price:
+        return None, None, None
+    quantity, base = parsed
+    return quantity, base, round(float(price) / quantity, 4)
+
+def ensure_schema(cur):
+    """Voeg eenheidsprijs en zoek kolommen toe aan bestaande databases"""
+    cur.execute('''
+        ALTER TABLE products
+            ADD COLUMN IF NOT EXISTS unit_quantity DECIMAL(14,6),
+            ADD COLUMN IF NOT EXISTS base_unit VARCHAR(10),
+            ADD COLUMN IF NOT EXISTS price_per_base_unit DECIMAL(12,4)
+    ''')
+    cur.execute('CREATE INDEX IF NOT EXISTS idx_products_unit_price ON products(price_per_base_unit)')
+    # Full-text zoekkolom met Nederlandse stemming
+    cur.execute('''
+        ALTER TABLE products ADD COLUMN IF NOT EXISTS search_vector tsvector
+            GENERATED ALWAYS AS (to_tsvector('dutch', name)) STORED
+    ''')
+    cur.execute('CREATE INDEX IF NOT EXISTS idx_products_search ON products USING gin(search_vector)')
+    categories.ensure_schema(cur, 'products')
+    cur.execute('ALTER TABLE products ADD COLUMN IF NOT EXISTS content_hash TEXT')
+    # Uit de feed verdwenen producten blijven staan (met hun prijshistorie) tot ze terugkomen
+    cur.execute('ALTER TABLE products ADD COLUMN IF NOT EXISTS missing_since TIMESTAMP')
+
+# Een keten waarvan de feed minder dan dit deel van de opgeslagen producten bevat
+# is waarschijnlijk afgekapt: dan niets van die keten als verdwenen markeren
+MIN_FEED_SHARE = 0.5
+
+def product_row(name, price, unit, link):
+    """(price, unit, link, hoeveelheid, basiseenheid, eenheidsprijs, categorieën): alles wat de sync schrijft"""
+    quantity, base_unit, unit_price = normalize_unit_price(price, unit)
+    return (price, unit, link, quantity, base_unit, unit_price, categories.classify(name))
+
+def content_hash(row):
+    """Hash van prijs, eenheid en link plus de afgeleide kolommen (een parser wijziging herschrijft dus ook)"""
+    return hashlib.md5(repr(row).encode()).hexdigest()
+
+def feed_products(data):
+    """{(keten, naam): rij} uit de Checkjebon feed; bij dubbele namen telt de eerste"""
+    incoming = {}
+    for sm in data:
+        sm_code = sm.get('n', '')
+        for p in sm.get('d', []):
+            name = p.get('n', '')
+            price = p.get('p', 0)
+            key = (sm_code, name)
+            if name and price and key not in incoming:
+                incoming[key] = product_row(name, price, p.get('s', ''), p.get('l', ''))
+    return incoming
+
+def diff_products(stored, incoming):
+    """
+    stored: {(keten, naam): (id, prijs, hash, verdwenen)}. Geeft (nieuw, gewijzigd,
+    verdwenen): nieuw [(key, rij)], gewijzigd [(id, rij, prijs_gewijzigd)] (ook
+    verdwenen producten die terug zijn), verdwenen [id] (nog actieve producten die
+    niet meer in de feed staan). Alleen ketens die in de feed zitten en niet
+    afgekapt lijken verliezen producten.
+    """
+    inserts, updates = [], []
+    for key, row in incoming.items():
+        current = stored.get(key)
+        if current is None:
+            inserts.append((key, row))
+        elif current[3] or current[2] != content_hash(row):
+            updates.append((current[0], row, float(current[1]) != float(row[0])))
 
-def sync_to_db(data):
+    feed_counts, stored_counts = {}, {}
+    for code, _ in incoming:
+        feed_counts[code] = feed_counts.get(code, 0) + 1
+    for (code, _), current in stored.items():
+        if not current[3]:
+            stored_counts[code] = stored_counts.get(code, 0) + 1
+    complete = {code for code, n in feed_counts.items() if n >= MIN_FEED_SHARE * stored_counts.get(code, 0)}
+    for code in set(stored_counts) & set(feed_counts) - complete:
+        logger.warning(f'  {code}: feed bevat {feed_counts[code]} van {stored_counts[code]} producten, niets verwijderd')
+    deletes = [current[0] for key, current in stored.items()
+               if key[0] in complete and key not in incoming and not current[3]]
+    return inserts, updates, deletes
+
+def sync_to_db(cur, data):
+    """
+    Schrijf alleen nieuwe, gewijzigde en verdwenen producten; prijshistorie alleen
+    bij een nieuwe prijs. Verdwenen producten krijgen missing_since (de server
+    toont ze niet meer) en houden hun id en prijshistorie voor als ze terugkomen.
+    """
     logger.info('Syncing to PostgreSQL...')
-    conn = psycopg2.connect(**DB_CONFIG)
-    cur = conn.cursor()
-    
     for sm in data:
         code = sm.get('n', '')
         meta = SUPERMARKETS_META.get(code, {'name': code.title(), 'icon': '🏪'})
         cur.execute('''INSERT INTO supermarkets (code, name, icon) VALUES (%s, %s, %s)
-            ON CONFLICT (code) DO UPDATE SET name = EXCLUDED.name, icon = EXCLUDED.icon''',
+            ON CONFLICT (code) DO UPDATE SET name = EXCLUDED.name, icon = EXCLUDED.icon
+            WHERE (supermarkets.name, supermarkets.icon) IS DISTINCT FROM (EXCLUDED.name, EXCLUDED.icon)''',
             (code, meta['name'], meta['icon']))
-    
-    total_products = 0
-    for sm in data:
-        sm_code = sm.get('n', '')
-        products = sm.get('d', [])
-        if not products:
-            continue
-        
-        seen = set()
-        for p in products:
-            name = p.get('n', '')
-            price = p.get('p', 0)
-            unit = p.get('s', '')
-            link = p.get('l', '')
-            key = (sm_code, name)
-            if name and price and key not in seen:
-                seen.add(key)
-                cur.execute('''INSERT INTO products (supermarket_code, name, price, unit, link, updated_at)
-                    VALUES (%s, %s, %s, %s, %s, %s)
-                    ON CONFLICT (supermarket_code, name) DO UPDATE SET 
-                    price = EXCLUDED.price, unit = EXCLUDED.unit, link = EXCLUDED.link, updated_at = EXCLUDED.updated_at''',
-                    (sm_code, name, price, unit, link, datetime.now()))
-                total_products += 1
-        
-        logger.info(f'  {sm_code}: {len(seen)} products')
-    
-    cur.execute('''INSERT INTO price_history (product_id, price)
-        SELECT p.id, p.price FROM products p
-        WHERE NOT EXISTS (SELECT 1 FROM price_history ph WHERE ph.product_id = p.id AND DATE(ph.recorded_at) = CURRENT_DATE)''')
-    
-    conn.commit()
-    cur.close()
-    conn.close()
-    logger.info(f'Synced {total_products} products total')
+
+    incoming = feed_products(data)
+    cur.execute('SELECT id, supermarket_code, name, price, content_hash, missing_since IS NOT NULL FROM products')
+    stored = {(code, name): (pid, price, h, missing) for pid, code, name, price, h, missing in cur.fetchall()}
+    inserts, updates, deletes = diff_products(stored, incoming)
+
+    history = []
+    if inserts:
+        new_ids = execute_values(cur, '''
+            INSERT INTO products (supermarket_code, name, price, unit, link, unit_quantity, base_unit,
+                price_per_base_unit, categories, content_hash)
+            VALUES %s ON CONFLICT (supermarket_code, name) DO NOTHING RETURNING id, price
+        ''', [key + row + (content_hash(row),) for key, row in inserts], page_size=1000, fetch=True)
+        history.extend(new_ids)
+    if updates:
+        execute_values(cur, '''
+            UPDATE products p SET price = v.price, unit = v.unit, link = v.link, unit_quantity = v.unit_quantity,
+                base_unit = v.base_unit, price_per_base_unit = v.price_per_base_unit, categories = v.categories,
+                content_hash = v.content_hash, missing_since = NULL, updated_at = NOW()
+            FROM (VALUES %s) AS v(id, price, unit, link, unit_quantity, base_unit, price_per_base_unit,
+                categories, content_hash)
+            WHERE p.id = v.id
+        ''', [(pid,) + row + (content_hash(row),) for pid, row, _ in updates],
+            template='(%s, %s::numeric, %s, %s, %s::numeric, %s, %s::numeric, %s::text[], %s)', page_size=1000)
+        history.extend((pid, row[0]) for pid, row, price_changed in updates if price_changed)
+    if deletes:
+        cur.execute('UPDATE products SET missing_since = NOW() WHERE id = ANY(%s)', (deletes,))
+    if history:
+        execute_values(cur, 'INSERT INTO price_history (product_id, price) VALUES %s', history, page_size=1000)
+
+    refresh_store_stats(cur, products=True)
+    unchanged = len(incoming) - len(inserts) - len(updates)
+    logger.info(f'Delta: {len(inserts)} nieuw, {len(updates)} gewijzigd, {len(deletes)} verdwenen, '
+                f'{unchanged} ongewijzigd ({len(history)} prijspunten)')
+    return len(inserts) + len(updates) + len(deletes)
+
+class Checkjebon(sync_engine.Source):
+    """Alle producten en prijzen van Checkjebon.nl (één JSON bestand)"""
+    name = 'prices'
+    headers = {'User-Agent': 'NL-Supermarkt-MCP/1.0'}
+
+    def prepare(self, ctx):
+        ensure_schema(ctx.cur)
+        store_stats.ensure_schema(ctx.cur)
+
+    def fetch(self, ctx):
+        logger.info('Fetching data from Checkjebon.nl...')
+        response = ctx.get('https://www.checkjebon.nl/data/supermarkets.json', timeout=60.0)
+        response.raise_for_status()
+        return response.json()
+
+    def write(self, ctx, data):
+        return sync_to_db(ctx.cur, data)
+
+CHECKJEBON = Checkjebon()
 
 def main():
     try:
-        data = fetch_data()
-        sync_to_db(data)
+        total = sync_engine.sync(CHECKJEBON, DB_CONFIG)
         logger.info('Sync completed successfully!')
+        return total
     except Exception as e:
         logger.error(f'Sync failed: {e}')
         raise
 
 if __name__ == '__main__':
-    main()
+    run_locked(DB_CONFIG, 'prices', main)
@@ -7,11 +7,29 @@ import psycopg2
 from datetime import datetime, date
 import logging
 
+from src import categories
+from src import promo_history
+from src.promo_history import archive_and_refresh
+from src import store_stats
+from src.store_stats import refresh_store_stats
+from src.sync_runs import run_locked
+
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(message)s')
 logger = logging.getLogger(__name__)
 
 DB_CONFIG = {'database': 'supermarkt_db', 'user': 'postgres', 'port': 5433, 'host': '127.0.0.1'}
 
+def ensure_schema():
+    """Schema vooraf in een eigen transactie: geen DDL locks tijdens het schrijven"""
+    conn = psycopg2.connect(**DB_CONFIG)
+    cur = conn.cursor()
+    categories.ensure_schema(cur, 'promotions')
+    store_stats.ensure_schema(cur)
+    promo_history.prepare(cur)
+    conn.commit()
+    cur.close()
+    conn.close()
+
 def sync_ah_promotions():
     """Sync Albert Heijn bonus producten"""
     from supermarktconnector.ah import AHConnector
@@ -63,16 +81,17 @@ def sync_ah_promotions():
                 cur.execute('''
                     INSERT INTO promotions 
                     (supermarket_code, product_name, original_price, discount_price, 
-                     discount_percent, promo_type, start_date, end_date, product_image)
-                    VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
+                     discount_percent, promo_type, start_date, end_date, product_image, categories)
+                    VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
                     ON CONFLICT (supermarket_code, product_name, start_date) 
                     DO UPDATE SET 
                         original_price = EXCLUDED.original_price,
                         discount_price = EXCLUDED.discount_price,
                         discount_percent = EXCLUDED.discount_percent,
-                        promo_type = EXCLUDED.promo_type
+                        promo_type = EXCLUDED.promo_type,
+                        categories = EXCLUDED.categories
                 ''', ('ah', name, original_price, discount_price, discount_percent, 
-                      promo_type, start_date, end_date, image_url))
+                      promo_type, start_date, end_date, image_url, categories.classify(name)))
                 count += 1
                 
             except Exception as e:
@@ -135,16 +154,17 @@ def sync_jumbo_promotions():
                     cur.execute('''
                         INSERT INTO promotions 
                         (supermarket_code, product_name, original_price, discount_price, 
-                         discount_percent, promo_type, start_date, product_image)
-                        VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
+                         discount_percent, promo_type, start_date, product_image, categories)
+                        VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
                         ON CONFLICT (supermarket_code, product_name, start_date) 
                         DO UPDATE SET 
                             original_price = EXCLUDED.original_price,
                             discount_price = EXCLUDED.discount_price,
                             discount_percent = EXCLUDED.discount_percent,
-                            promo_type = EXCLUDED.promo_type
+                            promo_type = EXCLUDED.promo_type,
+                            categories = EXCLUDED.categories
                     ''', ('jumbo', name, original_price, discount_price, discount_percent, 
-                          promo_type, start_date, image_url))
+                          promo_type, start_date, image_url, categories.classify(name)))
                     count += 1
                     
                 except Exception as e:
@@ -179,15 +199,29 @@ def cleanup_old_promotions():
     if deleted:
         logger.info(f'  Cleanup: {deleted} oude aanbiedingen verwijderd')
 
+def archive_promotions():
+    """Archiveer actuele aanbiedingen (voor de cleanup), werk de aanbiedingscycli en winkeltellers bij"""
+    conn = psycopg2.connect(**DB_CONFIG)
+    cur = conn.cursor()
+    archived, cycles = archive_and_refresh(cur)
+    refresh_store_stats(cur, promotions=True)
+    conn.commit()
+    cur.close()
+    conn.close()
+    logger.info(f'  Archief: {archived} nieuwe aanbiedingen, {cycles} cycli bijgewerkt')
+
 def main():
     logger.info('=== Syncing promotions ===')
+    ensure_schema()
     
     ah_count = sync_ah_promotions()
     jumbo_count = sync_jumbo_promotions()
+    archive_promotions()
     cleanup_old_promotions()
     
     logger.info(f'Totaal: {ah_count + jumbo_count} aanbiedingen gesynchroniseerd')
     logger.info('=== Done ===')
+    return ah_count + jumbo_count
 
 if __name__ == '__main__':
-    main()
+    run_locked(DB_CONFIG, 'promotions', main)
@@ -1,15 +1,22 @@
 #!/usr/bin/env python3
 """
 Sync recepten van meerdere APIs naar de database.
-Maakt eerst de tabel leeg voor verse data.
+
+TheMealDB wordt asynchroon opgehaald met begrensde concurrency; meals die al
+ongewijzigd in de database staan worden niet opnieuw opgevraagd. Alle recepten
+gaan eerst naar een staging tabel en worden in één transactie samengevoegd, zodat
+lezers nooit een lege of halve receptentabel zien.
 """
-import requests
-import psycopg2
-from psycopg2.extras import Json
-import time
+import asyncio
+import httpx
+from psycopg2.extras import Json, execute_values
 
 import os
 
+from src import http_replay, sync_engine
+from src.recipes import backfill_tokens, ensure_schema, ingredient_tokens, tag_tokens
+from src.sync_runs import run_locked
+
 DB_CONFIG = {
     'host': os.environ.get('DB_HOST', '127.0.0.1'),
     'port': int(os.environ.get('DB_PORT', '5433')),
@@ -17,7 +24,11 @@ DB_CONFIG = {
     'user': os.environ.get('DB_USER', 'postgres'),
     'password': os.environ.get('DB_PASSWORD', '')
 }
-MEALDB_BASE = "https://www.themealdb.com/api/json/v1/1"
+MEALDB_BASE = os.environ.get('MEALDB_BASE', 'https://www.themealdb.com/api/json/v1/1')
+MEALDB_CATEGORIES = ['Beef', 'Chicken', 'Pasta', 'Pork', 'Seafood', 'Vegetarian', 'Lamb', 'Miscellaneous']
+MEALS_PER_CATEGORY = 12
+# Maximaal aantal gelijktijdige requests naar TheMealDB
+MEALDB_CONCURRENCY = int(os.environ.get('MEALDB_CONCURRENCY', '4'))
 
 DUTCH_RECIPES = [
     {'naam': 'Spaghetti Bolognese', 'categorie': 'pasta', 'bereidingstijd': 30, 'porties': 4,
@@ -142,9 +153,7 @@ DUTCH_RECIPES = [
      'tags': ['noodles', 'kip', 'indonesisch', 'wok'], 'bron': 'eigen'},
 ]
 
-def create_tables():
-    conn = psycopg2.connect(**DB_CONFIG)
-    cur = conn.cursor()
+def create_tables(cur):
     cur.execute('''
         CREATE TABLE IF NOT EXISTS recepten (
             id SERIAL PRIMARY KEY,
@@ -162,55 +171,72 @@ def create_tables():
             UNIQUE(naam, bron)
         )
     ''')
-    conn.commit()
-    conn.close()
+    ensure_schema(cur)
+    backfill_tokens(cur)
+
+async def _get_json(client, semaphore, path, params, retries=3):
+    """GET binnen de concurrency limiet, met backoff bij 429, 5xx en netwerkfouten"""
+    for attempt in range(retries):
+        async with semaphore:
+            try:
+                resp = await client.get(path, params=params)
+                if resp.status_code != 429 and resp.status_code < 500:
+                    resp.raise_for_status()
+                    return resp.json()
+            except httpx.TransportError:
+                if attempt == retries - 1:
+                    raise
+        await http_replay.async_sleep(0.5 * 2 ** attempt)
+    raise httpx.HTTPError(f'{path} {params}: geen antwoord na {retries} pogingen')
+
+async def fetch_mealdb_recipes(known=None, base=MEALDB_BASE, concurrency=MEALDB_CONCURRENCY, transport=None):
+    """Haal TheMealDB recepten op; lookup.php alleen voor nieuwe of gewijzigde meals.
+
+    known: {external_id: (naam, afbeelding)} van de opgeslagen recepten.
+    Geeft (meals, keep, complete) terug: opgehaalde meal details, external_ids
+    waarvan de opgeslagen versie blijft, en of alle categorieën gelukt zijn.
+    """
+    known = known or {}
+    semaphore = asyncio.Semaphore(concurrency)
+    complete = True
+    async with httpx.AsyncClient(base_url=base, timeout=10.0, transport=transport,
+                                 headers={'User-Agent': 'NL-Supermarkt-MCP/1.0'}) as client:
+        async def list_category(cat):
+            nonlocal complete
+            try:
+                data = await _get_json(client, semaphore, '/filter.php', {'c': cat})
+            except httpx.HTTPError as e:
+                print(f"Fout bij {cat}: {e}")
+                complete = False
+                return []
+            return (data.get('meals') or [])[:MEALS_PER_CATEGORY]
 
-def clear_recipes():
-    """Maak recepten tabel leeg voor verse sync"""
-    conn = psycopg2.connect(**DB_CONFIG)
-    cur = conn.cursor()
-    cur.execute("DELETE FROM recepten")
-    deleted = cur.rowcount
-    conn.commit()
-    conn.close()
-    return deleted
+        async def lookup(meal_id):
+            try:
+                data = await _get_json(client, semaphore, '/lookup.php', {'i': meal_id})
+            except httpx.HTTPError as e:
+                print(f"Fout bij meal {meal_id}: {e}")
+                return None
+            return (data.get('meals') or [None])[0]
 
-def sync_dutch_recipes():
-    conn = psycopg2.connect(**DB_CONFIG)
-    cur = conn.cursor()
-    inserted = 0
-    for r in DUTCH_RECIPES:
-        try:
-            cur.execute('''
-                INSERT INTO recepten (naam, categorie, bereidingstijd, porties, ingredienten, instructies, tags, bron)
-                VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
-                ON CONFLICT (naam, bron) DO UPDATE SET ingredienten = EXCLUDED.ingredienten, instructies = EXCLUDED.instructies
-            ''', (r['naam'], r['categorie'], r['bereidingstijd'], r['porties'],
-                  Json(r['ingredienten']), Json(r['instructies']), Json(r['tags']), r['bron']))
-            inserted += 1
-        except Exception as e:
-            print(f"Fout: {e}")
-    conn.commit()
-    conn.close()
-    return inserted
+        listed = await asyncio.gather(*(list_category(cat) for cat in MEALDB_CATEGORIES))
+        keep, todo = set(), []
+        for meal in (m for meals in listed for m in meals):
+            meal_id = meal['idMeal']
+            if known.get(meal_id) == (meal.get('strMeal'), meal.get('strMealThumb')):
+                keep.add(meal_id)
+            elif meal_id not in todo:
+                todo.append(meal_id)
+        details = await asyncio.gather(*(lookup(meal_id) for meal_id in todo))
 
-def fetch_mealdb_recipes():
-    recipes = []
-    categories = ['Beef', 'Chicken', 'Pasta', 'Pork', 'Seafood', 'Vegetarian', 'Lamb', 'Miscellaneous']
-    for cat in categories:
-        try:
-            resp = requests.get(f"{MEALDB_BASE}/filter.php?c={cat}", timeout=10)
-            data = resp.json()
-            if data.get('meals'):
-                for meal in data['meals'][:12]:
-                    detail_resp = requests.get(f"{MEALDB_BASE}/lookup.php?i={meal['idMeal']}", timeout=10)
-                    detail = detail_resp.json()
-                    if detail.get('meals'):
-                        recipes.append(detail['meals'][0])
-                    time.sleep(0.2)
-        except Exception as e:
-            print(f"Fout bij {cat}: {e}")
-    return recipes
+    meals = []
+    for meal_id, detail in zip(todo, details):
+        if detail:
+            meals.append(detail)
+        elif meal_id in known:
+            # Lookup mislukt: houd de opgeslagen versie
+            keep.add(meal_id)
+    return meals, keep, complete
 
 def parse_mealdb_recipe(meal):
     ingredienten = []
@@ -233,58 +259,80 @@ def parse_mealdb_recipe(meal):
         'tags': tags, 'bron': 'themealdb', 'external_id': meal.get('idMeal'), 'afbeelding': meal.get('strMealThumb')
     }
 
-def sync_mealdb_recipes():
-    conn = psycopg2.connect(**DB_CONFIG)
-    cur = conn.cursor()
-    print("Ophalen recepten van TheMealDB...")
-    meals = fetch_mealdb_recipes()
-    print(f"  {len(meals)} recepten opgehaald")
-    inserted = 0
-    for meal in meals:
-        r = parse_mealdb_recipe(meal)
-        try:
-            cur.execute('''
-                INSERT INTO recepten (naam, categorie, bereidingstijd, porties, ingredienten, instructies, tags, bron, external_id, afbeelding)
-                VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-                ON CONFLICT (naam, bron) DO UPDATE SET ingredienten = EXCLUDED.ingredienten, afbeelding = EXCLUDED.afbeelding
-            ''', (r['naam'], r['categorie'], r['bereidingstijd'], r['porties'],
-                  Json(r['ingredienten']), Json(r['instructies']), Json(r['tags']),
-                  r['bron'], r['external_id'], r['afbeelding']))
-            inserted += 1
-        except Exception as e:
-            print(f"Fout: {e}")
-    conn.commit()
-    conn.close()
-    return inserted
+RECIPE_COLUMNS = ['naam', 'categorie', 'bereidingstijd', 'porties', 'ingredienten', 'instructies', 'tags',
+                  'bron', 'external_id', 'afbeelding', 'ingredient_tokens', 'tag_tokens']
+
+def recipe_row(r):
+    return (r['naam'], r['categorie'], r['bereidingstijd'], r['porties'],
+            Json(r['ingredienten']), Json(r['instructies']), Json(r['tags']),
+            r['bron'], r.get('external_id'), r.get('afbeelding'),
+            ingredient_tokens(r['ingredienten']), tag_tokens(r['tags']))
+
+def load_known(cur):
+    cur.execute("SELECT external_id, naam, afbeelding FROM recepten WHERE bron = 'themealdb' AND external_id IS NOT NULL")
+    return {external_id: (naam, afbeelding) for external_id, naam, afbeelding in cur.fetchall()}
+
+def merge_recipes(cur, rows, keep=(), prune=('eigen', 'themealdb')):
+    """Schrijf recepten via een staging tabel en voeg ze samen met recepten (zelfde transactie).
+
+    Recepten uit de bronnen in 'prune' die niet in de staging tabel staan en niet
+    in 'keep' (ongewijzigde TheMealDB ids) worden verwijderd.
+    """
+    cols = ', '.join(RECIPE_COLUMNS)
+    cur.execute(f'CREATE TEMP TABLE recepten_staging ON COMMIT DROP AS SELECT {cols} FROM recepten WITH NO DATA')
+    execute_values(cur, f'INSERT INTO recepten_staging ({cols}) VALUES %s', rows, page_size=500)
+    updates = ', '.join(f'{c} = EXCLUDED.{c}' for c in RECIPE_COLUMNS if c not in ('naam', 'bron'))
+    cur.execute(f'''
+        INSERT INTO recepten ({cols})
+        SELECT DISTINCT ON (naam, bron) {cols} FROM recepten_staging ORDER BY naam, bron
+        ON CONFLICT (naam, bron) DO UPDATE SET {updates}
+    ''')
+    upserted = cur.rowcount
+    cur.execute('''
+        DELETE FROM recepten r
+        WHERE r.bron = ANY(%s)
+          AND NOT (r.bron = 'themealdb' AND r.external_id = ANY(%s))
+          AND NOT EXISTS (SELECT 1 FROM recepten_staging s WHERE s.naam = r.naam AND s.bron = r.bron)
+    ''', (list(prune), list(keep)))
+    return upserted, cur.rowcount
+
+class MealDB(sync_engine.Source):
+    """Eigen NL recepten plus TheMealDB (eigen async client met keep-alive en begrensde concurrency)"""
+    name = 'recepten'
+    http = False
+
+    def prepare(self, ctx):
+        create_tables(ctx.cur)
+
+    def fetch(self, ctx):
+        known = load_known(ctx.cur)
+        print("Ophalen recepten van TheMealDB...")
+        meals, keep, complete = asyncio.run(fetch_mealdb_recipes(known, transport=http_replay.async_transport()))
+        print(f"  {len(meals)} nieuw of gewijzigd, {len(keep)} ongewijzigd")
+        return meals, keep, complete
+
+    def write(self, ctx, items):
+        meals, keep, complete = items
+        rows = [recipe_row(r) for r in DUTCH_RECIPES] + [recipe_row(parse_mealdb_recipe(m)) for m in meals]
+        # Bij een mislukte categorie geen TheMealDB recepten verwijderen
+        prune = ('eigen', 'themealdb') if complete else ('eigen',)
+        upserted, deleted = merge_recipes(ctx.cur, rows, keep, prune)
+        print(f"Bijgewerkt: {upserted} | Verwijderd: {deleted}")
+        return upserted + deleted
+
+    def summary(self, ctx):
+        ctx.cur.execute("SELECT bron, COUNT(*) FROM recepten GROUP BY bron")
+        print("\nResultaat:")
+        for row in ctx.cur.fetchall():
+            print(f"  {row[0]:15} {row[1]:3} recepten")
+
+MEALDB = MealDB()
 
 def main():
     print("=" * 60)
     print("Recepten Sync")
     print("=" * 60)
-    create_tables()
-    
-    # EERST LEGEN
-    deleted = clear_recipes()
-    print(f"Verwijderd: {deleted} oude recepten\n")
-    
-    print("1. Nederlandse recepten...")
-    dutch = sync_dutch_recipes()
-    print(f"   {dutch} recepten toegevoegd")
-    
-    print("\n2. TheMealDB recepten...")
-    mealdb = sync_mealdb_recipes()
-    print(f"   {mealdb} recepten toegevoegd")
-    
-    conn = psycopg2.connect(**DB_CONFIG)
-    cur = conn.cursor()
-    cur.execute("SELECT bron, COUNT(*) FROM recepten GROUP BY bron")
-    print("\nResultaat:")
-    for row in cur.fetchall():
-        print(f"  {row[0]:15} {row[1]:3} recepten")
-    cur.execute("SELECT COUNT(*) FROM recepten")
-    print(f"\nTotaal: {cur.fetchone()[0]} recepten")
-    conn.close()
-    print("=" * 60)
+    return sync_engine.sync(MEALDB, DB_CONFIG)
 
 if __name__ == '__main__':
-    main()
+    run_locked(DB_CONFIG, 'recepten', main)
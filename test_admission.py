@@ -0,0 +1,59 @@
+"""Tests voor admission control in src/admission.py"""
+
+import asyncio
+import sys
+
+import pytest
+
+sys.path.insert(0, 'src')
+
+import admission
+import server
+
+
+def test_every_tool_has_limits():
+    tools = asyncio.run(server.list_tools())
+    assert {t.name for t in tools} == set(admission.TOOL_LIMITS)
+
+
+async def test_per_tool_limit_rejects_after_wait():
+    control = admission.Admission(heavy_capacity=10, wait=0.05)
+    entered = asyncio.Event()
+    release = asyncio.Event()
+
+    async def hold():
+        async with control.slot('plan_boodschappen'):
+            entered.set()
+            await release.wait()
+
+    holders = [asyncio.ensure_future(hold()) for _ in range(2)]
+    await entered.wait()
+    await asyncio.sleep(0)
+    with pytest.raises(admission.Rejected):
+        async with control.slot('plan_boodschappen'):
+            pass
+    release.set()
+    await asyncio.gather(*holders)
+    async with control.slot('plan_boodschappen'):
+        pass
+
+
+async def test_light_tools_bypass_heavy_capacity():
+    control = admission.Admission(heavy_capacity=1, wait=0.05)
+    async with control.slot('optimaliseer_boodschappenlijst'):
+        with pytest.raises(admission.Rejected):
+            async with control.slot('budget_check'):
+                pass
+        async with control.slot('zoek_producten'):
+            pass
+
+
+async def test_free_slot_without_wait_time():
+    # Een vrij slot moet ook met wait=0 (of een verstreken deadline) lukken, ook op Python 3.10/3.11
+    control = admission.Admission(heavy_capacity=1, wait=0)
+    async with control.slot('plan_boodschappen'):
+        with pytest.raises(admission.Rejected):
+            async with control.slot('budget_check'):
+                pass
+    async with control.slot('budget_check'):
+        pass
@@ -0,0 +1,27 @@
+"""Tests voor de categorie-indeling in src/categories.py"""
+
+from src import categories
+
+
+def test_classify_keywords():
+    assert categories.classify('AH Halfvolle melk') == ['zuivel']
+    assert categories.classify('Nivea Dagcrème') == ['huidverzorging']
+    assert categories.classify('Kipfilet') == ['vlees']
+    assert categories.classify('Appelsap') == ['dranken', 'fruit']
+
+
+def test_short_keywords_match_word_edges_only():
+    assert categories.classify('Uien 1kg') == ['groenten']
+    assert categories.classify('Fruit mix') == []
+    assert categories.classify('Beenham') == ['vlees']
+
+
+def test_classify_folderz_sources():
+    assert categories.classify('Pilsener 6x33cl', ['heineken']) == ['dranken']
+    assert categories.classify('Filet 500g', ['kipfilet']) == ['vlees']
+    assert categories.classify('Halfvolle melk', ['campina', 'melk']) == ['zuivel']
+
+
+def test_folderz_categories_are_known():
+    for codes in categories.FOLDERZ_CATEGORIES.values():
+        assert set(codes) <= set(categories.CATEGORY_MAPPING)
@@ -0,0 +1,98 @@
+"""Tests voor de begrensde connection pool in src/db_pool.py"""
+
+import threading
+import time
+
+import pytest
+from psycopg2 import extensions
+
+from src import db_pool
+
+
+class FakeConnection:
+    def __init__(self):
+        self.closed = 0
+        self.rollbacks = 0
+
+    def get_transaction_status(self):
+        return extensions.TRANSACTION_STATUS_IDLE
+
+    def rollback(self):
+        self.rollbacks += 1
+
+    def close(self):
+        self.closed = 1
+
+
+def make_pool(maxconn=2, timeout=1.0, **kwargs):
+    return db_pool.BoundedPool(0, maxconn, timeout=timeout, connect=FakeConnection, **kwargs)
+
+
+def test_reuses_released_connection():
+    p = make_pool()
+    conn = p.getconn()
+    p.putconn(conn)
+    assert p.getconn() is conn
+    assert p.stats()['size'] == 1
+
+
+def test_times_out_when_exhausted():
+    p = make_pool(maxconn=1, timeout=0.05)
+    p.getconn()
+    with pytest.raises(db_pool.PoolTimeout):
+        p.getconn()
+    assert p.stats()['waiting'] == 0
+
+
+def test_waiters_served_in_arrival_order():
+    p = make_pool(maxconn=1)
+    held = p.getconn()
+    order = []
+
+    def worker(i):
+        conn = p.getconn()
+        order.append(i)
+        time.sleep(0.01)
+        p.putconn(conn)
+
+    threads = []
+    for i in range(5):
+        t = threading.Thread(target=worker, args=(i,))
+        t.start()
+        threads.append(t)
+        while p.stats()['waiting'] < i + 1:
+            time.sleep(0.001)
+    p.putconn(held)
+    for t in threads:
+        t.join()
+    assert order == [0, 1, 2, 3, 4]
+
+
+def test_closed_connection_replaced_on_checkout():
+    p = make_pool()
+    conn = p.getconn()
+    p.putconn(conn)
+    conn.closed = 2
+    fresh = p.getconn()
+    assert fresh is not conn
+    assert p.stats()['size'] == 1
+
+
+def test_discarded_connection_frees_slot_for_waiter():
+    p = make_pool(maxconn=1)
+    conn = p.getconn()
+    result = []
+    t = threading.Thread(target=lambda: result.append(p.getconn()))
+    t.start()
+    while p.stats()['waiting'] < 1:
+        time.sleep(0.001)
+    p.putconn(conn, close=True)
+    t.join()
+    assert result and result[0] is not conn
+    assert p.stats()['size'] == 1
+
+
+def test_warmup_opens_minconn():
+    p = db_pool.BoundedPool(3, 5, connect=FakeConnection)
+    assert p.warmup() == 3
+    assert p.stats() == {'size': 3, 'idle': 3, 'in_use': 0, 'waiting': 0, 'max_size': 5}
@@ -0,0 +1,28 @@
+"""Tests voor de prijsdalingdetectie in detect_price_drops.py"""
+
+from decimal import Decimal
+
+from detect_price_drops import find_drops, previous_price
+
+
+def test_previous_price_skips_the_current_change_point():
+    # Change-point historie, nieuwste eerst: de nieuwste rij is de huidige prijs
+    assert previous_price(Decimal('1.50'), [Decimal('1.50'), Decimal('2.00')]) == Decimal('2.00')
+    # Historie loopt achter op products: de nieuwste rij is dan al de vorige prijs
+    assert previous_price(Decimal('1.50'), [Decimal('2.00')]) == Decimal('2.00')
+    assert previous_price(Decimal('1.50'), [Decimal('1.50')]) is None
+
+
+def test_drops_from_change_point_history():
+    rows = [
+        (1, 'ah', 'Koffie', ['koffie'], Decimal('1.50'), [Decimal('1.50'), Decimal('2.00')]),
+        (2, 'ah', 'Thee', [], Decimal('2.00'), [Decimal('2.00'), Decimal('1.50')]),     # duurder
+        (3, 'jumbo', 'Melk', [], Decimal('0.98'), [Decimal('0.98'), Decimal('1.00')]),  # 2%
+        (4, 'jumbo', 'Kaas', [], Decimal('1.00'), [Decimal('1.00'), Decimal('10.00')]),  # 90%
+        (5, 'jumbo', 'Brood', [], Decimal('2.70'), [Decimal('2.70'), Decimal('3.00')]),
+        (6, 'lidl', 'Nieuw', [], Decimal('1.00'), [Decimal('1.00')]),
+    ]
+    drops = find_drops(rows)
+    assert [(d[0], d[4], d[5], d[6]) for d in drops] == [
+        (1, Decimal('2.00'), Decimal('1.50'), 25), (5, Decimal('3.00'), Decimal('2.70'), 10)]
+    assert len(find_drops(rows, limit=1)) == 1
@@ -0,0 +1,177 @@
+"""Tests voor de Folderz bron in src/folderz.py"""
+
+import json
+from datetime import datetime, timedelta
+
+import httpx
+import pytest
+
+from src import folderz
+
+
+def block(store, name, price, original=None, badge=None, date='Nog 3 dagen'):
+    original = f'<span class="product__price-normal">{original}</span>' if original else ''
+    badge = f'<div class="badge badge--secondary">{badge}</div>' if badge else ''
+    return (f'<div class="product"><div><img class="logo" alt="{store}">{badge}'
+            f'<span class="product__name">{name}</span><span class="product__price-offer">{price}</span>'
+            f'{original}<span class="product-date">{date}</span></div></div></div></div>')
+
+
+PAGE = '<html>' + ''.join([
+    block('Albert Heijn', 'Douwe Egberts Aroma Rood', '€ 5,99', '€ 8,49'),
+    block('Kruidvat', 'Andrélon Shampoo', '2,49', badge='25% korting', date='Nog 2 weken'),
+    block('Onbekende Winkel', 'Iets', '1,00'),
+]) + ' ' * 1000 + '</html>'
+
+
+class CheckpointCursor:
+    """folderz_checkpoints en (alleen lezen) folderz_pages in het geheugen"""
+
+    def __init__(self, stats=None):
+        self.checkpoints = {}
+        self.stats = stats or {}
+        self.result = []
+
+    def execute(self, sql, params=None):
+        if 'FROM folderz_pages' in sql:
+            self.result = [(page, *(s[c] for c in folderz.PAGE_COLUMNS)) for page, s in self.stats.items()]
+        elif 'FROM folderz_checkpoints' in sql:
+            self.result = [(page, prods) for (source, page), prods in self.checkpoints.items() if source == params[0]]
+        elif 'INSERT INTO folderz_checkpoints' in sql:
+            source, page, products = params
+            self.checkpoints[(source, page)] = json.loads(json.dumps(products.adapted))
+
+    def fetchall(self):
+        return self.result
+
+
+class FakeContext:
+    def __init__(self, pages, cur=None):
+        self.pages = pages
+        self.urls = []
+        self.cur = cur or CheckpointCursor()
+        self.conn = self
+        self.commits = 0
+
+    def commit(self):
+        self.commits += 1
+
+    def get(self, url):
+        self.urls.append(url)
+        page = url.rsplit('/', 1)[1]
+        if page not in self.pages:
+            return httpx.Response(404)
+        if self.pages[page] is None:
+            return httpx.Response(429)
+        return httpx.Response(200, text=self.pages[page])
+
+    def sleep(self, seconds):
+        pass
+
+
+def test_parse_page():
+    products = folderz.parse(PAGE)
+    assert [p['store'] for p in products] == ['Albert Heijn', 'Kruidvat', 'Onbekende Winkel']
+    ah, kruidvat, _ = products
+    assert ah['price'] == 5.99 and ah['original'] == 8.49 and ah['days'] == 3
+    assert kruidvat['badge_pct'] == 25 and kruidvat['days'] == 14
+
+
+def test_discount_from_prices_or_badge():
+    assert folderz.discount({'price': 6.0, 'original': 8.0}) == (8.0, 25)
+    orig, pct = folderz.discount({'price': 3.0, 'badge_pct': 25})
+    assert pct == 25 and round(orig, 2) == 4.0
+
+
+def test_store_code_only_for_known_stores():
+    assert folderz.store_code('Holland &amp; Barrett') == 'hollandbarrett'
+    assert folderz.store_code('Jan Linders', known={'ah', 'jumbo'}) is None
+    assert folderz.store_code('Onbekende Winkel') is None
+
+
+def test_fetch_dedupes_across_pages_and_keeps_page_categories():
+    source = folderz.FolderzSource('test', ['koffie', 'douwe-egberts', 'bestaat-niet'], pause_every=0)
+    ctx = FakeContext({'koffie': PAGE, 'douwe-egberts': PAGE})
+    products = source.fetch(ctx)
+    assert len(ctx.urls) == 3
+    assert len(products) == 3
+    de = next(p for p in products if p['name'].startswith('Douwe'))
+    assert de['categories'] == {'koffie', 'douwe-egberts'}
+
+
+def test_one_page_list_for_both_sources():
+    assert folderz.DROGIST.pages == folderz.DROGIST_CATEGORIES
+    assert set(folderz.DROGIST_CATEGORIES) <= set(folderz.FOLDERZ.pages)
+    assert len(set(folderz.FOLDERZ.pages)) == len(folderz.FOLDERZ.pages)
+
+
+def test_rerun_resumes_from_checkpoints():
+    pages = [f'p{i}' for i in range(8)]
+    source = folderz.FolderzSource('test', pages, pause_every=0)
+    # Vanaf p2 rate limited: na MAX_FAILED_PAGES mislukte pagina's stopt de run zonder te publiceren
+    first = FakeContext({'p0': PAGE, 'p1': PAGE, **{page: None for page in pages[2:]}})
+    with pytest.raises(RuntimeError, match='hervat'):
+        source.fetch(first)
+    assert set(first.cur.checkpoints) == {('test', 'p0'), ('test', 'p1')}
+    assert first.commits == 2
+
+    second = FakeContext({page: PAGE for page in pages}, cur=first.cur)
+    products = source.fetch(second)
+    assert [url.rsplit('/', 1)[1] for url in second.urls] == pages[2:]
+    de = next(p for p in products if p['name'].startswith('Douwe'))
+    assert de['categories'] == set(pages)
+
+
+def test_schedule_follows_churn_and_yield():
+    now = datetime(2026, 10, 1, 6, 30)
+    first = folderz.observe(None, folderz.parse(PAGE), now)
+    assert first['churn'] == 1.0 and first['next_due'] == now
+
+    # Onveranderd: churn zakt en het interval groeit met de tijd sinds de laatste wijziging
+    stats = first
+    for run in range(1, 7):
+        stats = folderz.observe(stats, folderz.parse(PAGE), now + timedelta(hours=12 * run))
+    assert stats['changed_at'] == now and stats['churn'] < 0.2
+    assert stats['next_due'] - stats['fetched_at'] > timedelta(hours=24)
+
+    # Steeds leeg: na DEAD_AFTER_RUNS alleen nog eens per week
+    empty = None
+    for run in range(folderz.DEAD_AFTER_RUNS):
+        empty = folderz.observe(empty, [], now + timedelta(hours=12 * run))
+    assert empty['next_due'] - empty['fetched_at'] == timedelta(hours=folderz.DEAD_INTERVAL_HOURS)
+
+    busy = dict(first, priority=50.0, next_due=now)
+    later = stats['fetched_at'] + timedelta(hours=12)
+    due, rest = folderz.schedule(['stabiel', 'nieuw', 'druk', 'leeg'],
+                                 {'stabiel': stats, 'druk': busy, 'leeg': empty}, later)
+    assert due == ['nieuw', 'druk'] and rest == ['stabiel', 'leeg']
+
+
+def test_fetch_only_due_pages_and_carries_the_rest():
+    now = datetime(2026, 10, 2, 0, 5)
+    stable = folderz.observe(None, folderz.parse(PAGE), now - timedelta(days=1))
+    stable = dict(stable, next_due=now + timedelta(days=1))
+    expired = dict(stable, products=[dict(p, days=1) for p in stable['products']])
+    cur = CheckpointCursor({'koffie': stable, 'oud': expired})
+    source = folderz.FolderzSource('test', ['koffie', 'oud', 'nieuw'], pause_every=0, adaptive=True)
+    ctx = FakeContext({'nieuw': PAGE}, cur=cur)
+    products = source.fetch(ctx, now=now)
+    assert [url.rsplit('/', 1)[1] for url in ctx.urls] == ['nieuw']
+    de = next(p for p in products if p['name'].startswith('Douwe'))
+    # 'koffie' komt uit de vorige run (de verse versie van 'nieuw' wint), 'oud' is verlopen
+    assert de['categories'] == {'koffie', 'nieuw'} and de['days'] == 3
+    assert list(source.observed) == ['nieuw']
+
+
+def test_carried_promotions_keep_their_start_date():
+    first_run = datetime(2026, 10, 1, 6, 30)
+    stats = folderz.observe(None, folderz.parse(PAGE), first_run)
+    assert {p['start_date'] for p in stats['products']} == {'2026-10-01'}
+
+    # Later opnieuw opgehaald of meegenomen: de start_date blijft die van de eerste run
+    later = first_run + timedelta(days=1, hours=8)
+    again = folderz.observe(stats, folderz.parse(PAGE), later)
+    assert {p['start_date'] for p in again['products']} == {'2026-10-01'}
+    carried = folderz.carry(stats, later)
+    assert {folderz.start_date(p, later.date()) for p in carried} == {first_run.date()}
+    assert {p['days'] for p in carried} == {2, 13}
@@ -0,0 +1,81 @@
+"""Tests voor het opnemen en afspelen van sync HTTP verkeer (src/http_replay.py)"""
+
+import httpx
+
+from src import http_replay
+from src.http_replay import RECORD, REPLAY, Archive, ArchiveTransport, AsyncArchiveTransport
+
+
+def upstream(request):
+    page = request.url.params.get('page', '1')
+    return httpx.Response(200, headers={'content-type': 'text/html'}, content=f'<p>{request.url.path} {page}</p>')
+
+
+def record(path, urls):
+    archive = Archive(str(path), RECORD)
+    with httpx.Client(transport=ArchiveTransport(archive, wrapped=httpx.MockTransport(upstream))) as client:
+        for url in urls:
+            client.get(url)
+    archive.close()
+
+
+def test_request_key_ignores_query_order():
+    assert http_replay.request_key('get', 'https://x.nl/a?b=2&a=1') == http_replay.request_key('GET', 'https://x.nl/a?a=1&b=2')
+
+
+def test_replay_returns_recorded_responses(tmp_path):
+    path = tmp_path / 'corpus.jsonl.gz'
+    record(path, ['https://folderz.nl/ah?page=1&sort=new', 'https://folderz.nl/ah?page=2'])
+
+    archive = Archive(str(path), REPLAY)
+    assert len(archive) == 2
+    with httpx.Client(transport=ArchiveTransport(archive, wrapped=httpx.MockTransport(lambda r: 1 / 0))) as client:
+        response = client.get('https://folderz.nl/ah?sort=new&page=1')
+        assert response.status_code == 200
+        assert response.headers['content-type'] == 'text/html'
+        assert response.text == '<p>/ah 1</p>'
+        assert client.get('https://folderz.nl/ah?page=2').text == '<p>/ah 2</p>'
+
+        missing = client.get('https://folderz.nl/jumbo')
+        assert missing.status_code == 404
+        assert missing.headers['x-replay'] == 'miss'
+    assert archive.misses == 1
+
+
+def test_repeated_requests_replay_in_order(tmp_path):
+    path = tmp_path / 'corpus.jsonl.gz'
+    calls = []
+
+    def changing(request):
+        calls.append(request)
+        return httpx.Response(200, content=str(len(calls)))
+
+    archive = Archive(str(path), RECORD)
+    with httpx.Client(transport=ArchiveTransport(archive, wrapped=httpx.MockTransport(changing))) as client:
+        client.get('https://x.nl/a')
+        client.get('https://x.nl/a')
+    archive.close()
+
+    archive = Archive(str(path), REPLAY)
+    with httpx.Client(transport=ArchiveTransport(archive)) as client:
+        assert [client.get('https://x.nl/a').text for _ in range(3)] == ['1', '2', '2']
+
+
+async def test_async_transport_replays(tmp_path):
+    path = tmp_path / 'corpus.jsonl.gz'
+    archive = Archive(str(path), RECORD)
+    async with httpx.AsyncClient(transport=AsyncArchiveTransport(archive, wrapped=httpx.MockTransport(upstream))) as client:
+        await client.get('https://mealdb.test/filter.php', params={'c': 'Beef'})
+    archive.close()
+
+    archive = Archive(str(path), REPLAY)
+    async with httpx.AsyncClient(transport=AsyncArchiveTransport(archive)) as client:
+        response = await client.get('https://mealdb.test/filter.php', params={'c': 'Beef'})
+    assert response.text == '<p>/filter.php 1</p>'
+    assert archive.misses == 0
+
+
+def test_live_mode_uses_network_transport(monkeypatch):
+    monkeypatch.setattr(http_replay, 'MODE', http_replay.LIVE)
+    assert http_replay.transport() is None
+    assert http_replay.async_transport() is None
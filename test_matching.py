@@ -0,0 +1,74 @@
+"""Tests voor het koppelen van producten tussen ketens in src/matching.py"""
+
+from src import matching
+
+PRODUCTS = [
+    (1, 'ah', 'AH Halfvolle melk', 1, 'l'),
+    (2, 'jumbo', 'Jumbo Halfvolle Melk', 1, 'l'),
+    (3, 'lidl', 'Halfvolle melk', 1, 'l'),
+    (4, 'dirk', '1 de Beste Halfvolle melk', 1, 'l'),
+    (5, 'ah', 'Campina Halfvolle melk', 1, 'l'),
+    (6, 'jumbo', 'Campina halfvolle melk 1L', 1, 'l'),
+    (7, 'plus', 'PLUS Halfvolle melk', 1.5, 'l'),
+    (8, 'ah', 'AH Volle melk', 1, 'l'),
+    (9, 'ah', 'AH Halfvolle melk biologisch', 1, 'l'),
+]
+
+
+def clusters():
+    return sorted(sorted(c) for c in matching.cluster_products(PRODUCTS))
+
+
+def test_normalize_name():
+    assert matching.normalize_name('Crème Fraîche 125 ml') == 'creme fraiche'
+    assert matching.normalize_name('Coca-Cola 6 x 330ml') == 'coca cola'
+
+
+def test_split_brand():
+    assert matching.split_brand('ah halfvolle melk') == ('huismerk', 'halfvolle melk')
+    assert matching.split_brand('campina halfvolle melk') == ('campina', 'campina halfvolle melk')
+
+
+def test_house_brands_match_across_chains():
+    assert [1, 2, 3, 4] in clusters()
+
+
+def test_a_brand_not_merged_with_house_brand():
+    assert [5, 6] in clusters()
+
+
+def test_other_quantity_or_product_stays_apart():
+    linked = {i for c in clusters() for i in c}
+    assert not linked & {7, 8}
+
+
+def test_one_product_per_chain():
+    for cluster in matching.cluster_products(PRODUCTS):
+        chains = [p[1] for p in PRODUCTS if p[0] in cluster]
+        assert len(chains) == len(set(chains))
+
+
+def test_canonical_name():
+    assert matching.canonical_name(['AH Halfvolle melk', 'Jumbo Halfvolle Melk']) == 'halfvolle melk'
+
+
+def test_product_index_links_promotion_to_product():
+    index = matching.ProductIndex([
+        (1, 'AH Halfvolle melk'), (2, 'AH Volle melk'), (3, 'Campina Halfvolle melk'), (4, 'AH Jonge kaas plakken'),
+    ])
+    assert index.match('Halfvolle melk pak 1 liter') == 1
+    assert index.match('Campina halfvolle melk') == 3
+    assert index.match('Pampers luiers') is None
+
+
+def test_diff_clusters_keeps_ids_of_unchanged_clusters():
+    current = {1: 10, 2: 10, 3: 11, 4: 11, 5: 12, 6: 12, 9: 13}
+    clusters = [[1, 2], [3, 4, 7], [5], [8, 9]]
+    reuse, fresh, stale = matching.diff_clusters(clusters, current)
+    # [1, 2] ongewijzigd, [3, 4, 7] groeit, [5] splitst van 6 af, [8, 9] neemt het id van 9 mee
+    assert sorted(reuse) == [(10, [1, 2]), (11, [3, 4, 7]), (12, [5]), (13, [8, 9])]
+    assert fresh == [] and stale == set()
+
+    reuse, fresh, stale = matching.diff_clusters([[5], [6], [20, 21]], current)
+    assert reuse == [(12, [5])] and fresh == [[6], [20, 21]]
+    assert stale == {10, 11, 13}
@@ -0,0 +1,95 @@
+"""Tests voor de receptkeuze van plan_boodschappen in src/planner.py"""
+
+import random
+
+from src import planner
+
+AANBIEDINGEN = [
+    {'product_name': 'AH Kipfilet 500g', 'discount_percent': 30},
+    {'product_name': 'Jumbo Spaghetti', 'discount_percent': None},
+]
+
+
+def candidate(recipe_id, ingredienten, eigen=False):
+    return {'id': recipe_id, 'eigen': eigen, 'ingredienten': ingredienten}
+
+
+def test_score_recipe():
+    score, matches = planner.score_recipe(['kipfilet', 'rijst'], AANBIEDINGEN)
+    assert score == 30
+    assert matches == [('kipfilet', AANBIEDINGEN[0])]
+    # Aanbieding zonder percentage telt als 5
+    assert planner.score_recipe(['spaghetti', None], AANBIEDINGEN)[0] == 5
+
+
+def test_pick_recipes_prefers_score_then_eigen():
+    candidates = [
+        candidate(1, ['tofu']),
+        candidate(2, ['kipfilet']),
+        candidate(3, ['tofu'], eigen=True),
+        candidate(4, ['spaghetti']),
+    ]
+    picked = planner.pick_recipes(candidates, AANBIEDINGEN, 3, random.Random(1))
+    assert [recipe_id for recipe_id, _, _ in picked] == [2, 4, 3]
+
+
+def test_pick_recipes_is_seedable():
+    candidates = [candidate(i, ['tofu']) for i in range(50)]
+    first = planner.pick_recipes(candidates, AANBIEDINGEN, 4, random.Random(7))
+    again = planner.pick_recipes(candidates, AANBIEDINGEN, 4, random.Random(7))
+    assert first == again
+
+
+class RecipeCursor:
+    """recepten met id en bron in het geheugen, voor de queries van fetch_candidates"""
+
+    def __init__(self, ids, eigen=()):
+        self.rows = [{'id': i, 'eigen': i in eigen, 'ingredienten': []} for i in ids]
+        self.result = []
+        self.queries = []
+
+    def execute(self, sql, params=None):
+        self.queries.append(sql)
+        rows = [r for r in self.rows if not r['eigen']]
+        if "WHERE bron = 'eigen'" in sql:
+            self.result = [r for r in self.rows if r['eigen']][:params[-1]]
+        elif 'MIN(id)' in sql:
+            self.result = [{'lo': min(r['id'] for r in self.rows), 'hi': max(r['id'] for r in self.rows)}]
+        elif 'array_position' in sql:
+            ids, _, limit = params[-3:]
+            by_id = {r['id']: r for r in rows}
+            self.result = [by_id[i] for i in ids if i in by_id][:limit]
+        elif 'ORDER BY random()' in sql:
+            exclude, limit = params[-2:]
+            self.result = [r for r in rows if r['id'] not in exclude][:limit]
+        else:
+            self.result = []
+
+    def fetchone(self):
+        return self.result[0]
+
+    def fetchall(self):
+        return self.result
+
+
+def test_candidates_are_random_ids_not_a_window():
+    # 1000 recepten met een groot gat: de steekproef komt van over het hele bereik
+    ids = list(range(1, 501)) + list(range(5001, 5501))
+    cur = RecipeCursor(ids, eigen={1, 2})
+    candidates = planner.fetch_candidates(cur, [], [], random.Random(3), limit=50)
+    sampled = [c['id'] for c in candidates if not c['eigen']]
+    assert len(sampled) == 50 == len(set(sampled))
+    assert any(i <= 500 for i in sampled) and any(i > 5000 for i in sampled)
+    # Geen aaneengesloten venster van opeenvolgende ids
+    assert sorted(sampled) != list(range(min(sampled), min(sampled) + 50))
+    assert {c['id'] for c in candidates if c['eigen']} == {1, 2}
+
+    again = planner.fetch_candidates(RecipeCursor(ids, eigen={1, 2}), [], [], random.Random(3), limit=50)
+    assert [c['id'] for c in again] == [c['id'] for c in candidates]
+
+
+def test_small_table_falls_back_to_random_order():
+    cur = RecipeCursor(range(1, 11))
+    candidates = planner.fetch_candidates(cur, [], [], random.Random(1), limit=50)
+    assert sorted(c['id'] for c in candidates) == list(range(1, 11))
+    assert any('setseed' in sql for sql in cur.queries)
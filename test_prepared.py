@@ -0,0 +1,93 @@
+"""Tests voor de prepared statement registry in src/prepared.py"""
+
+import re
+import sys
+
+import psycopg2
+import pytest
+
+sys.path.insert(0, 'src')
+
+import prepared
+import server  # registreert de statements
+
+
+class FakeCursor:
+    def __init__(self, connection, fail=None):
+        self.connection = connection
+        self.executed = []
+        self.fail = fail
+
+    def execute(self, sql, params=None):
+        self.executed.append(sql)
+        if self.fail and 'EXECUTE' in sql and not sql.startswith('DEALLOCATE'):
+            fail, self.fail = self.fail, None
+            raise fail
+
+
+class FakeConnection:
+    def __init__(self):
+        self.rollbacks = 0
+
+    def rollback(self):
+        self.rollbacks += 1
+
+
+@pytest.mark.parametrize('name', sorted(prepared.STATEMENTS))
+def test_statement_params_are_numbered_consecutively(name):
+    numbers = sorted({int(n) for n in re.findall(r'\$(\d+)', prepared.STATEMENTS[name])})
+    assert numbers == list(range(1, len(numbers) + 1))
+
+
+def test_prepares_once_per_connection(monkeypatch):
+    monkeypatch.setattr(prepared, 'ENABLED', True)
+    first = FakeCursor(FakeConnection())
+    prepared.execute(first, 'goedkoopste_prijs', ('%melk%',))
+    prepared.execute(first, 'goedkoopste_prijs', ('%kaas%',))
+    assert [sql.split()[0] for sql in first.executed] == ['PREPARE', 'EXECUTE', 'EXECUTE']
+
+    # Nieuwe connectie (bijv. na een reconnect) krijgt opnieuw een PREPARE
+    second = FakeCursor(FakeConnection())
+    prepared.execute(second, 'goedkoopste_prijs', ('%melk%',))
+    assert second.executed[0].startswith('PREPARE goedkoopste_prijs AS')
+
+
+def test_changed_result_type_reprepares_and_restores_settings(monkeypatch):
+    monkeypatch.setattr(prepared, 'ENABLED', True)
+    conn = FakeConnection()
+    cur = FakeCursor(conn)
+    prepared.setting(cur, 'statement_timeout', 3000)
+    prepared.execute(cur, 'goedkoopste_prijs', ('%melk%',))
+    # Een sync voegt een kolom toe: het bewaarde plan past niet meer (0A000)
+    cur.fail = psycopg2.errors.FeatureNotSupported('cached plan must not change result type')
+    cur.executed.clear()
+    prepared.execute(cur, 'goedkoopste_prijs', ('%melk%',))
+    assert [sql.split(' AS ')[0] for sql in cur.executed] == [
+        'EXECUTE goedkoopste_prijs (%s)', 'SET statement_timeout = %s',
+        'DEALLOCATE goedkoopste_prijs', 'PREPARE goedkoopste_prijs', 'EXECUTE goedkoopste_prijs (%s)']
+    # Geen savepoints meer: de afgebroken transactie wordt teruggedraaid, de statement_timeout opnieuw gezet
+    assert conn.rollbacks == 1
+
+    # Zonder fouten alleen de EXECUTE
+    cur.executed.clear()
+    prepared.execute(cur, 'goedkoopste_prijs', ('%melk%',))
+    assert cur.executed == ['EXECUTE goedkoopste_prijs (%s)']
+
+
+def test_plain_sql_fallback():
+    sql, values = prepared.plain_sql('zoek_producten_keten_prijs', ('%melk%', 'ah', 10))
+    assert '$' not in sql
+    assert sql.count('%s') == 3
+    assert values == ['%melk%', 'ah', 10]
+
+
+def test_benchmark_has_sample_params_for_every_statement():
+    from benchmarks.prepared_statements import SAMPLE_PARAMS
+    for name, sql in prepared.STATEMENTS.items():
+        assert len(SAMPLE_PARAMS[name]) == len(set(re.findall(r'\$(\d+)', sql))), name
+
+
+@pytest.mark.parametrize('name', sorted(prepared.STATEMENTS))
+def test_statements_list_their_columns(name):
+    # Een kolom die een sync toevoegt mag het resultaattype van een voorbereid statement niet veranderen
+    assert not re.search(r'(\b[a-z]\.|SELECT\s+)\*', prepared.STATEMENTS[name])
@@ -0,0 +1,102 @@
+"""Tests voor het aanbiedingsarchief in src/promo_history.py"""
+
+from datetime import date, timedelta
+
+from src import promo_history
+
+
+class RecordingCursor:
+    def __init__(self):
+        self.statements = []
+
+    def execute(self, sql, params=None):
+        self.statements.append(' '.join(sql.split()))
+
+
+def stats(count, interval, expected):
+    return {'promo_count': count, 'avg_interval_days': interval, 'expected_next': expected}
+
+
+def test_ensure_partitions_per_month():
+    cur = RecordingCursor()
+    promo_history.ensure_partitions(cur, date(2025, 11, 20), date(2026, 1, 3))
+    assert len(cur.statements) == 3
+    assert 'promotion_history_y2025m12' in cur.statements[1]
+    assert "FROM ('2025-12-01') TO ('2026-01-01')" in cur.statements[1]
+    assert "FROM ('2026-01-01') TO ('2026-02-01')" in cur.statements[2]
+
+
+def test_expected_soon():
+    today = date(2026, 3, 10)
+    assert promo_history.expected_soon(stats(5, 28, date(2026, 3, 17)), today)
+    assert promo_history.expected_soon(stats(5, 28, date(2026, 3, 1)), today)
+    # Te ver weg of de cyclus is al lang voorbij
+    assert not promo_history.expected_soon(stats(5, 28, date(2026, 4, 20)), today)
+    assert not promo_history.expected_soon(stats(5, 28, date(2026, 1, 1)), today)
+
+
+def test_expected_soon_needs_history():
+    today = date(2026, 3, 10)
+    assert not promo_history.expected_soon(None, today)
+    assert not promo_history.expected_soon(stats(2, 28, date(2026, 3, 12)), today)
+    assert not promo_history.expected_soon(stats(4, None, None), today)
+
+
+def promotion(name, start, days=7, product_id=None):
+    return ('folderz', name, product_id, 2.0, 1.5, 25, 'folder', start, start + timedelta(days=days))
+
+
+def apply(history, inserts, extensions):
+    """Archief na een run: nieuwe rijen erbij, verlengde cycli bijwerken"""
+    rows = {(code, name, start): [code, name, pid, start, end] for code, name, pid, start, end in history}
+    for code, name, pid, _, _, _, _, start, end in inserts:
+        rows[(code, name, start)] = [code, name, pid, start, end]
+    for end, code, name, start in extensions:
+        rows[(code, name, start)][4] = end
+    return [tuple(row) for row in rows.values()]
+
+
+def test_consecutive_runs_extend_one_cycle():
+    history = []
+    monday = date(2026, 3, 9)
+    # Twee runs per dag, twee dagen: elke run ziet dezelfde aanbieding met start_date = vandaag
+    for run_day in (monday, monday, monday + timedelta(days=1), monday + timedelta(days=1)):
+        inserts, extensions = promo_history.merge_cycles(history, [promotion('Koffie', run_day)], run_day)
+        history = apply(history, inserts, extensions)
+    assert history == [('folderz', 'Koffie', None, monday, monday + timedelta(days=8))]
+
+    # Een nieuwe aanbieding weken later is wel een nieuwe cyclus
+    later = monday + timedelta(days=28)
+    inserts, extensions = promo_history.merge_cycles(history, [promotion('Koffie', later)], later)
+    assert len(inserts) == 1 and extensions == []
+
+
+def test_cycles_match_on_product_id():
+    start = date(2026, 3, 9)
+    history = [('folderz', 'Koffie 500g', 7, start, start + timedelta(days=7))]
+    inserts, extensions = promo_history.merge_cycles(
+        history, [promotion('KOFFIE 500 gram', start + timedelta(days=1), product_id=7)], start)
+    assert inserts == [] and extensions == [(start + timedelta(days=8), 'folderz', 'Koffie 500g', start)]
+
+
+class OldestPromotionCursor(RecordingCursor):
+    def __init__(self, oldest):
+        super().__init__()
+        self.oldest = oldest
+
+    def fetchone(self):
+        return (self.oldest,)
+
+
+def test_prepare_creates_partitions_before_the_write():
+    today = date(2026, 10, 19)
+    cur = OldestPromotionCursor(date(2026, 6, 2))
+    promo_history.prepare(cur, today)
+    partitions = [s for s in cur.statements if 'PARTITION OF promotion_history FOR VALUES' in s]
+    # Van de oudste actuele aanbieding t/m een maand vooruit
+    assert "FROM ('2026-06-01')" in partitions[0] and "FROM ('2026-11-01')" in partitions[-1]
+    assert len(partitions) == 6
+
+    cur = OldestPromotionCursor(None)
+    promo_history.prepare(cur, today)
+    assert sum('FOR VALUES' in s for s in cur.statements) == 4  # augustus t/m november
@@ -0,0 +1,22 @@
+"""Tests voor de zoektokens van recepten in src/recipes.py"""
+
+from src import recipes
+
+
+def test_tokenize():
+    assert recipes.tokenize('Crème fraîche') == ['creme', 'fraiche']
+    assert recipes.tokenize('Pasta met de kip') == ['pasta', 'kip']
+    assert recipes.tokenize('') == []
+
+
+def test_ingredient_tokens():
+    ingredienten = [{'naam': 'Rode ui', 'hoeveelheid': '1'}, {'naam': 'ui', 'hoeveelheid': '2'},
+                    {'naam': 'Kipfilet', 'hoeveelheid': '300g'}]
+    assert recipes.ingredient_tokens(ingredienten) == ['kipfilet', 'rode', 'ui']
+    assert recipes.ingredient_tokens(None) == []
+
+
+def test_tag_tokens_are_exact_words():
+    # 'vegan' mag niet meer matchen op een tag waar het toevallig in staat
+    assert recipes.tag_tokens(['Vegetarisch', 'snel klaar']) == ['klaar', 'snel', 'vegetarisch']
+    assert 'vegan' not in recipes.tag_tokens(['veganistisch'])
@@ -0,0 +1,63 @@
+"""Tests voor het samenvoegen van identieke calls in src/singleflight.py"""
+
+import asyncio
+
+import pytest
+
+from src import singleflight
+
+
+def test_call_key_ignores_argument_order():
+    assert singleflight.call_key('zoek_producten', {'query': 'melk', 'limit': 5}) == \
+        singleflight.call_key('zoek_producten', {'limit': 5, 'query': 'melk'})
+    assert singleflight.call_key('zoek_producten', None) == singleflight.call_key('zoek_producten', {})
+    assert singleflight.call_key('zoek_producten', {'query': 'melk'}) != singleflight.call_key('zoek_producten', {'query': 'kaas'})
+
+
+async def test_concurrent_calls_share_one_execution():
+    flight = singleflight.SingleFlight()
+    runs = 0
+
+    async def work():
+        nonlocal runs
+        runs += 1
+        await asyncio.sleep(0.01)
+        return ['resultaat']
+
+    results = await asyncio.gather(*(flight.do('key', work) for _ in range(5)))
+    assert runs == 1
+    assert [shared for _, shared in results].count(False) == 1
+    assert all(result == ['resultaat'] for result, _ in results)
+    assert len(flight) == 0
+
+    # Na afloop wordt niets bewaard
+    await flight.do('key', work)
+    assert runs == 2
+
+
+async def test_errors_reach_all_waiters():
+    flight = singleflight.SingleFlight()
+
+    async def fail():
+        await asyncio.sleep(0.01)
+        raise RuntimeError('kapot')
+
+    results = await asyncio.gather(flight.do('key', fail), flight.do('key', fail), return_exceptions=True)
+    assert all(isinstance(r, RuntimeError) for r in results)
+    assert len(flight) == 0
+
+
+async def test_cancelled_caller_does_not_cancel_others():
+    flight = singleflight.SingleFlight()
+
+    async def work():
+        await asyncio.sleep(0.02)
+        return 'klaar'
+
+    first = asyncio.ensure_future(flight.do('key', work))
+    second = asyncio.ensure_future(flight.do('key', work))
+    await asyncio.sleep(0)
+    first.cancel()
+    assert await second == ('klaar', True)
+    with pytest.raises(asyncio.CancelledError):
+        await first
@@ -0,0 +1,92 @@
+"""Tests voor de sync afhankelijkheidsgraaf in src/sync_dag.py"""
+
+import threading
+import time
+
+import pytest
+
+from src import sync_dag
+
+GRAPH = {
+    'prices': (),
+    'folderz': (),
+    'matching': ('prices',),
+    'price_drops': ('prices', 'folderz'),
+    'analyze': ('matching', 'price_drops'),
+}
+
+
+def test_validate_rejects_unknown_and_cycles():
+    with pytest.raises(ValueError, match='onbekende'):
+        sync_dag.validate({'a': ('b',)})
+    with pytest.raises(ValueError, match='Cyclus'):
+        sync_dag.validate({'a': ('b',), 'b': ('a',)})
+
+
+def test_independent_stages_run_concurrently_and_dependents_wait():
+    events = []
+    lock = threading.Lock()
+    both_running = threading.Barrier(2, timeout=2)
+
+    def run(stage):
+        with lock:
+            events.append(('start', stage))
+        if stage in ('prices', 'folderz'):
+            both_running.wait()  # faalt als prices en folderz niet tegelijk draaien
+        with lock:
+            events.append(('end', stage))
+
+    results = sync_dag.run_dag(GRAPH, run)
+    assert all(r['status'] == sync_dag.OK for r in results.values())
+    for stage, deps in GRAPH.items():
+        for dep in deps:
+            assert events.index(('end', dep)) < events.index(('start', stage))
+
+
+def test_dependent_starts_when_its_inputs_are_done_not_everything():
+    release_folderz = threading.Event()
+    order = []
+
+    def run(stage):
+        if stage == 'folderz':
+            assert release_folderz.wait(2)
+        if stage == 'matching':
+            release_folderz.set()
+        order.append(stage)
+
+    sync_dag.run_dag(GRAPH, run)
+    assert order.index('matching') < order.index('folderz')
+
+
+def test_failure_skips_dependents_only():
+    def run(stage):
+        if stage == 'folderz':
+            raise RuntimeError('folderz onbereikbaar')
+        return stage != 'matching'
+
+    results = sync_dag.run_dag(GRAPH, run)
+    assert results['prices']['status'] == sync_dag.OK
+    assert results['folderz']['status'] == sync_dag.FAILED
+    assert results['folderz']['error'] == 'folderz onbereikbaar'
+    assert results['matching']['status'] == sync_dag.FAILED
+    assert results['price_drops']['status'] == sync_dag.SKIPPED
+    assert results['analyze']['status'] == sync_dag.SKIPPED
+
+
+def test_timings_and_critical_path():
+    def run(stage):
+        time.sleep(0.05 if stage == 'prices' else 0.01)
+
+    results = sync_dag.run_dag(GRAPH, run)
+    assert results['matching']['start'] >= results['prices']['start'] + results['prices']['duration']
+    total, path = sync_dag.critical_path(GRAPH, results)
+    assert path[0] == 'prices' and path[-1] == 'analyze'
+    assert total >= 0.05
+
+
+def test_select_restricts_graph():
+    assert sync_dag.select(GRAPH, ['prices', 'matching']) == {'prices': (), 'matching': ('prices',)}
+    selected = sync_dag.select(GRAPH, skip=['folderz'])
+    assert 'folderz' not in selected and selected['price_drops'] == ('prices',)
+    with pytest.raises(ValueError):
+        sync_dag.select(GRAPH, ['onbekend'])
@@ -0,0 +1,126 @@
+"""Tests voor de eenheid-parser en de delta sync in sync_prices.py"""
+
+import pytest
+
+from sync_prices import content_hash, diff_products, feed_products, parse_unit, normalize_unit_price
+
+# (eenheid zoals in de Checkjebon feed, verwachte hoeveelheid, verwachte basiseenheid)
+UNIT_CORPUS = [
+    ('500 g', 0.5, 'kg'),
+    ('500g', 0.5, 'kg'),
+    ('1 kg', 1.0, 'kg'),
+    ('1,5 kg', 1.5, 'kg'),
+    ('2.5 kilo', 2.5, 'kg'),
+    ('250 gram', 0.25, 'kg'),
+    ('ca. 800 g', 0.8, 'kg'),
+    ('per kilo', 1.0, 'kg'),
+    ('per 100 gram', 0.1, 'kg'),
+    ('1 L', 1.0, 'l'),
+    ('1 liter', 1.0, 'l'),
+    ('1,5 l', 1.5, 'l'),
+    ('75 cl', 0.75, 'l'),
+    ('330 ML', 0.33, 'l'),
+    ('6 x 330 ml', 1.98, 'l'),
+    ('6x0,33l', 1.98, 'l'),
+    ('2 x 6 x 250 ml', 3.0, 'l'),
+    ('4 x 125 g', 0.5, 'kg'),
+    ('per stuk', 1.0, 'stuk'),
+    ('10 stuks', 10.0, 'stuk'),
+    ('6 st.', 6.0, 'stuk'),
+    ('8 rollen', 8.0, 'stuk'),
+    ('1 bos', 1.0, 'stuk'),
+    ('40 wasbeurten', 40.0, 'stuk'),
+]
+
+UNPARSEABLE = ['', None, 'los', 'per doos', 'variant', '0 g']
+
+
+@pytest.mark.parametrize('unit,quantity,base', UNIT_CORPUS)
+def test_parse_unit(unit, quantity, base):
+    parsed = parse_unit(unit)
+    assert parsed is not None
+    assert parsed[0] == pytest.approx(quantity)
+    assert parsed[1] == base
+
+
+@pytest.mark.parametrize('unit', UNPARSEABLE)
+def test_parse_unit_unknown(unit):
+    assert parse_unit(unit) is None
+
+
+def test_normalize_unit_price():
+    quantity, base, unit_price = normalize_unit_price(1.99, '500 g')
+    assert (quantity, base) == (0.5, 'kg')
+    assert unit_price == pytest.approx(3.98)
+    assert normalize_unit_price(1.99, 'los') == (None, None, None)
+
+
+def test_parse_unit_caches_repeated_units():
+    # Een volledige sync heeft ~110k producten; met veel herhaalde eenheden
+    units = [u for u, _, _ in UNIT_CORPUS] + [f'{n} g' for n in range(1, 5000)]
+    rows = (units * (110_000 // len(units) + 1))[:110_000]
+    parse_unit.cache_clear()
+    for unit in rows:
+        parse_unit(unit)
+    info = parse_unit.cache_info()
+    # Elke verschillende eenheid wordt één keer geparsed
+    assert info.misses == len(set(units))
+    assert info.hits == len(rows) - info.misses
+
+
+def feed(*chains):
+    return [{'n': code, 'd': [{'n': n, 'p': p, 's': '500 g', 'l': f'/{n}'} for n, p in products]}
+            for code, products in chains]
+
+
+def stored_from(data, ids=None):
+    ids = iter(ids or range(1, 10_000))
+    return {key: (next(ids), row[0], content_hash(row), False) for key, row in feed_products(data).items()}
+
+
+def test_feed_products_skips_duplicates_and_empty_prices():
+    data = feed(('ah', [('melk', 1.09), ('melk', 9.99), ('gratis', 0)]))
+    incoming = feed_products(data)
+    assert list(incoming) == [('ah', 'melk')]
+    assert incoming[('ah', 'melk')][:3] == (1.09, '500 g', '/melk')
+
+
+def test_diff_only_writes_changes():
+    stored = stored_from(feed(('ah', [('melk', 1.09), ('kaas', 4.99), ('brood', 2.19), ('boter', 2.49)])))
+    incoming = feed_products(feed(('ah', [('melk', 1.09), ('kaas', 4.49), ('brood', 2.19), ('boter', 2.49),
+                                          ('eieren', 3.29)])))
+    inserts, updates, deletes = diff_products(stored, incoming)
+    assert [key for key, _ in inserts] == [('ah', 'eieren')]
+    assert [(pid, changed) for pid, _, changed in updates] == [(2, True)]
+    assert deletes == []
+
+
+def test_diff_link_change_is_update_without_price_point():
+    stored = stored_from(feed(('ah', [('melk', 1.09)])))
+    data = feed(('ah', [('melk', 1.09)]))
+    data[0]['d'][0]['l'] = '/nieuwe-link'
+    _, updates, _ = diff_products(stored, feed_products(data))
+    assert [(pid, changed) for pid, _, changed in updates] == [(1, False)]
+
+
+def test_diff_deletes_only_for_complete_chains():
+    stored = stored_from(feed(('ah', [('melk', 1.09), ('kaas', 4.99)]),
+                              ('jumbo', [(f'p{i}', 1.0) for i in range(10)]),
+                              ('lidl', [('melk', 0.99)])))
+    # ah: kaas verdwenen; jumbo: feed afgekapt (2 van 10); lidl: ontbreekt helemaal in de feed
+    incoming = feed_products(feed(('ah', [('melk', 1.09)]), ('jumbo', [('p0', 1.0), ('p1', 1.0)])))
+    _, _, deletes = diff_products(stored, incoming)
+    assert deletes == [stored[('ah', 'kaas')][0]]
+
+
+def test_diff_missing_products_come_back_with_their_id():
+    stored = stored_from(feed(('ah', [('melk', 1.09), ('kaas', 4.99)])))
+    stored[('ah', 'kaas')] = stored[('ah', 'kaas')][:3] + (True,)
+    # kaas stond als verdwenen en is terug (zelfde prijs): weer actief onder hetzelfde id, geen nieuw product
+    inserts, updates, deletes = diff_products(stored, feed_products(feed(('ah', [('melk', 1.09), ('kaas', 4.99)]))))
+    assert inserts == [] and deletes == []
+    assert [(pid, changed) for pid, _, changed in updates] == [(2, False)]
+
+    # Al verdwenen producten worden niet opnieuw gemarkeerd en tellen niet mee voor de afkap-grens
+    _, updates, deletes = diff_products(stored, feed_products(feed(('ah', [('melk', 1.09)]))))
+    assert updates == [] and deletes == []
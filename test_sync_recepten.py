@@ -0,0 +1,98 @@
+"""Tests voor de TheMealDB sync in sync_recepten.py met een lokale stub API"""
+
+import asyncio
+
+import httpx
+
+import sync_recepten
+
+MEALS = {
+    'Beef': [('1', 'Beef Stew'), ('2', 'Burger')],
+    'Chicken': [('3', 'Chicken Curry')],
+}
+
+
+class StubMealDB:
+    def __init__(self, fail=()):
+        self.fail = set(fail)
+        self.lookups = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def __call__(self, request):
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(0.01)
+            if request.url.path.endswith('/filter.php'):
+                category = request.url.params['c']
+                if category in self.fail:
+                    return httpx.Response(404)
+                meals = [{'idMeal': i, 'strMeal': naam, 'strMealThumb': f'https://img/{i}.jpg'}
+                         for i, naam in MEALS.get(category, [])]
+                return httpx.Response(200, json={'meals': meals or None})
+            meal_id = request.url.params['i']
+            self.lookups.append(meal_id)
+            naam = next(naam for meals in MEALS.values() for i, naam in meals if i == meal_id)
+            return httpx.Response(200, json={'meals': [{'idMeal': meal_id, 'strMeal': naam, 'strCategory': 'Beef',
+                                                        'strIngredient1': 'Beef', 'strMeasure1': '500g',
+                                                        'strInstructions': 'Bak.'}]})
+        finally:
+            self.in_flight -= 1
+
+
+def fetch(stub, known=None, concurrency=2):
+    return asyncio.run(sync_recepten.fetch_mealdb_recipes(
+        known, base='http://stub/api', concurrency=concurrency, transport=httpx.MockTransport(stub)))
+
+
+def test_fetch_all_meals_with_bounded_concurrency():
+    stub = StubMealDB()
+    meals, keep, complete = fetch(stub)
+    assert sorted(m['idMeal'] for m in meals) == ['1', '2', '3']
+    assert keep == set()
+    assert complete
+    assert stub.max_in_flight <= 2
+
+
+def test_unchanged_meals_are_not_looked_up():
+    stub = StubMealDB()
+    known = {'1': ('Beef Stew', 'https://img/1.jpg'), '3': ('Oude naam', 'https://img/3.jpg')}
+    meals, keep, _ = fetch(stub, known)
+    assert sorted(stub.lookups) == ['2', '3']
+    assert keep == {'1'}
+    assert sorted(m['idMeal'] for m in meals) == ['2', '3']
+
+
+def test_failed_category_marks_sync_incomplete():
+    meals, _, complete = fetch(StubMealDB(fail={'Chicken'}))
+    assert not complete
+    assert sorted(m['idMeal'] for m in meals) == ['1', '2']
+
+
+def test_recipe_row_has_tokens():
+    row = sync_recepten.recipe_row(sync_recepten.parse_mealdb_recipe(
+        {'idMeal': '9', 'strMeal': 'Soep', 'strIngredient1': 'Rode Ui', 'strTags': 'Soup,Vegan',
+         'strInstructions': 'Kook.'}))
+    assert len(row) == len(sync_recepten.RECIPE_COLUMNS)
+    assert row[-2] == ['rode', 'ui']
+    assert row[-1] == ['soup', 'vegan']
+
+
+def test_mealdb_source_skips_the_shared_http_client(monkeypatch):
+    from src import sync_engine
+
+    class FakeConnection:
+        closed = False
+
+        def cursor(self):
+            return None
+
+        def close(self):
+            self.closed = True
+
+    monkeypatch.setattr(sync_engine.psycopg2, 'connect', lambda **kwargs: FakeConnection())
+    ctx = sync_engine.SyncContext({}, http=sync_recepten.MEALDB.http)
+    assert ctx.http is None
+    ctx.close()
+    assert ctx.conn.closed
@@ -0,0 +1,124 @@
+"""Tests voor advisory locks en het sync_runs logboek in src/sync_runs.py"""
+
+from datetime import datetime
+
+import psycopg2
+import pytest
+
+from src import sync_runs
+
+
+class FakeDatabase:
+    """Advisory locks per sessie en de sync_runs tabel, genoeg voor run_with_lock"""
+
+    def __init__(self):
+        self.locks = {}
+        self.runs = []
+
+    def connect(self):
+        return FakeConnection(self)
+
+
+class FakeConnection:
+    def __init__(self, db):
+        self.db = db
+
+    def cursor(self):
+        return FakeCursor(self)
+
+    def close(self):
+        self.db.locks = {k: c for k, c in self.db.locks.items() if c is not self}
+
+
+class FakeCursor:
+    def __init__(self, conn):
+        self.conn = conn
+        self.db = conn.db
+        self.result = None
+
+    def execute(self, sql, params=None):
+        sql = ' '.join(sql.split())
+        if 'advisory_lock' in sql:
+            key = params
+            owner = self.db.locks.setdefault(key, self.conn)
+            if 'pg_try_' in sql:
+                self.result = (owner is self.conn,)
+            elif owner is not self.conn:
+                raise psycopg2.errors.LockNotAvailable('lock timeout')
+        elif sql.startswith('SELECT id, sync_name'):
+            running = [r for r in self.db.runs if r['lock_name'] == params[0] and r['status'] == params[1]]
+            self.result = running and (running[-1]['id'], running[-1]['sync_name'], running[-1]['started_at'])
+        elif sql.startswith('INSERT INTO sync_runs'):
+            name, lock, status, _host, _pid = params
+            self.db.runs.append({'id': len(self.db.runs) + 1, 'sync_name': name, 'lock_name': lock,
+                                 'status': status, 'started_at': datetime(2026, 3, 1, 6, 30),
+                                 'rows_written': None, 'error': None})
+            self.result = (len(self.db.runs),)
+        elif sql.startswith('UPDATE sync_runs SET status = %s, finished_at = NOW(), rows_written'):
+            status, rows, error, run_id = params
+            self.db.runs[run_id - 1].update(status=status, rows_written=rows, error=error)
+        elif sql.startswith('UPDATE sync_runs'):
+            for r in self.db.runs:
+                if r['lock_name'] == params[1] and r['status'] == params[2]:
+                    r['status'] = params[0]
+
+    def fetchone(self):
+        return self.result or None
+
+
+def test_run_is_recorded_with_rows_written():
+    db = FakeDatabase()
+    assert sync_runs.run_with_lock(db.connect(), 'prices', lambda: 1234) == 1234
+    assert db.runs[0]['status'] == sync_runs.OK
+    assert db.runs[0]['rows_written'] == 1234
+
+
+def test_overlapping_run_is_skipped():
+    db = FakeDatabase()
+    nested = []
+
+    def slow_sync():
+        # Tweede proces start terwijl de eerste run nog bezig is
+        nested.append(sync_runs.run_with_lock(db.connect(), 'drogist_only', lambda: 1 / 0, lock='folderz',
+                                              policy=sync_runs.SKIP))
+        return 10
+
+    assert sync_runs.run_with_lock(db.connect(), 'folderz', slow_sync, policy=sync_runs.SKIP) == 10
+    assert nested == [None]
+    skipped = next(r for r in db.runs if r['sync_name'] == 'drogist_only')
+    assert skipped['status'] == sync_runs.SKIPPED
+    assert 'folderz draait al (run 1, folderz sinds 06:30:00)' in skipped['error']
+
+
+def test_wait_policy_gives_up_after_lock_timeout():
+    db = FakeDatabase()
+    holder = db.connect()
+    assert sync_runs.acquire(holder.cursor(), 'prices', policy=sync_runs.SKIP)
+    assert not sync_runs.acquire(db.connect().cursor(), 'prices', policy=sync_runs.WAIT, wait=0.1)
+    holder.close()
+    assert sync_runs.acquire(db.connect().cursor(), 'prices', policy=sync_runs.WAIT, wait=0.1)
+
+
+def test_failure_is_recorded_and_reraised():
+    db = FakeDatabase()
+
+    def failing_sync():
+        raise RuntimeError('API down')
+
+    with pytest.raises(RuntimeError):
+        sync_runs.run_with_lock(db.connect(), 'recepten', failing_sync)
+    assert db.runs[0]['status'] == sync_runs.FAILED
+    assert db.runs[0]['error'] == 'API down'
+
+
+def test_stale_running_rows_are_marked_aborted():
+    db = FakeDatabase()
+    db.runs.append({'id': 1, 'sync_name': 'prices', 'lock_name': 'prices', 'status': sync_runs.RUNNING,
+                    'started_at': datetime(2026, 3, 1), 'rows_written': None, 'error': None})
+    sync_runs.run_with_lock(db.connect(), 'prices', lambda: 0)
+    assert [r['status'] for r in db.runs] == [sync_runs.ABORTED, sync_runs.OK]
+
+
+def test_unknown_policy():
+    with pytest.raises(ValueError):
+        sync_runs.acquire(FakeDatabase().connect().cursor(), 'prices', policy='retry')
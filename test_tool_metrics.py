@@ -0,0 +1,50 @@
+"""Tests voor de Prometheus metrics in src/tool_metrics.py"""
+
+import pytest
+
+from src import tool_metrics
+
+
+@pytest.fixture(autouse=True)
+def clean_metrics():
+    tool_metrics.reset()
+    yield
+    tool_metrics.reset()
+
+
+def test_track_tool_records_latency_and_queries():
+    with tool_metrics.track_tool('zoek_producten') as stats:
+        stats.queries += 2
+        stats.rows += 10
+    with pytest.raises(RuntimeError):
+        with tool_metrics.track_tool('zoek_producten'):
+            raise RuntimeError('kapot')
+
+    summary = tool_metrics.snapshot()['zoek_producten']
+    assert summary['calls'] == 2
+    assert summary['errors'] == 1
+    assert summary['queries'] == 2
+    assert summary['rows'] == 10
+
+
+def test_render_prometheus_format():
+    with tool_metrics.track_tool('lijst_supermarkten'):
+        pass
+    tool_metrics.record_checkout(0.002, 10)
+    text = tool_metrics.render()
+
+    assert '# TYPE mcp_tool_latency_seconds histogram' in text
+    assert 'mcp_tool_calls_total{tool="lijst_supermarkten"} 1' in text
+    assert 'mcp_tool_latency_seconds_bucket{tool="lijst_supermarkten",le="+Inf"} 1' in text
+    assert 'mcp_db_pool_in_use 1' in text
+    assert 'mcp_db_pool_saturation 0.1000' in text
+    tool_metrics.record_release()
+    assert 'mcp_db_pool_in_use 0' in tool_metrics.render()
+
+
+def test_tool_label_cardinality_is_bounded():
+    for i in range(tool_metrics.MAX_TOOL_LABELS + 5):
+        with tool_metrics.track_tool(f'tool_{i}'):
+            pass
+    assert len(tool_metrics.snapshot()) == tool_metrics.MAX_TOOL_LABELS + 1
+    assert tool_metrics.snapshot()['other']['calls'] == 5
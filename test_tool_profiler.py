@@ -0,0 +1,40 @@
+"""Tests voor het profileren van trage tool calls in src/tool_profiler.py"""
+
+import json
+import os
+import sys
+
+sys.path.insert(0, 'src')
+
+import tool_profiler
+
+
+def profile_all(monkeypatch, tmp_path):
+    directory = tmp_path / 'profiles'
+    monkeypatch.setattr(tool_profiler, 'PROFILE_DIR', str(directory))
+    monkeypatch.setattr(tool_profiler, 'PROFILE_SAMPLE_RATE', 1.0)
+    monkeypatch.setattr(tool_profiler, 'PROFILE_THRESHOLD_MS', 0)
+    return directory
+
+
+def test_profiles_call_into_profile_dir(monkeypatch, tmp_path):
+    directory = profile_all(monkeypatch, tmp_path)
+    result = tool_profiler.run('zoek_producten', {'query': 'melk'}, lambda name, arguments: [name])
+    assert result == ['zoek_producten']
+
+    files = sorted(os.listdir(directory))
+    assert len(files) == 2
+    prof, queries = sorted(files, key=lambda f: f.endswith('.json'))
+    assert '_zoek_producten_' in prof and prof.endswith('ms.prof')
+    with open(directory / queries) as f:
+        data = json.load(f)
+    assert data['tool'] == 'zoek_producten' and data['arguments'] == {'query': 'melk'}
+    assert data['queries'] == []
+
+
+def test_tool_name_cannot_leave_profile_dir(monkeypatch, tmp_path):
+    directory = profile_all(monkeypatch, tmp_path)
+    tool_profiler.run('../../etc/x', {}, lambda name, arguments: None)
+    assert sorted(p.name for p in tmp_path.iterdir()) == ['profiles']
+    assert all('/' not in f and '..' not in f for f in os.listdir(directory))
+    assert len(os.listdir(directory)) == 2